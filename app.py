@@ -3,11 +3,18 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from contextlib import nullcontext
 import io
+import os
 import numpy as np
 from utils.data_processor import DataProcessor
-from utils.reconciliation import ReconciliationEngine
+from utils.file_cache import FileCache
+from utils.layout_registry import LayoutRegistry
+from utils.reconciliation import ReconciliationEngine, CASCADA_WORKFLOW1
+from utils.candidate_cache import CandidateCache
 from utils.chart_generator import ChartGenerator
+from utils.memory_tracker import MemoryTracker, activar_copy_on_write
+from utils.instrumentation import configurar_logging
 
 # Configuración de la página
 st.set_page_config(
@@ -17,6 +24,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Copias superficiales entre etapas: solo se materializan las columnas que se modifican. La opción
+# es de todo el proceso (la comparten las sesiones), así que se fija una vez y no se cambia por bloque
+activar_copy_on_write()
+
+# Medición de memoria por etapa (tracemalloc): hace más lenta la carga y la conciliación, por
+# eso se activa desde la barra lateral o con CONCILIACION_MEDIR_MEMORIA=1
+MEDIR_MEMORIA = os.environ.get('CONCILIACION_MEDIR_MEMORIA', '0') == '1'
+
+# Mensajes de conciliación por logging (nivel en CONCILIACION_LOG_LEVEL; WARNING por defecto)
+configurar_logging()
+
 # Inicializar session state
 if 'banco_data' not in st.session_state:
     st.session_state.banco_data = None
@@ -166,17 +184,23 @@ def main():
         
         # Estado de archivos cargados
         if st.session_state.banco_data is not None:
-            st.success(f"✅ Archivo bancario cargado ({len(st.session_state.banco_data)} registros)")
+            st.success(f"✅ Archivo bancario cargado ({len(st.session_state.banco_data)} movimientos, sin encabezado ni totales)")
         else:
             st.warning("⏳ Archivo bancario pendiente")
             
         if st.session_state.sistema_data is not None:
-            st.success(f"✅ Archivo sistema cargado ({len(st.session_state.sistema_data)} registros)")
+            st.success(f"✅ Archivo sistema cargado ({len(st.session_state.sistema_data)} movimientos, sin encabezado ni totales)")
         else:
             st.warning("⏳ Archivo sistema pendiente")
             
         if st.session_state.reconciliation_result is not None:
             st.info(f"📊 Conciliación realizada")
+        
+        st.session_state.medir_memoria = st.checkbox(
+            "Medir memoria por etapa",
+            value=st.session_state.get('medir_memoria', MEDIR_MEMORIA),
+            help="Registra el pico de memoria de la carga y de cada etapa de la conciliación (más lento)"
+        )
     
     # Tabs principales (corregido)
     tab1, tab2, tab3, tab4 = st.tabs(["📤 Carga de Archivos", "⚙️ Procesamiento", "📊 Resultados", "📈 Analítica"])
@@ -187,14 +211,17 @@ def main():
     with tab2:
         processing_section()
     
-    with tab3:
-        results_section()
-        
-    with tab4:
-        if st.session_state.reconciliation_result is not None:
-            analytics_section()
-        else:
-            st.info("ℹ️ Ejecuta la conciliación para ver los analíticos.")
+    # Resultados, gráficos, descargas y analítica leen las mismas vistas: se arman una vez por render
+    result = st.session_state.reconciliation_result
+    with result.memoizar_vistas() if result is not None else nullcontext():
+        with tab3:
+            results_section()
+            
+        with tab4:
+            if st.session_state.reconciliation_result is not None:
+                analytics_section()
+            else:
+                st.info("ℹ️ Ejecuta la conciliación para ver los analíticos.")
 
 def prepare_verified_table_display(result):
     """Prepara la tabla de verificadas con el formato requerido"""
@@ -261,6 +288,16 @@ def prepare_sistema_table_display(sistema_df):
             display_df = display_df.drop(columns=[col])
     return display_df
 
+@st.cache_resource
+def get_file_cache():
+    """Caché en disco de archivos limpios, compartida entre sesiones y reruns"""
+    return FileCache()
+
+@st.cache_resource
+def get_layout_registry():
+    """Layouts de archivos ya vistos, guardados junto a la caché de archivos"""
+    return LayoutRegistry(os.path.join(get_file_cache().directorio, 'layouts.json'))
+
 def upload_files_section():
     st.markdown("### 📂 **Carga de Archivos**", unsafe_allow_html=True)
     
@@ -279,19 +316,34 @@ def upload_files_section():
         
         if banco_file is not None:
             try:
-                processor = DataProcessor()
-                df = processor.read_file(banco_file)
+                processor = DataProcessor(compacto=True, layout_registry=get_layout_registry())
                 
                 if processor.is_bank_file(banco_file.name):
-                    # Procesar y limpiar archivo bancario
-                    processed_df = processor.process_bank_file(df.copy())
-                    st.session_state.banco_data = df  # Datos originales
-                    st.session_state.banco_processed = processed_df  # Datos procesados
+                    # Mismo contenido: se conservan los DataFrames de la sesión (y con ellos la caché de pares)
+                    file_cache = get_file_cache()
+                    clave = file_cache.clave(banco_file, 'banco', processor.firma())
+                    if st.session_state.get('banco_clave') != clave or 'banco_processed' not in st.session_state:
+                        # Leer y limpiar por bloques; una re-subida del mismo archivo sale de la caché
+                        memory_tracker = nuevo_memory_tracker()
+                        with memory_tracker.etapa('carga_banco'):
+                            processed_df = file_cache.cargar_archivo(banco_file, 'banco', processor, clave=clave)
+                        st.session_state.memoria_carga_banco = memory_tracker.registros
+                        st.session_state.banco_data = processed_df
+                        st.session_state.banco_processed = processed_df  # Datos procesados
+                        st.session_state.reporte_memoria_banco = processor.reporte_memoria()
+                        st.session_state.banco_clave = clave
+                        # Datos nuevos: la curva de tolerancia calculada ya no corresponde
+                        st.session_state.pop('curva_tolerancia', None)
+                    processed_df = st.session_state.banco_processed
                     st.session_state.banco_filename = banco_file.name
                     st.success(f"✅ Archivo bancario cargado correctamente ({len(processed_df)} filas)")
                     
                     with st.expander("👀 Vista previa de archivo limpiado"):
                         st.dataframe(processed_df.head())
+                    
+                    if st.session_state.reporte_memoria_banco is not None:
+                        with st.expander("💾 Memoria por columna"):
+                            st.dataframe(st.session_state.reporte_memoria_banco, use_container_width=True)
                 else:
                     st.warning("⚠️ El archivo no parece ser del banco. Revisa el nombre del archivo.")
                     
@@ -311,19 +363,34 @@ def upload_files_section():
         
         if sistema_file is not None:
             try:
-                processor = DataProcessor()
-                df = processor.read_file(sistema_file)
+                processor = DataProcessor(compacto=True, layout_registry=get_layout_registry())
                 
                 if processor.is_system_file(sistema_file.name):
-                    # Procesar y limpiar archivo del sistema
-                    processed_df = processor.process_system_file(df.copy())
-                    st.session_state.sistema_data = df  # Datos originales
-                    st.session_state.sistema_processed = processed_df  # Datos procesados
+                    # Mismo contenido: se conservan los DataFrames de la sesión (y con ellos la caché de pares)
+                    file_cache = get_file_cache()
+                    clave = file_cache.clave(sistema_file, 'sistema', processor.firma())
+                    if st.session_state.get('sistema_clave') != clave or 'sistema_processed' not in st.session_state:
+                        # Leer y limpiar por bloques; una re-subida del mismo archivo sale de la caché
+                        memory_tracker = nuevo_memory_tracker()
+                        with memory_tracker.etapa('carga_sistema'):
+                            processed_df = file_cache.cargar_archivo(sistema_file, 'sistema', processor, clave=clave)
+                        st.session_state.memoria_carga_sistema = memory_tracker.registros
+                        st.session_state.sistema_data = processed_df
+                        st.session_state.sistema_processed = processed_df  # Datos procesados
+                        st.session_state.reporte_memoria_sistema = processor.reporte_memoria()
+                        st.session_state.sistema_clave = clave
+                        # Datos nuevos: la curva de tolerancia calculada ya no corresponde
+                        st.session_state.pop('curva_tolerancia', None)
+                    processed_df = st.session_state.sistema_processed
                     st.session_state.sistema_filename = sistema_file.name
                     st.success(f"✅ Archivo del sistema cargado correctamente ({len(processed_df)} filas)")
                     
                     with st.expander("👀 Vista previa de archivo limpiado"):
                         st.dataframe(processed_df.head())
+                    
+                    if st.session_state.reporte_memoria_sistema is not None:
+                        with st.expander("💾 Memoria por columna"):
+                            st.dataframe(st.session_state.reporte_memoria_sistema, use_container_width=True)
                 else:
                     st.warning("⚠️ El archivo no parece ser del sistema. Revisa el nombre del archivo.")
                     
@@ -397,10 +464,60 @@ def processing_section():
     st.info("📍 Los montos se comparan como números enteros exactos (sin decimales)")
     st.session_state.tolerance_days = tolerance_days
     
+    st.session_state.cascada = st.checkbox(
+        "Conciliación en cascada (Workflow 1)",
+        value=st.session_state.get('cascada', False),
+        help="Pasadas sucesivas: documento completo + monto, mismo día + monto, cola de 3 dígitos + monto "
+             "dentro de la tolerancia y solo monto dentro de la tolerancia. Cada pasada usa solo lo que "
+             "quedó sin conciliar."
+    )
+    
+    # Curva de verificadas por tolerancia: se calcula una vez y ayuda a elegir el valor del slider
+    with st.expander("📈 Verificadas según la tolerancia"):
+        if st.button("Calcular curva de tolerancia (0 a 15 días)"):
+            with st.spinner("🔄 Calculando curva..."):
+                st.session_state.curva_tolerancia = (st.session_state.cascada, calculate_tolerance_curve())
+        cascada_curva, curva = st.session_state.get('curva_tolerancia', (None, None))
+        if curva is not None and cascada_curva == st.session_state.cascada:
+            st.plotly_chart(ChartGenerator().create_tolerance_curve(curva, tolerance_days), use_container_width=True)
+            st.dataframe(curva.set_index('tolerancia'), use_container_width=True)
+    
     # Botón de Iniciar Conciliación después de la tolerancia (más intuitivo)
     if st.button("🚀 Iniciar Conciliación", type="primary", use_container_width=True):
         process_reconciliation()
 
+def nuevo_memory_tracker():
+    """MemoryTracker de la sesión: inactivo salvo que se pida medir memoria"""
+    return MemoryTracker(activo=st.session_state.get('medir_memoria', MEDIR_MEMORIA))
+
+def get_reconciliation_engine(tolerance_days=1, memory_tracker=None):
+    """Crea el motor con la configuración de la sesión (cascada y caché de pares candidatos)"""
+    # Pares candidatos por archivos cargados: cambiar la tolerancia solo vuelve a filtrar y asignar
+    if 'candidate_cache' not in st.session_state:
+        st.session_state.candidate_cache = CandidateCache(max_entradas=2)
+    
+    return ReconciliationEngine(
+        tolerance_days=tolerance_days,
+        memory_tracker=memory_tracker,
+        cascada=CASCADA_WORKFLOW1 if st.session_state.get('cascada', False) else None,
+        candidate_cache=st.session_state.candidate_cache
+    )
+
+def calculate_tolerance_curve():
+    """Calcula verificadas y sin conciliar para cada tolerancia de 0 a 15 días"""
+    try:
+        banco_filename = st.session_state.get('banco_filename', 'unknown')
+        sistema_filename = st.session_state.get('sistema_filename', 'unknown')
+        workflow_type = DataProcessor().get_workflow_type(banco_filename, sistema_filename)
+        
+        reconciler = get_reconciliation_engine()
+        return reconciler.barrido_tolerancia(
+            st.session_state.banco_processed, st.session_state.sistema_processed, workflow_type, range(0, 16)
+        )
+    except Exception as e:
+        st.error(f"❌ Error calculando la curva de tolerancia: {str(e)}")
+        return None
+
 def process_reconciliation():
     """Procesa la conciliación de los archivos cargados"""
     try:
@@ -416,23 +533,30 @@ def process_reconciliation():
             processor = DataProcessor()
             workflow_type = processor.get_workflow_type(banco_filename, sistema_filename)
             
-            banco_clean = st.session_state.banco_processed.copy()
-            sistema_clean = st.session_state.sistema_processed.copy()
+            # Con copy-on-write el motor trabaja sobre copias superficiales de los datos cargados
+            banco_clean = st.session_state.banco_processed
+            sistema_clean = st.session_state.sistema_processed
+            
+            # Pico de memoria por etapa, incluyendo la carga de cada archivo
+            memory_tracker = nuevo_memory_tracker()
+            memory_tracker.registros.extend(st.session_state.get('memoria_carga_banco', []))
+            memory_tracker.registros.extend(st.session_state.get('memoria_carga_sistema', []))
             
             # Realizar conciliación con el workflow detectado
-            reconciler = ReconciliationEngine(
-                tolerance_days=st.session_state.get('tolerance_days', 1)
+            reconciler = get_reconciliation_engine(
+                tolerance_days=st.session_state.get('tolerance_days', 1),
+                memory_tracker=memory_tracker
             )
             
             result = reconciler.reconcile(banco_clean, sistema_clean, workflow_type)
             st.session_state.reconciliation_result = result
             
             # Obtener estadísticas detalladas del resultado
-            matches = len(result['matched'])
+            matches = result.filas('matched')
             total_banco = len(result['banco_data'])
             total_sistema = len(result['sistema_data'])
-            unmatched_banco = len(result['unmatched_banco'])
-            unmatched_sistema = len(result['unmatched_sistema'])
+            unmatched_banco = result.filas('unmatched_banco')
+            unmatched_sistema = result.filas('unmatched_sistema')
             porcentaje_verificadas = (matches / max(total_banco, 1)) * 100
             
             # Obtener totales de montos si están disponibles
@@ -488,7 +612,21 @@ def process_reconciliation():
                     - Total Banco: ${stats.get('total_banco_monto', 0):,.2f}
                     - Total Sistema: ${stats.get('total_sistema_monto', 0):,.2f}
                     """)
-            
+                
+                if stats.get('pasadas'):
+                    st.info("**Conciliadas por pasada:** " + ", ".join(
+                        f"{pasada}: {cantidad:,}" for pasada, cantidad in stats['pasadas'].items()))
+                
+                if memory_tracker.activo:
+                    with st.expander("💾 Memoria por etapa"):
+                        reporte = memory_tracker.reporte()
+                        reporte['pico_MB'] = (reporte['pico_bytes'] / 1024 ** 2).round(1)
+                        reporte['neto_MB'] = (reporte['neto_bytes'] / 1024 ** 2).round(1)
+                        st.dataframe(reporte[['etapa', 'pico_MB', 'neto_MB', 'segundos']], use_container_width=True)
+
+                with st.expander("⏱️ Tiempos por etapa"):
+                    st.dataframe(result['timings'], use_container_width=True)
+
             # Mensaje de rendimiento
             if matches > 0:
                 if porcentaje_verificadas >= 80:
@@ -531,7 +669,7 @@ def results_section():
         )
     
     with col3:
-        conciliadas = len(result['matched'])
+        conciliadas = result.filas('matched')
         st.metric(
             "Transacciones Conciliadas",
             conciliadas,
@@ -597,7 +735,7 @@ def results_section():
     tab1, tab2, tab3 = st.tabs(["✅ Tabla de Verificadas", "❌ Sin Conciliar Banco", "❌ Sin Conciliar Sistema"])
     
     with tab1:
-        if len(result['matched']) > 0:
+        if result.filas('matched') > 0:
             # Mostrar tabla de verificadas con estructura corregida
             verified_display = prepare_verified_table_display(result)
             st.dataframe(verified_display, use_container_width=True)
@@ -616,7 +754,7 @@ def results_section():
             st.info("No hay transacciones verificadas.")
     
     with tab2:
-        if len(result['unmatched_banco']) > 0:
+        if result.filas('unmatched_banco') > 0:
             # Mostrar solo columnas originales del banco (sin ID_banco)
             banco_display = prepare_banco_table_display(result['unmatched_banco'])
             st.dataframe(banco_display, use_container_width=True)
@@ -635,7 +773,7 @@ def results_section():
             st.info("Todas las transacciones del banco fueron conciliadas.")
     
     with tab3:
-        if len(result['unmatched_sistema']) > 0:
+        if result.filas('unmatched_sistema') > 0:
             # Mostrar solo columnas originales del sistema (sin IDs ni columnas agregadas)
             sistema_display = prepare_sistema_table_display(result['unmatched_sistema'])
             st.dataframe(sistema_display, use_container_width=True)
@@ -864,7 +1002,7 @@ def create_compiled_excel_download(result, workflow_type):
     
     with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
         # Hoja 1: Verificadas final
-        if len(result['matched']) > 0:
+        if result.filas('matched') > 0:
             verified_df = result['matched'].copy()
             
             # Limpiar columnas no deseadas primero
@@ -892,13 +1030,13 @@ def create_compiled_excel_download(result, workflow_type):
             verified_df.to_excel(writer, sheet_name='Verificadas final', index=False)
         
         # Hoja 2: Sin conciliar banco
-        if len(result['unmatched_banco']) > 0:
+        if result.filas('unmatched_banco') > 0:
             banco_df = result['unmatched_banco'].copy()
             banco_df = clean_columns(banco_df)
             banco_df.to_excel(writer, sheet_name='Sin conciliar banco', index=False)
         
         # Hoja 3: Sin conciliar sistema
-        if len(result['unmatched_sistema']) > 0:
+        if result.filas('unmatched_sistema') > 0:
             sistema_df = result['unmatched_sistema'].copy()
             sistema_df = clean_columns(sistema_df)
             sistema_df.to_excel(writer, sheet_name='Sin conciliar sistema', index=False)
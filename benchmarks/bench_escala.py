@@ -0,0 +1,237 @@
+"""Suite de escala: ingesta, limpieza y conciliación de ambos workflows con extractos sintéticos
+
+Antes de medir se corren las pruebas diferenciales (benchmarks.diferencial): si algún motor
+alternativo no da los mismos resultados que la referencia, queda en el reporte y la suite
+termina con error.
+
+Cada caso (workflow y cantidad de filas) corre en un proceso propio, así el pico de memoria
+residente de cada paso no arrastra el de los casos anteriores. El reporte JSON tiene siempre
+las mismas claves y los extractos son deterministas (misma semilla, mismos archivos), así
+que dos reportes se comparan paso a paso con --base.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_escala --filas 10000 100000 1000000 --salida reporte_escala.json
+    python -m benchmarks.bench_escala --filas 10000 100000 --base reporte_escala.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from benchmarks import diferencial
+from benchmarks.extractos_sinteticos import generar_par, ArchivoSubido
+from utils.data_processor import DataProcessor
+from utils.instrumentation import configurar_logging, pico_rss
+from utils.reconciliation import ReconciliationEngine
+
+VERSION_REPORTE = 2
+TAMANOS = [10000, 100000, 1000000]
+WORKFLOWS = ['workflow_1', 'workflow_2']
+
+def medir(registros, paso, funcion, filas_entrada=None):
+    """Ejecuta funcion y agrega al reporte del caso su tiempo y el pico de memoria residente"""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    registros.append({
+        'paso': paso,
+        'segundos': time.perf_counter() - inicio,
+        'pico_rss_bytes': pico_rss(),
+        'filas_entrada': filas_entrada,
+    })
+    return resultado
+
+def correr_caso(caso):
+    """Genera, lee, limpia y concilia un par de extractos (se ejecuta en un proceso propio)"""
+    configurar_logging(caso['nivel_log'])
+    workflow_type, filas = caso['workflow_type'], caso['filas']
+    pasos = []
+    
+    archivos = medir(pasos, 'generacion', lambda: generar_par(workflow_type, filas, caso['semilla']))
+    (nombre_banco, banco), (nombre_sistema, sistema) = archivos['banco'], archivos['sistema']
+    pasos[-1]['filas_salida'] = filas
+    processor = DataProcessor()
+    if processor.get_workflow_type(nombre_banco, nombre_sistema) != workflow_type:
+        raise ValueError(f"{nombre_banco} no se detecta como {workflow_type}")
+    
+    # Ingesta (archivo completo a DataFrame crudo) y limpieza por separado
+    crudos = medir(pasos, 'ingesta', lambda: (
+        processor.read_file(ArchivoSubido(banco, nombre_banco)),
+        processor.read_file(ArchivoSubido(sistema, nombre_sistema))
+    ), len(banco) + len(sistema))
+    pasos[-1]['filas_salida'] = len(crudos[0]) + len(crudos[1])
+    limpios = medir(pasos, 'limpieza', lambda: (
+        processor.process_bank_file(crudos[0]),
+        processor.process_system_file(crudos[1])
+    ), pasos[-1]['filas_salida'])
+    pasos[-1]['filas_salida'] = len(limpios[0]) + len(limpios[1])
+    del crudos
+    
+    # Ingesta y limpieza por bloques (el camino de la app). read_csv en memoria infiere los tipos
+    # por tramos: en archivos grandes los documentos pueden quedar mezclados ("1234" y "1234.0")
+    por_bloques = medir(pasos, 'ingesta_streaming', lambda: (
+        processor.process_file_streaming(ArchivoSubido(banco, nombre_banco), 'banco'),
+        processor.process_file_streaming(ArchivoSubido(sistema, nombre_sistema), 'sistema')
+    ), len(banco) + len(sistema))
+    pasos[-1]['filas_salida'] = len(por_bloques[0]) + len(por_bloques[1])
+    coincide_streaming = limpios[0].equals(por_bloques[0]) and limpios[1].equals(por_bloques[1])
+    del por_bloques
+    
+    engine = ReconciliationEngine(tolerance_days=caso['tolerancia'])
+    resultado = medir(pasos, 'conciliacion', lambda: engine.reconcile(limpios[0], limpios[1], workflow_type),
+                      len(limpios[0]) + len(limpios[1]))
+    pasos[-1]['filas_salida'] = len(resultado.pares)
+    stats = resultado['statistics']
+    return {
+        'workflow_type': workflow_type,
+        'filas': filas,
+        'bytes_banco': len(banco),
+        'bytes_sistema': len(sistema),
+        'pasos': pasos,
+        'coincide_streaming': coincide_streaming,
+        'cruce': {'metodo': engine.join_metrics.get('metodo'), 'candidatos': engine.join_metrics.get('candidatos')},
+        'conciliacion': {
+            'conciliadas': stats['total_conciliadas'],
+            'sin_conciliar_banco': stats['sin_conciliar_banco'],
+            'sin_conciliar_sistema': stats['sin_conciliar_sistema'],
+        },
+        'etapas': registros_json(resultado['timings']),
+    }
+
+def registros_json(tabla):
+    """Filas de una tabla como dicts con tipos de JSON (None en lugar de NA)"""
+    return [{clave: valor_json(valor) for clave, valor in fila.items()} for fila in tabla.to_dict('records')]
+
+def valor_json(valor):
+    """Escalares de numpy/pandas como tipos de Python"""
+    if valor is None or valor is pd.NA or (isinstance(valor, float) and np.isnan(valor)):
+        return None
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def entorno():
+    """Versiones y máquina con las que se midió"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': multiprocessing.cpu_count(),
+        'commit': commit,
+    }
+
+def correr(casos, mismo_proceso=False):
+    """Reportes de los casos en orden, cada uno en un proceso nuevo (salvo mismo_proceso)
+    
+    Un caso que falla (por ejemplo, un proceso terminado por falta de memoria) queda en el
+    reporte con su error y la suite sigue con los demás.
+    """
+    reportes = []
+    for caso in casos:
+        print(f"▶ {caso['workflow_type']} con {caso['filas']:,} filas...", flush=True)
+        try:
+            if mismo_proceso:
+                reportes.append(correr_caso(caso))
+            else:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    reportes.append(pool.submit(correr_caso, caso).result())
+        except Exception as e:
+            print(f"❌ {caso['workflow_type']} con {caso['filas']:,} filas: {type(e).__name__}: {e}")
+            reportes.append({'workflow_type': caso['workflow_type'], 'filas': caso['filas'],
+                             'error': f"{type(e).__name__}: {e}"})
+    return reportes
+
+def imprimir(reporte):
+    """Tabla de tiempos, pico de memoria y candidatos por caso y paso"""
+    print(f"{'workflow':<12}{'filas':>11}{'paso':>20}{'segundos':>11}{'pico RSS (MB)':>15}")
+    for caso in reporte['casos']:
+        if caso.get('error'):
+            print(f"{caso['workflow_type']:<12}{caso['filas']:>11,}   ❌ {caso['error']}")
+            continue
+        for paso in caso['pasos']:
+            print(f"{caso['workflow_type']:<12}{caso['filas']:>11,}{paso['paso']:>20}{paso['segundos']:>11.2f}"
+                  f"{paso['pico_rss_bytes'] / 1024 ** 2 if paso['pico_rss_bytes'] else float('nan'):>15.1f}")
+        print(f"{'':<12}{'':>11}{'candidatos':>20}{caso['cruce']['candidatos'] or 0:>11,}"
+              f"   conciliadas {caso['conciliacion']['conciliadas']:,}")
+        if not caso['coincide_streaming']:
+            print(f"{'':<12}{'':>11}   ⚠️ la lectura en memoria no coincide con la lectura por bloques")
+
+def comparar(reporte, base):
+    """Cociente de tiempos contra un reporte anterior (mismos casos y pasos) y cambios de resultados"""
+    anteriores = {(caso['workflow_type'], caso['filas']): caso for caso in base['casos']}
+    print(f"Comparación contra {base['fecha']} (commit {base['entorno'].get('commit')}):")
+    print(f"{'workflow':<12}{'filas':>11}{'paso':>20}{'antes (s)':>11}{'ahora (s)':>11}{'cociente':>10}")
+    for caso in reporte['casos']:
+        anterior = anteriores.get((caso['workflow_type'], caso['filas']))
+        if anterior is None or caso.get('error') or anterior.get('error'):
+            continue
+        pasos_anteriores = {paso['paso']: paso for paso in anterior['pasos']}
+        for paso in caso['pasos']:
+            previo = pasos_anteriores.get(paso['paso'])
+            if previo is None:
+                continue
+            cociente = paso['segundos'] / previo['segundos'] if previo['segundos'] else float('nan')
+            print(f"{caso['workflow_type']:<12}{caso['filas']:>11,}{paso['paso']:>20}"
+                  f"{previo['segundos']:>11.2f}{paso['segundos']:>11.2f}{cociente:>9.2f}x")
+        # Mismos extractos: otros candidatos o conciliadas indican un cambio de comportamiento
+        for clave, actual, previo in [('candidatos', caso['cruce']['candidatos'], anterior['cruce']['candidatos']),
+                                      ('conciliadas', caso['conciliacion']['conciliadas'],
+                                       anterior['conciliacion']['conciliadas'])]:
+            if actual != previo:
+                print(f"⚠️ {caso['workflow_type']} {caso['filas']:,}: {clave} {previo} → {actual}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=TAMANOS)
+    parser.add_argument('--workflows', nargs='+', choices=WORKFLOWS, default=WORKFLOWS)
+    parser.add_argument('--tolerancia', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='reporte_escala.json')
+    parser.add_argument('--base', help='reporte anterior para comparar')
+    parser.add_argument('--nivel-log', default='ERROR')
+    parser.add_argument('--mismo-proceso', action='store_true', help='sin un proceso por caso (para depurar)')
+    parser.add_argument('--casos-diferencial', type=int, default=20, help='casos de las pruebas diferenciales (0 = no)')
+    args = parser.parse_args()
+    
+    configurar_logging(args.nivel_log)
+    verificacion = None
+    if args.casos_diferencial:
+        print(f"▶ pruebas diferenciales ({args.casos_diferencial} casos)...", flush=True)
+        verificacion = diferencial.verificar(casos=args.casos_diferencial, semilla=args.semilla)
+    
+    casos = [{'workflow_type': workflow_type, 'filas': filas, 'semilla': args.semilla,
+              'tolerancia': args.tolerancia, 'nivel_log': args.nivel_log}
+             for filas in args.filas for workflow_type in args.workflows]
+    reporte = {
+        'version': VERSION_REPORTE,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': entorno(),
+        'parametros': {'tolerancia': args.tolerancia, 'semilla': args.semilla},
+        'diferencial': verificacion,
+        'casos': correr(casos, args.mismo_proceso),
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    
+    imprimir(reporte)
+    if verificacion is not None:
+        diferencial.imprimir(verificacion)
+    print(f"Reporte: {args.salida}")
+    if args.base:
+        with open(args.base, encoding='utf-8') as archivo:
+            comparar(reporte, json.load(archivo))
+    if verificacion is not None and verificacion['fallas']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Compara la lectura fila por fila de planillas contra DataProcessor.read_file
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_spreadsheet_reader --filas 200000
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+from datetime import datetime, timedelta
+import openpyxl
+import pandas as pd
+from utils.data_processor import DataProcessor
+from utils.spreadsheet_reader import SpreadsheetReader
+
+class ArchivoSubido(io.BytesIO):
+    """Imita el UploadedFile de Streamlit (BytesIO con nombre)"""
+    
+    def __init__(self, contenido, name):
+        super().__init__(contenido)
+        self.name = name
+
+def generar_planilla_brou(filas, semilla=0):
+    """Genera un XLSX estilo BROU: preámbulo, header, movimientos y pie con "Saldo Final" """
+    rnd = random.Random(semilla)
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(['BANCO DE LA REPUBLICA ORIENTAL DEL URUGUAY'])
+    hoja.append(['Cuenta: 4103'])
+    hoja.append(['Fecha: 01/01/2024 al 31/12/2024'])
+    hoja.append([])
+    hoja.append(['Fecha', 'Descripción', 'Número de documento', 'Asunto', 'Dependencia', 'Débito', 'Crédito'])
+    hoja.append([None, 'Saldo inicial'])
+    inicio = datetime(2024, 1, 1)
+    for _ in range(filas):
+        monto = round(rnd.uniform(1, 100000), 2)
+        debito, credito = (monto, None) if rnd.random() < 0.5 else (None, monto)
+        hoja.append([
+            inicio + timedelta(days=rnd.randint(0, 364)), 'TRANSFERENCIA', rnd.randint(1, 999999),
+            'PAGO', f'DEP {rnd.randint(1, 20)}', debito, credito
+        ])
+    hoja.append(['Saldo Final', None, None, None, None, None, None])
+    # Pie largo que la lectura por filas no necesita recorrer
+    for i in range(filas // 10):
+        hoja.append([f'Nota {i}', 'Movimiento informativo'])
+    buffer = io.BytesIO()
+    libro.save(buffer)
+    return buffer.getvalue()
+
+def medir(funcion, repeticiones):
+    """Devuelve el mejor tiempo (segundos) y el último resultado"""
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+    
+    contenido = generar_planilla_brou(args.filas)
+    processor = DataProcessor()
+    
+    def lectura_completa():
+        return processor.read_file(ArchivoSubido(contenido, 'BROU_4103.xlsx'))
+    
+    def lectura_por_filas():
+        reader = SpreadsheetReader(processor)
+        return sum(len(bloque) for bloque in reader.iter_chunks(ArchivoSubido(contenido, 'BROU_4103.xlsx')))
+    
+    def proceso_completo():
+        df = processor.read_file(ArchivoSubido(contenido, 'BROU_4103.xlsx'))
+        return processor.process_bank_file(df)
+    
+    def proceso_por_filas():
+        return processor.process_file_streaming(ArchivoSubido(contenido, 'BROU_4103.xlsx'), 'banco')
+    
+    t_lectura, _ = medir(lectura_completa, args.repeticiones)
+    t_lectura_filas, _ = medir(lectura_por_filas, args.repeticiones)
+    t_completo, esperado = medir(proceso_completo, args.repeticiones)
+    t_filas, obtenido = medir(proceso_por_filas, args.repeticiones)
+    pd.testing.assert_frame_equal(esperado, obtenido)
+    
+    print(f"Filas: {args.filas:,} ({len(contenido) / 1e6:.1f} MB)")
+    print("Lectura de la hoja completa:")
+    print(f"  read_file (pd.read_excel):        {t_lectura:.2f} s")
+    print(f"  SpreadsheetReader.iter_chunks:    {t_lectura_filas:.2f} s ({t_lectura / t_lectura_filas:.1f}x)")
+    print("Lectura + limpieza (hasta \"Saldo Final\"):")
+    print(f"  read_file + process_bank_file:    {t_completo:.2f} s")
+    print(f"  process_file_streaming:           {t_filas:.2f} s ({t_completo / t_filas:.1f}x)")
+    print("Resultados idénticos: sí")
+
+if __name__ == '__main__':
+    main()
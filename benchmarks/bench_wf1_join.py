@@ -0,0 +1,76 @@
+"""Compara los cruces del Workflow 1 (intervalo, clave compuesta) contra el merge original por cola de 3 dígitos
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_wf1_join --filas 50000
+"""
+import argparse
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+from utils.memory_tracker import MemoryTracker
+from utils.reconciliation import ReconciliationEngine, JOIN_COLA, JOIN_COMPUESTA, JOIN_INTERVALO
+
+def generar_mes(filas, semilla=0):
+    """Genera un mes de banco y sistema ya limpios (columnas de DataProcessor) con filas de cada lado"""
+    rnd = np.random.default_rng(semilla)
+    fechas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rnd.integers(0, 31, filas), unit='D')
+    montos = np.round(rnd.uniform(1, 50000, filas), 2)
+    documentos = rnd.integers(1, 99999999, filas)
+    credito = rnd.random(filas) < 0.7
+    banco = pd.DataFrame({
+        'Fecha': fechas,
+        'Descripción': 'TRANSFERENCIA',
+        'Número de documento': documentos.astype(str),
+        'Débito': np.where(credito, 0.0, montos),
+        'Crédito': np.where(credito, montos, 0.0),
+        'ID_banco': np.arange(1, filas + 1),
+    })
+    
+    # El sistema registra la mayoría de los movimientos unos días después, con ruido en referencias y montos
+    origen = rnd.permutation(filas)
+    referencias = np.where(rnd.random(filas) < 0.8, documentos[origen], rnd.integers(1, 99999999, filas))
+    montos_sistema = np.where(rnd.random(filas) < 0.9, montos[origen], np.round(rnd.uniform(1, 50000, filas), 2))
+    sistema = pd.DataFrame({
+        'Fecha': fechas[origen] + pd.to_timedelta(rnd.integers(-2, 12, filas), unit='D'),
+        'Nro.Trans.': np.arange(filas).astype(str),
+        'Nro.Ref.Bco': referencias.astype(str),
+        'Concepto': 'COBRO',
+        'Debe': np.where(credito[origen], montos_sistema, 0.0),
+        'Haber': np.where(credito[origen], 0.0, montos_sistema),
+        'ID_sistema': np.arange(1, filas + 1),
+    })
+    return banco, sistema
+
+def conciliar(banco, sistema, join, tolerancia):
+    """Concilia con el cruce indicado; devuelve resultado, métricas del cruce y pico de memoria"""
+    tracker = MemoryTracker()
+    engine = ReconciliationEngine(tolerance_days=tolerancia, memory_tracker=tracker, join_workflow1=join)
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = engine.reconcile(banco, sistema, 'workflow_1')
+    reporte = tracker.reporte().set_index('etapa')
+    return resultado, engine.join_metrics, reporte.loc['matching']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=50000)
+    parser.add_argument('--tolerancia', type=int, default=10)
+    args = parser.parse_args()
+    
+    banco, sistema = generar_mes(args.filas)
+    mediciones = []
+    for join in [JOIN_COLA, JOIN_COMPUESTA, JOIN_INTERVALO]:
+        resultado, metricas, memoria = conciliar(banco, sistema, join, args.tolerancia)
+        for clave in ['matched', 'unmatched_banco', 'unmatched_sistema']:
+            pd.testing.assert_frame_equal(mediciones[0][1][clave] if mediciones else resultado[clave], resultado[clave])
+        mediciones.append((join, resultado, metricas, memoria))
+    
+    print(f"Filas: {args.filas:,} banco x {args.filas:,} sistema, tolerancia {args.tolerancia} días")
+    print(f"Verificadas: {len(mediciones[0][1]['matched']):,} (idénticas en todos los cruces)")
+    print(f"{'cruce':<12}{'candidatos':>14}{'cruce (s)':>12}{'matching (s)':>14}{'pico (MB)':>12}")
+    for nombre, _, metricas, memoria in mediciones:
+        print(f"{nombre:<12}{metricas['candidatos']:>14,}{metricas['segundos']:>12.2f}"
+              f"{memoria['segundos']:>14.2f}{memoria['pico_bytes'] / 1024 ** 2:>12.1f}")
+
+if __name__ == '__main__':
+    main()
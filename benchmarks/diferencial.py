@@ -0,0 +1,485 @@
+"""Pruebas diferenciales: cada motor alternativo contra resultados de referencia congelados
+
+La referencia es el cruce original (merge por cola de 3 dígitos en el Workflow 1, merge por
+montos en el Workflow 2). Cada alternativa (otro cruce, particiones, hilos, caché) tiene que
+dar los mismos pares de IDs conciliados, los mismos IDs sin conciliar y los mismos valores en
+todas las claves de statistics, con la misma asignación uno a uno. Los casos son aleatorios
+pero reproducibles por semilla, con colisiones de cola, montos repetidos y fechas justo en
+los bordes de la ventana (0 y tolerance_days, y un día afuera).
+
+Los resultados de la referencia para los casos por defecto están guardados en
+diferencial_referencia.json, así un cambio en el código compartido (preparación, parseo,
+reglas de matching) que altere la referencia y las alternativas a la vez también se detecta:
+la configuración de referencia se compara como una alternativa más. Los casos que no están
+en el archivo (otras semillas o cantidad de filas) se comparan contra el motor de referencia.
+Con asignación 'primera', los resultados guardados coinciden con el motor anterior a las
+alternativas. El archivo solo se regenera (--congelar) ante un cambio de resultados buscado.
+
+Las reglas de matching tienen dos implementaciones: en bloque (CandidateScorer, detrás de
+puntuar_candidatos y crear_registros_match) y fila a fila (_is_exact_match,
+_is_tolerant_match, _is_document_match, _create_match_record). verificar_reglas compara las
+dos sobre pares al azar, con el mismo monto entero y con el mismo documento de cada caso.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.diferencial --casos 50 --filas 300
+    python -m benchmarks.diferencial --congelar
+
+Para verificar un motor nuevo:
+    from benchmarks.diferencial import verificar
+    reporte = verificar({'mi_motor': lambda asignacion: MiMotor(asignacion=asignacion)})
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import numpy as np
+import pandas as pd
+from utils.candidate_cache import CandidateCache
+from utils.instrumentation import configurar_logging
+from utils.reconciliation import (ReconciliationEngine, JOIN_COLA, JOIN_COMPUESTA, JOIN_INTERVALO, JOIN_MERGE,
+                                  ASIGNACION_OPTIMA, ASIGNACION_PRIMERA)
+
+WORKFLOWS = ['workflow_1', 'workflow_2']
+ASIGNACIONES = [ASIGNACION_PRIMERA, ASIGNACION_OPTIMA]
+TOLERANCIAS = [0, 1, 3, 10]
+
+# Cruce de referencia: merge y drop_duplicates / asignación sobre todos los candidatos
+REFERENCIA = {'join_workflow1': JOIN_COLA, 'join_workflow2': JOIN_MERGE}
+
+# Resultados congelados de la referencia para los casos por defecto
+ARCHIVO_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'diferencial_referencia.json')
+CASOS_CONGELADOS = 30
+FILAS_CONGELADAS = 200
+
+# Pares por caso y workflow en la comparación de reglas en bloque contra fila a fila
+PARES_REGLAS = 120
+REGLAS = ['exacto', 'tolerante', 'documento']
+
+# Motores alternativos: función (asignación) -> objeto con reconcile(banco, sistema, workflow_type)
+ALTERNATIVAS = {
+    # El motor de referencia actual contra sus resultados congelados
+    'referencia': lambda asignacion: ReconciliationEngine(asignacion=asignacion, **REFERENCIA),
+    'intervalo': lambda asignacion: ReconciliationEngine(
+        join_workflow1=JOIN_INTERVALO, join_workflow2=JOIN_INTERVALO, asignacion=asignacion),
+    'compuesta': lambda asignacion: ReconciliationEngine(
+        join_workflow1=JOIN_COMPUESTA, join_workflow2=JOIN_MERGE, asignacion=asignacion),
+    'particiones': lambda asignacion: ReconciliationEngine(asignacion=asignacion, particion_dias=5),
+    'particiones_cola': lambda asignacion: ReconciliationEngine(
+        join_workflow1=JOIN_COLA, join_workflow2=JOIN_MERGE, asignacion=asignacion, particion_dias=3),
+    'particiones_hilos': lambda asignacion: ReconciliationEngine(
+        asignacion=asignacion, particion_dias=4, workers_particion=3),
+    # El mismo motor concilia el caso con todas las tolerancias: desde la segunda usa la caché
+    'cache': lambda asignacion: ReconciliationEngine(asignacion=asignacion, candidate_cache=CandidateCache()),
+}
+
+# Colas de documento que se repiten entre muchos documentos distintos
+COLAS = np.array([7, 123, 450, 999, 0])
+
+def generar_caso(semilla, filas=200):
+    """Banco y sistema ya limpios de ambos workflows, con la tolerancia cuyos bordes se fuerzan
+    
+    Devuelve {'tolerancia': t, 'workflow_1': (banco, sistema), 'workflow_2': (banco, sistema)}.
+    """
+    rnd = np.random.default_rng(semilla)
+    tolerancia = int(rnd.choice(TOLERANCIAS))
+    return {
+        'tolerancia': tolerancia,
+        'workflow_1': _caso_workflow1(rnd, filas, tolerancia),
+        'workflow_2': _caso_workflow2(rnd, filas),
+    }
+
+def _fechas(rnd, filas):
+    """Fechas de un mes con algunas vacías"""
+    fechas = (pd.Timestamp('2024-03-01') + pd.to_timedelta(rnd.integers(0, 20, filas), unit='D')).to_numpy(copy=True)
+    fechas[rnd.random(filas) < 0.02] = np.datetime64('NaT')
+    return fechas
+
+def _montos(rnd, filas):
+    """Montos con parte entera repetida (misma parte entera, distintos centavos) y algunos únicos"""
+    repetidos = rnd.choice([100, 250, 1000, 1234, 5000, 99999], filas) + rnd.choice([0, 0.01, 0.5, 0.99], filas)
+    unicos = np.round(rnd.uniform(1, 100000, filas), 2)
+    return np.where(rnd.random(filas) < 0.6, repetidos, unicos)
+
+def _documentos(rnd, filas):
+    """Documentos con colas de 3 dígitos repetidas, documentos cortos, espacios, texto y vacíos"""
+    documentos = (rnd.integers(0, 50, filas) * 1000 + rnd.choice(COLAS, filas)).astype(str).astype(object)
+    cortos = rnd.random(filas) < 0.05
+    documentos[cortos] = rnd.choice(['7', '45', '0'], int(cortos.sum()))
+    con_espacios = rnd.random(filas) < 0.03
+    documentos[con_espacios] = [f' {d} ' for d in documentos[con_espacios]]
+    texto = rnd.random(filas) < 0.02
+    documentos[texto] = 'ABC123'
+    documentos[rnd.random(filas) < 0.02] = None
+    return documentos
+
+def _contrapartes(rnd, filas, desplazamientos):
+    """Filas del sistema: 80% copia de una fila del banco (con reposición) corrida en fecha"""
+    origen = rnd.integers(0, filas, filas)
+    copiadas = rnd.random(filas) < 0.8
+    desplazamiento = rnd.choice(desplazamientos, filas).astype('timedelta64[D]')
+    return origen, copiadas, desplazamiento
+
+def _caso_workflow1(rnd, filas, tolerancia):
+    """Workflow 1: cola de 3 dígitos + monto entero + fecha sistema 0 a +tolerancia días"""
+    fechas = _fechas(rnd, filas)
+    montos = _montos(rnd, filas)
+    documentos = _documentos(rnd, filas)
+    credito = rnd.random(filas) < 0.75
+    banco = pd.DataFrame({
+        'Fecha': fechas,
+        'Descripción': 'TRANSFERENCIA',
+        'Número de documento': documentos,
+        'Débito': np.where(credito, 0.0, montos),
+        'Crédito': np.where(credito, montos, 0.0),
+        'ID_banco': np.arange(1, filas + 1),
+    })
+    
+    # Bordes de la ventana: un día antes, 0, 1, tolerancia - 1, tolerancia y un día después
+    bordes = [-1, 0, 0, 1, max(tolerancia - 1, 0), tolerancia, tolerancia, tolerancia + 1]
+    origen, copiadas, desplazamiento = _contrapartes(rnd, filas, bordes)
+    fechas_sistema = np.where(copiadas, fechas[origen] + desplazamiento, _fechas(rnd, filas))
+    montos_sistema = np.where(copiadas, np.floor(montos[origen]) + rnd.choice([0, 0.25, 0.99], filas),
+                              _montos(rnd, filas))
+    # Otra referencia con la misma cola (colisión) o directamente otra
+    referencias = np.where(copiadas, documentos[origen], _documentos(rnd, filas))
+    otra_con_cola = copiadas & (rnd.random(filas) < 0.2)
+    referencias[otra_con_cola] = [str(rnd.integers(50, 99)) + str(d).strip()[-3:] if d is not None else None
+                                  for d in referencias[otra_con_cola]]
+    credito_sistema = np.where(copiadas, credito[origen], rnd.random(filas) < 0.75)
+    sistema = pd.DataFrame({
+        'Fecha': pd.to_datetime(fechas_sistema),
+        'Nro.Trans.': np.arange(filas).astype(str),
+        'Nro.Ref.Bco': referencias,
+        'Concepto': 'COBRO',
+        'Debe': np.where(credito_sistema, montos_sistema, 0.0),
+        'Haber': np.where(credito_sistema, 0.0, montos_sistema),
+        'ID_sistema': np.arange(1, filas + 1),
+    })
+    return banco, sistema
+
+def _caso_workflow2(rnd, filas):
+    """Workflow 2: montos enteros cruzados (haber = Débito, debe = Crédito) y Fecha <= fec + 3 días"""
+    fechas = _fechas(rnd, filas)
+    montos = _montos(rnd, filas)
+    credito = rnd.random(filas) < 0.6
+    banco = pd.DataFrame({
+        'Dep. Origen': rnd.integers(1, 50, filas).astype(str),
+        'Concepto': 'TRF',
+        'Comprobante': _documentos(rnd, filas),
+        'Fecha': fechas,
+        'Débito': np.where(credito, 0.0, montos),
+        'Crédito': np.where(credito, montos, 0.0),
+        'Saldo': 0.0,
+        'ID_banco': np.arange(1, filas + 1),
+    })
+    
+    # Bordes de la regla: fec - Fecha = -3 entra, -4 queda afuera
+    origen, copiadas, desplazamiento = _contrapartes(rnd, filas, [-4, -3, -3, -2, 0, 0, 5, 30])
+    fechas_sistema = np.where(copiadas, fechas[origen] + desplazamiento, _fechas(rnd, filas))
+    montos_sistema = np.where(copiadas, np.floor(montos[origen]) + rnd.choice([0, 0.25, 0.99], filas),
+                              _montos(rnd, filas))
+    credito_sistema = np.where(copiadas, credito[origen], rnd.random(filas) < 0.6)
+    sistema = pd.DataFrame({
+        'fec': pd.to_datetime(fechas_sistema),
+        'documento': _documentos(rnd, filas),
+        'cliprov': 'CLI',
+        'debe': np.where(credito_sistema, montos_sistema, 0.0),
+        'haber': np.where(credito_sistema, 0.0, montos_sistema),
+        'saldo': 0.0,
+        'ID_sistema': np.arange(1, filas + 1),
+    })
+    return banco, sistema
+
+def ids_conciliados(resultado):
+    """Pares (ID_banco, ID_sistema) conciliados, ordenados"""
+    matched = resultado['matched']
+    if len(matched) == 0 or 'ID_banco' not in matched.columns:
+        return []
+    return sorted(zip(matched['ID_banco'].tolist(), matched['ID_sistema'].tolist()))
+
+def ids_sin_conciliar(resultado, lado):
+    """IDs sin conciliar de banco o sistema, ordenados"""
+    df = resultado[f'unmatched_{lado}']
+    columna = f'ID_{lado}'
+    return sorted(df[columna].tolist()) if columna in df.columns else []
+
+def valores_iguales(esperado, obtenido):
+    """Igualdad de valores de statistics (NaN igual a NaN; sumas con tolerancia de redondeo)"""
+    if isinstance(esperado, dict) or isinstance(obtenido, dict):
+        if not (isinstance(esperado, dict) and isinstance(obtenido, dict)) or set(esperado) != set(obtenido):
+            return False
+        return all(valores_iguales(esperado[clave], obtenido[clave]) for clave in esperado)
+    if isinstance(esperado, (list, tuple, np.ndarray)) or isinstance(obtenido, (list, tuple, np.ndarray)):
+        return (isinstance(esperado, (list, tuple, np.ndarray)) and isinstance(obtenido, (list, tuple, np.ndarray))
+                and len(esperado) == len(obtenido)
+                and all(valores_iguales(a, b) for a, b in zip(esperado, obtenido)))
+    try:
+        if pd.isna(esperado) and pd.isna(obtenido):
+            return True
+    except (TypeError, ValueError):
+        pass
+    if isinstance(esperado, (int, float, np.number)) and isinstance(obtenido, (int, float, np.number)):
+        # Las sumas de montos en otro orden pueden diferir en el último decimal binario
+        return math.isclose(float(esperado), float(obtenido), rel_tol=1e-9, abs_tol=1e-6)
+    return esperado == obtenido
+
+def diferencias(referencia, alternativa):
+    """Lista de diferencias (texto) entre dos resultados de reconcile; vacía si son equivalentes"""
+    encontradas = []
+    esperados, obtenidos = ids_conciliados(referencia), ids_conciliados(alternativa)
+    if esperados != obtenidos:
+        faltan = sorted(set(esperados) - set(obtenidos))
+        sobran = sorted(set(obtenidos) - set(esperados))
+        encontradas.append(f"conciliadas: {len(esperados)} vs {len(obtenidos)}, faltan {faltan[:5]}, sobran {sobran[:5]}")
+    for lado in ['banco', 'sistema']:
+        if ids_sin_conciliar(referencia, lado) != ids_sin_conciliar(alternativa, lado):
+            encontradas.append(f"sin conciliar {lado}: {len(referencia[f'unmatched_{lado}'])} vs "
+                               f"{len(alternativa[f'unmatched_{lado}'])}")
+    stats_ref, stats_alt = referencia['statistics'], alternativa['statistics']
+    for clave in sorted(set(stats_ref) | set(stats_alt)):
+        if clave not in stats_ref or clave not in stats_alt:
+            encontradas.append(f"statistics['{clave}'] solo en {'referencia' if clave in stats_ref else 'alternativa'}")
+        elif not valores_iguales(stats_ref[clave], stats_alt[clave]):
+            encontradas.append(f"statistics['{clave}']: {stats_ref[clave]!r} vs {stats_alt[clave]!r}")
+    return encontradas
+
+def clave_referencia(semilla, filas, workflow_type, asignacion, tolerancia):
+    """Clave de un resultado en el archivo de referencia"""
+    return f"{semilla}|{filas}|{workflow_type}|{asignacion}|{tolerancia}"
+
+def congelar_resultado(resultado):
+    """Pares conciliados y statistics de un resultado, con tipos de JSON"""
+    return {'pares': [list(par) for par in ids_conciliados(resultado)],
+            'statistics': valor_json(resultado['statistics'])}
+
+def resultado_congelado(guardado, banco, sistema):
+    """Resultado (con las claves que usa diferencias) a partir de uno guardado
+    
+    Los IDs de los casos son únicos: los sin conciliar son los que no están en los pares.
+    """
+    pares = pd.DataFrame(guardado['pares'], columns=['ID_banco', 'ID_sistema'], dtype='int64')
+    return {
+        'matched': pares,
+        'unmatched_banco': banco.loc[~banco['ID_banco'].isin(pares['ID_banco']), ['ID_banco']],
+        'unmatched_sistema': sistema.loc[~sistema['ID_sistema'].isin(pares['ID_sistema']), ['ID_sistema']],
+        'statistics': guardado['statistics'],
+    }
+
+def valor_json(valor):
+    """Valores de statistics como tipos de JSON (escalares de numpy como tipos de Python)"""
+    if isinstance(valor, dict):
+        return {str(clave): valor_json(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [valor_json(v) for v in valor]
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def cargar_referencia(ruta=ARCHIVO_REFERENCIA):
+    """Resultados congelados por clave_referencia ({} si no hay archivo)"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)['resultados']
+
+def congelar_referencia(ruta=ARCHIVO_REFERENCIA, casos=CASOS_CONGELADOS, filas=FILAS_CONGELADAS, semilla=0):
+    """Guarda los resultados del motor de referencia en los casos indicados; devuelve cuántos"""
+    resultados = {}
+    for numero in range(casos):
+        caso = generar_caso(semilla + numero, filas)
+        for workflow_type in WORKFLOWS:
+            banco, sistema = caso[workflow_type]
+            for asignacion in ASIGNACIONES:
+                for tolerancia in sorted({0, caso['tolerancia']}):
+                    motor = ReconciliationEngine(tolerance_days=tolerancia, asignacion=asignacion, **REFERENCIA)
+                    resultado = motor.reconcile(banco, sistema, workflow_type)
+                    clave = clave_referencia(semilla + numero, filas, workflow_type, asignacion, tolerancia)
+                    resultados[clave] = congelar_resultado(resultado)
+    # Un resultado por línea: un cambio de la referencia se revisa en el diff por caso
+    lineas = [f"{json.dumps(clave)}:{json.dumps(guardado, ensure_ascii=False, separators=(',', ':'))}"
+              for clave, guardado in resultados.items()]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(f'{{"casos":{casos},"filas":{filas},"semilla":{semilla},"resultados":{{\n')
+        archivo.write(',\n'.join(lineas))
+        archivo.write('\n}}\n')
+    return len(resultados)
+
+def verificar(alternativas=None, casos=30, filas=200, semilla=0, workflows=None, asignaciones=None, referencia=None):
+    """Corre cada alternativa contra la referencia en casos aleatorios; devuelve el reporte
+    
+    Por caso, workflow y asignación se crea un motor de cada alternativa, que concilia con 0 y
+    con la tolerancia del caso (en ese orden, así los motores con estado también se prueban
+    reutilizándolo). La referencia sale de los resultados congelados (referencia, por defecto
+    el archivo) y, si el caso no está ahí, del motor de referencia. El reporte tiene la
+    cantidad de comparaciones (y cuántas contra resultados congelados) y cada diferencia con
+    su semilla para reproducirla con generar_caso.
+    """
+    alternativas = ALTERNATIVAS if alternativas is None else alternativas
+    congelados = cargar_referencia() if referencia is None else referencia
+    comparaciones = 0
+    contra_congelados = 0
+    fallas = []
+    for numero in range(casos):
+        semilla_caso = semilla + numero
+        caso = generar_caso(semilla_caso, filas)
+        tolerancias = sorted({0, caso['tolerancia']})
+        for workflow_type in workflows or WORKFLOWS:
+            banco, sistema = caso[workflow_type]
+            for asignacion in asignaciones or ASIGNACIONES:
+                referencias = {}
+                congeladas = set()
+                for tolerancia in tolerancias:
+                    guardado = congelados.get(clave_referencia(semilla_caso, filas, workflow_type, asignacion, tolerancia))
+                    if guardado is not None:
+                        referencias[tolerancia] = resultado_congelado(guardado, banco, sistema)
+                        congeladas.add(tolerancia)
+                    else:
+                        referencias[tolerancia] = ReconciliationEngine(
+                            tolerance_days=tolerancia, asignacion=asignacion, **REFERENCIA
+                        ).reconcile(banco, sistema, workflow_type)
+                for nombre, crear in alternativas.items():
+                    motor = crear(asignacion)
+                    for tolerancia in tolerancias:
+                        motor.tolerance_days = tolerancia
+                        try:
+                            encontradas = diferencias(referencias[tolerancia], motor.reconcile(banco, sistema, workflow_type))
+                        except Exception as e:
+                            encontradas = [f"error: {type(e).__name__}: {e}"]
+                        comparaciones += 1
+                        contra_congelados += tolerancia in congeladas
+                        if encontradas:
+                            fallas.append({'alternativa': nombre, 'semilla': semilla_caso, 'workflow_type': workflow_type,
+                                           'asignacion': asignacion, 'tolerancia': tolerancia, 'diferencias': encontradas})
+    return {
+        'casos': casos,
+        'filas': filas,
+        'semilla': semilla,
+        'alternativas': list(alternativas),
+        'comparaciones': comparaciones,
+        'contra_congelados': contra_congelados,
+        'fallas': fallas,
+    }
+
+def pares_reglas(rnd, banco_data, sistema_data, pares=PARES_REGLAS):
+    """Posiciones (banco, sistema) alineadas: un tercio al azar, un tercio con el mismo monto
+    entero y un tercio con el mismo documento y monto entero (los dos últimos, si hay)"""
+    tercio = max(pares // 3, 1)
+    pos_bco = [rnd.integers(0, len(banco_data), tercio)]
+    pos_sis = [rnd.integers(0, len(sistema_data), tercio)]
+    col_documento = 'Nro.Ref.Bco' if 'Nro.Ref.Bco' in sistema_data.columns else 'documento'
+    montos_bco = pd.Series(np.trunc(banco_data['Monto_Neto'].to_numpy(dtype=np.float64))).astype(str)
+    montos_sis = pd.Series(np.trunc(sistema_data['Monto'].to_numpy(dtype=np.float64))).astype(str)
+    documentos_bco = banco_data['Documento_Banco'].astype(str).str.strip().to_numpy()
+    documentos_sis = sistema_data[col_documento].astype(str).str.strip().to_numpy()
+    claves = [
+        (montos_bco.to_numpy(), montos_sis.to_numpy()),
+        ((montos_bco + '|' + documentos_bco).to_numpy(), (montos_sis + '|' + documentos_sis).to_numpy()),
+    ]
+    for clave_bco, clave_sis in claves:
+        iguales = pd.merge(
+            pd.DataFrame({'clave': clave_bco, 'pos_banco': np.arange(len(banco_data))}),
+            pd.DataFrame({'clave': clave_sis, 'pos_sistema': np.arange(len(sistema_data))}),
+            on='clave'
+        )
+        if len(iguales):
+            elegidos = rnd.integers(0, len(iguales), tercio)
+            pos_bco.append(iguales['pos_banco'].to_numpy()[elegidos])
+            pos_sis.append(iguales['pos_sistema'].to_numpy()[elegidos])
+    return np.concatenate(pos_bco), np.concatenate(pos_sis)
+
+def verificar_reglas(casos=30, filas=200, semilla=0, pares=PARES_REGLAS):
+    """Compara las reglas en bloque (CandidateScorer) con los helpers fila a fila del motor
+    
+    Por caso y workflow concilia con el motor de referencia (para tener banco_data y
+    sistema_data preparados) y evalúa los mismos pares con puntuar_candidatos /
+    crear_registros_match y con _is_*_match / _create_match_record. Devuelve un reporte con
+    la cantidad de pares comparados y cada diferencia con su semilla y sus posiciones.
+    """
+    comparaciones = 0
+    fallas = []
+    for numero in range(casos):
+        semilla_caso = semilla + numero
+        caso = generar_caso(semilla_caso, filas)
+        rnd = np.random.default_rng(semilla_caso)
+        for workflow_type in WORKFLOWS:
+            banco, sistema = caso[workflow_type]
+            motor = ReconciliationEngine(tolerance_days=caso['tolerancia'], **REFERENCIA)
+            resultado = motor.reconcile(banco, sistema, workflow_type)
+            banco_data, sistema_data = resultado['banco_data'], resultado['sistema_data']
+            if len(banco_data) == 0 or len(sistema_data) == 0:
+                continue
+            pos_bco, pos_sis = pares_reglas(rnd, banco_data, sistema_data, pares)
+            tabla = motor.puntuar_candidatos(banco_data, sistema_data, pos_bco, pos_sis)
+            registros = motor.crear_registros_match(banco_data, sistema_data, pos_bco, pos_sis, 'diferencial')
+            for i, (pos_banco, pos_sistema) in enumerate(zip(pos_bco, pos_sis)):
+                fila_banco, fila_sistema = banco_data.iloc[pos_banco], sistema_data.iloc[pos_sistema]
+                por_fila = {
+                    'exacto': motor._is_exact_match(fila_banco, fila_sistema),
+                    'tolerante': motor._is_tolerant_match(fila_banco, fila_sistema),
+                    'documento': motor._is_document_match(fila_banco, fila_sistema),
+                }
+                encontradas = [f"{regla}: en bloque {bool(tabla[regla].iat[i])}, fila a fila {por_fila[regla]}"
+                               for regla in REGLAS if bool(tabla[regla].iat[i]) != por_fila[regla]]
+                registro = motor._create_match_record(fila_banco, fila_sistema, 'diferencial')
+                encontradas += [f"registro['{clave}']: en bloque {registros[clave].iat[i]!r}, fila a fila {valor!r}"
+                                for clave, valor in registro.items() if not valores_iguales(valor, registros[clave].iat[i])]
+                comparaciones += 1
+                if encontradas:
+                    fallas.append({'semilla': semilla_caso, 'workflow_type': workflow_type,
+                                   'par': (int(pos_banco), int(pos_sistema)), 'diferencias': encontradas})
+    return {
+        'casos': casos,
+        'filas': filas,
+        'semilla': semilla,
+        'comparaciones': comparaciones,
+        'fallas': fallas,
+    }
+
+def imprimir(reporte):
+    """Resumen del reporte diferencial"""
+    print(f"Diferencial: {reporte['comparaciones']} comparaciones ({reporte['casos']} casos de "
+          f"{reporte['filas']} filas, alternativas: {', '.join(reporte['alternativas'])})")
+    print(f"   {reporte['contra_congelados']} contra resultados congelados, el resto contra el motor de referencia")
+    if not reporte['fallas']:
+        print("✅ Todas las alternativas coinciden con la referencia")
+    for falla in reporte['fallas']:
+        print(f"❌ {falla['alternativa']} semilla {falla['semilla']} {falla['workflow_type']} "
+              f"{falla['asignacion']} tolerancia {falla['tolerancia']}:")
+        for diferencia in falla['diferencias']:
+            print(f"     {diferencia}")
+
+def imprimir_reglas(reporte):
+    """Resumen de la comparación de reglas en bloque contra fila a fila"""
+    print(f"Reglas: {reporte['comparaciones']} pares comparados en bloque y fila a fila "
+          f"({reporte['casos']} casos de {reporte['filas']} filas)")
+    if not reporte['fallas']:
+        print("✅ Las reglas en bloque coinciden con los helpers fila a fila")
+    for falla in reporte['fallas']:
+        print(f"❌ semilla {falla['semilla']} {falla['workflow_type']} par {falla['par']}:")
+        for diferencia in falla['diferencias']:
+            print(f"     {diferencia}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--casos', type=int, default=30)
+    parser.add_argument('--filas', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--alternativas', nargs='+', choices=list(ALTERNATIVAS), default=list(ALTERNATIVAS))
+    parser.add_argument('--nivel-log', default='ERROR')
+    parser.add_argument('--congelar', action='store_true',
+                        help='regenera diferencial_referencia.json con el motor de referencia (solo ante un cambio buscado)')
+    args = parser.parse_args()
+    
+    configurar_logging(args.nivel_log)
+    if args.congelar:
+        guardados = congelar_referencia(casos=CASOS_CONGELADOS, filas=FILAS_CONGELADAS)
+        print(f"Referencia congelada: {guardados} resultados en {ARCHIVO_REFERENCIA}")
+        return
+    reporte = verificar({nombre: ALTERNATIVAS[nombre] for nombre in args.alternativas},
+                        casos=args.casos, filas=args.filas, semilla=args.semilla)
+    imprimir(reporte)
+    reporte_reglas = verificar_reglas(casos=args.casos, filas=args.filas, semilla=args.semilla)
+    imprimir_reglas(reporte_reglas)
+    sys.exit(1 if reporte['fallas'] or reporte_reglas['fallas'] else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Extractos sintéticos y deterministas con los layouts reales (crudos, como se suben)
+
+- Banco BROU: preámbulo, header "Fecha / Número de documento", "Saldo inicial", movimientos
+  y pie a partir de "Saldo Final".
+- Banco Scotia: header "Dep. Origen / Comprobante".
+- Sistema del Workflow 1: header "Fecha / Nro.Ref.Bco / Debe / Haber", cierre "Saldos Finales".
+- Sistema del Workflow 2: header "fec / documento / debe / haber", cierre "Saldos Finales".
+
+Uso:
+    from benchmarks.extractos_sinteticos import generar_par
+    archivos = generar_par('workflow_1', 100000)
+"""
+import io
+import numpy as np
+import pandas as pd
+
+# Nombres de archivo que DataProcessor.get_workflow_type asocia a cada workflow
+NOMBRES_ARCHIVOS = {
+    'workflow_1': ('BROU_4103.csv', 'Sistema_4103.csv'),
+    'workflow_2': ('Scotia_servima.csv', 'Sistema_servima.csv'),
+}
+
+# Fechas como quedan al exportar la planilla a CSV; 'fec' con el formato día/mes que espera el Workflow 2
+FORMATO_FECHA = '%Y-%m-%d'
+FORMATO_FEC = '%d/%m/%Y'
+
+# Montos redondos que se repiten (cuotas, transferencias fijas): muchos candidatos por monto
+MONTOS_REDONDOS = np.array([500.0, 1000.0, 2500.0, 5000.0, 10000.0, 25000.0])
+
+class ArchivoSubido(io.BytesIO):
+    """Imita el UploadedFile de Streamlit (BytesIO con nombre)"""
+    
+    def __init__(self, contenido, name):
+        super().__init__(contenido)
+        self.name = name
+
+def generar_movimientos(filas, semilla=0):
+    """Movimientos del banco: fecha, documento, monto y si es crédito
+    
+    El período crece con la cantidad de filas (unas 2.000 por día como máximo) para que la
+    densidad de candidatos sea parecida en todos los tamaños; un 0,2% son montos redondos
+    (la ventana del Workflow 2 no tiene límite superior: los repetidos cruzan con todo el período).
+    """
+    rnd = np.random.default_rng(semilla)
+    dias = max(31, filas // 2000)
+    montos = np.round(rnd.uniform(1, 1000000, filas), 2)
+    redondos = rnd.random(filas) < 0.002
+    montos[redondos] = rnd.choice(MONTOS_REDONDOS, int(redondos.sum()))
+    movimientos = pd.DataFrame({
+        'fecha': pd.Timestamp('2024-01-01') + pd.to_timedelta(rnd.integers(0, dias, filas), unit='D'),
+        'documento': rnd.integers(1, 99999999, filas),
+        'monto': montos,
+        'credito': rnd.random(filas) < 0.6,
+    })
+    # Los extractos vienen ordenados por fecha
+    return movimientos.iloc[np.argsort(movimientos['fecha'].to_numpy(), kind='stable')].reset_index(drop=True)
+
+def movimientos_sistema(movimientos, desde, hasta, semilla=0):
+    """Registros del sistema: la mayoría de los movimientos del banco, días después y con ruido
+    
+    Un 85% de los movimientos se registra con un corrimiento de fecha entre desde y hasta días
+    (parte queda fuera de la ventana de conciliación), con 10% de referencias y 5% de montos
+    cambiados; se agrega un 15% de registros sin contrapartida.
+    """
+    rnd = np.random.default_rng(semilla + 1)
+    filas = len(movimientos)
+    registrados = movimientos.iloc[rnd.permutation(filas)[:int(filas * 0.85)]].reset_index(drop=True)
+    n = len(registrados)
+    registrados['fecha'] = registrados['fecha'] + pd.to_timedelta(rnd.integers(desde, hasta + 1, n), unit='D')
+    otra_referencia = rnd.random(n) < 0.10
+    registrados.loc[otra_referencia, 'documento'] = rnd.integers(1, 99999999, int(otra_referencia.sum()))
+    otro_monto = rnd.random(n) < 0.05
+    registrados.loc[otro_monto, 'monto'] = np.round(rnd.uniform(1, 1000000, int(otro_monto.sum())), 2)
+    
+    extra = generar_movimientos(filas - n, semilla + 2)
+    extra['fecha'] = extra['fecha'] + pd.to_timedelta(rnd.integers(0, 3, len(extra)), unit='D')
+    sistema = pd.concat([registrados, extra], ignore_index=True)
+    return sistema.iloc[np.argsort(sistema['fecha'].to_numpy(), kind='stable')].reset_index(drop=True)
+
+def _montos_texto(montos, mostrar):
+    """Montos como en las planillas exportadas ("12,345.67"); vacío donde no se muestran"""
+    texto = pd.Series(montos).map('{:,.2f}'.format).to_numpy(dtype=object, copy=True)
+    texto[~mostrar] = None
+    return texto
+
+def _crudo(preambulo, columnas, datos, pie):
+    """Archivo crudo (sin header de pandas): preámbulo, header, datos y pie"""
+    ancho = len(columnas)
+    arriba = [list(fila) + [None] * (ancho - len(fila)) for fila in preambulo + [columnas]]
+    abajo = [list(fila) + [None] * (ancho - len(fila)) for fila in pie]
+    datos = pd.DataFrame(datos)
+    datos.columns = range(ancho)
+    return pd.concat([pd.DataFrame(arriba), datos, pd.DataFrame(abajo)], ignore_index=True)
+
+def extracto_brou(movimientos, cuenta='4103'):
+    """Extracto BROU crudo: preámbulo, header, "Saldo inicial", movimientos, "Saldo Final" y notas"""
+    n = len(movimientos)
+    desde = movimientos['fecha'].min().strftime('%d/%m/%Y')
+    hasta = movimientos['fecha'].max().strftime('%d/%m/%Y')
+    preambulo = [
+        ['BANCO DE LA REPUBLICA ORIENTAL DEL URUGUAY'],
+        [f'Cuenta: {cuenta}'],
+        [f'Fecha: {desde} al {hasta}'],
+        [],
+    ]
+    columnas = ['Fecha', 'Descripción', 'Número de documento', 'Asunto', 'Dependencia', 'Débito', 'Crédito']
+    credito = movimientos['credito'].to_numpy()
+    datos = {
+        'Fecha': movimientos['fecha'].dt.strftime(FORMATO_FECHA).to_numpy(),
+        'Descripción': 'TRANSFERENCIA',
+        'Número de documento': movimientos['documento'].astype(str).to_numpy(),
+        'Asunto': 'PAGO',
+        'Dependencia': 'DEP ' + (movimientos['documento'] % 20 + 1).astype(str).to_numpy(),
+        'Débito': _montos_texto(movimientos['monto'], ~credito),
+        'Crédito': _montos_texto(movimientos['monto'], credito),
+    }
+    datos = pd.concat([pd.DataFrame([[None, 'Saldo inicial']]).reindex(columns=range(7)),
+                       pd.DataFrame(datos).set_axis(range(7), axis=1)], ignore_index=True)
+    pie = [['Saldo Final', None, None, None, None, None, '0.00']]
+    pie += [[f'Nota {i}', 'Movimiento informativo'] for i in range(max(1, n // 100))]
+    return _crudo(preambulo, columnas, datos, pie)
+
+def extracto_scotia(movimientos, cuenta='servima'):
+    """Extracto Scotia crudo: título, header "Dep. Origen / Comprobante" y movimientos"""
+    preambulo = [['SCOTIABANK URUGUAY'], [f'Cuenta: {cuenta}']]
+    columnas = ['Dep. Origen', 'Concepto', 'Comprobante', 'Fecha', 'Débito', 'Crédito', 'Saldo']
+    credito = movimientos['credito'].to_numpy()
+    datos = {
+        'Dep. Origen': (movimientos['documento'] % 50 + 1).astype(str).to_numpy(),
+        'Concepto': 'TRF',
+        'Comprobante': movimientos['documento'].astype(str).to_numpy(),
+        'Fecha': movimientos['fecha'].dt.strftime(FORMATO_FECHA).to_numpy(),
+        'Débito': _montos_texto(movimientos['monto'], ~credito),
+        'Crédito': _montos_texto(movimientos['monto'], credito),
+        'Saldo': '0.00',
+    }
+    return _crudo(preambulo, columnas, datos, [])
+
+def sistema_workflow1(registros):
+    """Listado del sistema del Workflow 1: "Fecha / Nro.Ref.Bco", "saldo anterior" y "Saldos Finales" """
+    preambulo = [['EMPRESA S.A.'], ['Listado de movimientos bancarios']]
+    columnas = ['Fecha', 'Nro.Trans.', 'Nro.Ref.Bco', 'Concepto', 'Debe', 'Haber']
+    credito = registros['credito'].to_numpy()
+    datos = pd.DataFrame({
+        'Fecha': registros['fecha'].dt.strftime(FORMATO_FECHA).to_numpy(),
+        'Nro.Trans.': np.arange(1, len(registros) + 1).astype(str),
+        'Nro.Ref.Bco': registros['documento'].astype(str).to_numpy(),
+        'Concepto': 'COBRO',
+        # El sistema registra en Debe lo que el banco acredita
+        'Debe': np.where(credito, _montos_texto(registros['monto'], credito), '0.00'),
+        'Haber': np.where(credito, '0.00', _montos_texto(registros['monto'], ~credito)),
+    })
+    datos = pd.concat([pd.DataFrame([[None, None, 'saldo anterior']]).reindex(columns=range(6)),
+                       datos.set_axis(range(6), axis=1)], ignore_index=True)
+    pie = [[None, None, 'Saldos Finales', None, '0.00', '0.00']]
+    return _crudo(preambulo, columnas, datos, pie)
+
+def sistema_workflow2(registros):
+    """Listado del sistema del Workflow 2: "fec / documento / debe / haber", "Saldos Finales" """
+    preambulo = [['EMPRESA S.A.'], ['Mayor de bancos']]
+    columnas = ['fec', 'documento', 'cliprov', 'debe', 'haber', 'saldo']
+    credito = registros['credito'].to_numpy()
+    datos = pd.DataFrame({
+        'fec': registros['fecha'].dt.strftime(FORMATO_FEC).to_numpy(),
+        'documento': registros['documento'].astype(str).to_numpy(),
+        'cliprov': 'CLI ' + (registros['documento'] % 500).astype(str).to_numpy(),
+        'debe': np.where(credito, _montos_texto(registros['monto'], credito), '0.00'),
+        'haber': np.where(credito, '0.00', _montos_texto(registros['monto'], ~credito)),
+        'saldo': '0.00',
+    })
+    datos = pd.concat([pd.DataFrame([[None, 'Saldo anterior']]).reindex(columns=range(6)),
+                       datos.set_axis(range(6), axis=1)], ignore_index=True)
+    pie = [[None, 'Saldos Finales', None, '0.00', '0.00', None]]
+    return _crudo(preambulo, columnas, datos, pie)
+
+def a_csv(crudo):
+    """Contenido CSV del archivo crudo (la primera fila queda como header al leerlo)"""
+    return crudo.to_csv(index=False, header=False).encode('utf-8')
+
+def generar_par(workflow_type, filas, semilla=0):
+    """Archivos de banco y sistema (nombre, contenido CSV) del workflow, con filas movimientos del banco
+    
+    Workflow 1: el sistema registra entre 2 días antes y 12 después (tolerancia habitual 10).
+    Workflow 2: entre 5 días antes y 10 después (la regla es Fecha <= fec + 3 días).
+    """
+    movimientos = generar_movimientos(filas, semilla)
+    nombre_banco, nombre_sistema = NOMBRES_ARCHIVOS[workflow_type]
+    if workflow_type == 'workflow_1':
+        banco = extracto_brou(movimientos)
+        sistema = sistema_workflow1(movimientos_sistema(movimientos, -2, 12, semilla))
+    else:
+        banco = extracto_scotia(movimientos)
+        sistema = sistema_workflow2(movimientos_sistema(movimientos, -5, 10, semilla))
+    return {
+        'banco': (nombre_banco, a_csv(banco)),
+        'sistema': (nombre_sistema, a_csv(sistema)),
+    }
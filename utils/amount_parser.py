@@ -0,0 +1,78 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Convenciones de separadores: decimal con punto ("1,234.56") o con coma ("1.234,56")
+DECIMAL_PUNTO = 'punto'
+DECIMAL_COMA = 'coma'
+
+# Evidencia de cada convención en un valor ya sin "$" ni espacios: separador decimal seguido de
+# 1 o 2 dígitos, o al menos dos grupos de miles ("1.234" y "1,234" son ambiguos y no cuentan)
+PATRON_DECIMAL_PUNTO = re.compile(r'^[-+]?((\d{1,3}(,\d{3})*|\d*)\.\d{1,2}|\d{1,3}(,\d{3}){2,})$')
+PATRON_DECIMAL_COMA = re.compile(r'^[-+]?((\d{1,3}(\.\d{3})*|\d*),\d{1,2}|\d{1,3}(\.\d{3}){2,})$')
+
+class AmountParser:
+    """Conversión vectorizada de montos de texto a números y a su parte entera
+    
+    La convención de separadores se detecta por columna; ante la duda se usa decimal con
+    punto, que es la limpieza histórica (quitar "," y "$").
+    """
+    
+    TAMANO_MUESTRA = 200
+    
+    def __init__(self):
+        # Convención usada en la última columna convertida (None si no hubo que detectarla)
+        self.ultima_convencion = None
+    
+    def parsear(self, valores, convencion=None):
+        """Convierte montos a número (NaN si no se pueden convertir)
+        
+        Columnas que ya son numéricas se devuelven sin cambios. Cada texto distinto se limpia
+        y convierte una sola vez. Con convencion (por ejemplo la que el layout ya usó) se omite
+        la detección.
+        """
+        self.ultima_convencion = None
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            return serie
+        
+        if serie.empty:
+            return pd.to_numeric(serie, errors='coerce')
+        
+        codigos, unicos = pd.factorize(serie.to_numpy())
+        if len(unicos) == 0:
+            return pd.Series(np.full(len(serie), np.nan), index=serie.index, name=serie.name)
+        
+        textos = [str(valor) for valor in unicos]
+        convencion = convencion or self.detectar_convencion(textos)
+        self.ultima_convencion = convencion
+        if convencion == DECIMAL_COMA:
+            limpios = [t.replace('.', '').replace('$', '').replace(',', '.').strip() for t in textos]
+        else:
+            limpios = [t.replace(',', '').replace('$', '').strip() for t in textos]
+        numeros = pd.to_numeric(pd.Series(limpios, dtype=object), errors='coerce').to_numpy()
+        
+        if (codigos < 0).any():
+            # Nulos: NaN al final para que el código -1 lo tome
+            numeros = np.append(numeros.astype(np.float64), np.nan)
+        return pd.Series(numeros[codigos], index=serie.index, name=serie.name)
+    
+    def detectar_convencion(self, textos):
+        """Detecta si la columna usa decimal con punto o con coma a partir de una muestra"""
+        votos_punto = 0
+        votos_coma = 0
+        for texto in textos[:self.TAMANO_MUESTRA]:
+            limpio = texto.replace('$', '').replace(' ', '')
+            if PATRON_DECIMAL_COMA.match(limpio):
+                votos_coma += 1
+            elif PATRON_DECIMAL_PUNTO.match(limpio):
+                votos_punto += 1
+        return DECIMAL_COMA if votos_coma > votos_punto else DECIMAL_PUNTO
+    
+    def parte_entera(self, valores, convencion=None):
+        """Parte entera de los montos (int64, truncada hacia cero); los vacíos valen 0
+        
+        Es la comparación de montos de la conciliación, equivalente a fillna(0).astype(int).
+        """
+        numeros = self.parsear(valores, convencion).to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.trunc(np.nan_to_num(numeros, nan=0.0)).astype(np.int64)
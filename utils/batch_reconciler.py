@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from utils.data_processor import DataProcessor
+from utils.file_cache import FileCache
+from utils.reconciliation import ReconciliationEngine
+from utils.incremental_reconciler import IncrementalReconciler
+from utils.instrumentation import capturar_logs
+
+logger = logging.getLogger(__name__)
+
+def conciliar_cuenta(tarea):
+    """Carga, limpia y concilia un par de archivos (se ejecuta en un proceso del pool)
+    
+    Devuelve el resultado de la conciliación (o el error) y los mensajes registrados durante el
+    proceso (desde opciones['nivel_log']).
+    """
+    cuenta, banco_path, sistema_path, opciones = tarea
+    inicio = time.perf_counter()
+    resultado, error, workflow_type = None, None, None
+    with capturar_logs(opciones['nivel_log']) as salida:
+        try:
+            processor = DataProcessor(compacto=opciones['compacto'])
+            workflow_type = processor.get_workflow_type(os.path.basename(banco_path), os.path.basename(sistema_path))
+            if opciones['usar_cache']:
+                file_cache = FileCache()
+                banco_df = file_cache.cargar_archivo(banco_path, 'banco', processor)
+                sistema_df = file_cache.cargar_archivo(sistema_path, 'sistema', processor)
+            else:
+                banco_df = processor.process_file_streaming(banco_path, 'banco')
+                sistema_df = processor.process_file_streaming(sistema_path, 'sistema')
+            engine = ReconciliationEngine(tolerance_days=opciones['tolerance_days'])
+            if opciones['incremental']:
+                # Cada cuenta tiene su propio estado: los procesos no comparten archivos
+                incremental = IncrementalReconciler(cuenta, directorio=opciones['directorio_estado'], engine=engine)
+                resultado = incremental.conciliar(banco_df, sistema_df, workflow_type, periodo=opciones['periodo'])
+            else:
+                resultado = engine.reconcile(banco_df, sistema_df, workflow_type)
+        except Exception as e:
+            error = str(e)
+            logger.error("❌ Error conciliando %s: %s", cuenta, error)
+    return {
+        'cuenta': cuenta,
+        'banco': banco_path,
+        'sistema': sistema_path,
+        'workflow_type': workflow_type,
+        'resultado': resultado,
+        'error': error,
+        'segundos': time.perf_counter() - inicio,
+        'salida': salida.getvalue()
+    }
+
+class BatchReconciler:
+    """Conciliación de varias cuentas (pares de archivos banco/sistema) en paralelo
+    
+    Cada cuenta se concilia en un proceso del pool con el workflow detectado por nombre de
+    archivo (DataProcessor.get_workflow_type). Las cuentas son independientes y los
+    resultados se devuelven en el orden de entrada, así que no dependen de la cantidad de
+    procesos.
+    """
+    
+    def __init__(self, max_workers=None, tolerance_days=10, usar_cache=True, compacto=True,
+                 incremental=False, directorio_estado=None, nivel_log='INFO'):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tolerance_days = tolerance_days
+        self.usar_cache = usar_cache
+        self.compacto = compacto
+        # Modo incremental: partidas abiertas de cada cuenta persistidas entre períodos
+        self.incremental = incremental
+        self.directorio_estado = directorio_estado
+        # Nivel de los mensajes que se guardan en 'salidas' por cuenta
+        self.nivel_log = nivel_log
+    
+    def conciliar(self, pares, periodo=None):
+        """Concilia los pares de archivos y devuelve resultados por cuenta, resumen y totales
+        
+        pares es un dict {cuenta: (banco_path, sistema_path)} o una lista de tuplas (banco_path,
+        sistema_path); en ese caso la cuenta es el nombre del archivo del banco sin extensión.
+        En modo incremental, periodo identifica el período conciliado en el estado de cada cuenta.
+        """
+        tareas = self._tareas(pares, periodo)
+        logger.info("📦 Conciliando %d cuentas con %d procesos", len(tareas), min(self.max_workers, len(tareas)))
+        
+        if self.max_workers == 1 or len(tareas) <= 1:
+            procesadas = [conciliar_cuenta(tarea) for tarea in tareas]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tareas))) as pool:
+                procesadas = list(pool.map(conciliar_cuenta, tareas))
+        
+        for procesada in procesadas:
+            estado = "❌" if procesada['error'] else "✅"
+            logger.info("%s %s (%s) en %.2fs", estado, procesada['cuenta'], procesada['workflow_type'], procesada['segundos'])
+        
+        resumen = self.resumen(procesadas)
+        return {
+            'resultados': {procesada['cuenta']: procesada['resultado'] for procesada in procesadas},
+            'errores': {procesada['cuenta']: procesada['error'] for procesada in procesadas if procesada['error']},
+            'salidas': {procesada['cuenta']: procesada['salida'] for procesada in procesadas},
+            'resumen': resumen,
+            'totales': self.totales(resumen)
+        }
+    
+    def resumen(self, procesadas):
+        """Una fila por cuenta con totales, conciliadas y sin conciliar"""
+        filas = []
+        for procesada in procesadas:
+            stats = procesada['resultado']['statistics'] if procesada['resultado'] is not None else {}
+            filas.append({
+                'cuenta': procesada['cuenta'],
+                'workflow_type': procesada['workflow_type'],
+                'archivo_banco': os.path.basename(procesada['banco']),
+                'archivo_sistema': os.path.basename(procesada['sistema']),
+                'total_banco': stats.get('total_transacciones_banco', 0),
+                'total_sistema': stats.get('total_transacciones_sistema', 0),
+                'conciliadas': stats.get('total_conciliadas', 0),
+                'sin_conciliar_banco': stats.get('sin_conciliar_banco', 0),
+                'sin_conciliar_sistema': stats.get('sin_conciliar_sistema', 0),
+                'porcentaje_conciliacion': stats.get('porcentaje_conciliacion', 0.0),
+                'segundos': procesada['segundos'],
+                'error': procesada['error']
+            })
+        return pd.DataFrame(filas)
+    
+    def totales(self, resumen):
+        """Totales consolidados de todas las cuentas"""
+        columnas = ['total_banco', 'total_sistema', 'conciliadas', 'sin_conciliar_banco', 'sin_conciliar_sistema']
+        totales = {columna: int(resumen[columna].sum()) if len(resumen) else 0 for columna in columnas}
+        totales['cuentas'] = len(resumen)
+        totales['cuentas_con_error'] = int(resumen['error'].notna().sum()) if len(resumen) else 0
+        totales['porcentaje_conciliacion'] = totales['conciliadas'] / max(totales['total_banco'], 1) * 100
+        return totales
+    
+    def _tareas(self, pares, periodo=None):
+        """Tareas (cuenta, banco, sistema, opciones) en el orden de entrada"""
+        if isinstance(pares, dict):
+            items = list(pares.items())
+        else:
+            items = [(os.path.splitext(os.path.basename(banco))[0], (banco, sistema)) for banco, sistema in pares]
+        
+        cuentas = [cuenta for cuenta, _ in items]
+        if len(set(cuentas)) != len(cuentas):
+            raise ValueError("Hay cuentas repetidas en el lote")
+        
+        opciones = {'tolerance_days': self.tolerance_days, 'usar_cache': self.usar_cache, 'compacto': self.compacto,
+                    'incremental': self.incremental, 'directorio_estado': self.directorio_estado, 'periodo': periodo,
+                    'nivel_log': self.nivel_log}
+        return [(cuenta, banco, sistema, opciones) for cuenta, (banco, sistema) in items]
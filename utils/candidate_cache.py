@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+# Tolerancia con la que se generan los pares guardados (el máximo del slider de la app)
+TOLERANCIA_CACHE = 15
+
+class CandidateCache:
+    """Caché en memoria de datos preparados y pares candidatos por par de archivos de entrada
+    
+    Una entrada corresponde a los mismos objetos DataFrame de banco y sistema (la caché guarda
+    una referencia a ellos, así que su identidad no se reutiliza mientras la entrada existe) y
+    al workflow. Con los mismos datos, cambiar la tolerancia solo vuelve a filtrar y asignar.
+    """
+    
+    MAX_ENTRADAS = 4
+    
+    def __init__(self, max_entradas=None, tolerancia=TOLERANCIA_CACHE):
+        self.max_entradas = max_entradas or self.MAX_ENTRADAS
+        self.tolerancia = tolerancia
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def entrada(self, banco_df, sistema_df, workflow_type):
+        """Entrada de los datos indicados (se crea vacía si no existe); las más viejas se descartan"""
+        clave = (id(banco_df), id(sistema_df), workflow_type)
+        entrada = self.entradas.get(clave)
+        if entrada is not None and entrada['banco'] is banco_df and entrada['sistema'] is sistema_df:
+            self.entradas.move_to_end(clave)
+            return entrada
+        
+        entrada = {'banco': banco_df, 'sistema': sistema_df, 'preparados': None, 'candidatos': {}}
+        self.entradas[clave] = entrada
+        while len(self.entradas) > self.max_entradas:
+            self.entradas.popitem(last=False)
+        return entrada
+    
+    def candidatos(self, entrada, clave, tolerancia=None):
+        """Pares guardados con la clave indicada, si cubren la tolerancia pedida (o None)"""
+        guardados = entrada['candidatos'].get(clave) if entrada is not None else None
+        if guardados is None or (tolerancia is not None and guardados['tolerancia'] < tolerancia):
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return guardados
+    
+    def guardar_candidatos(self, entrada, clave, datos, tolerancia=None):
+        """Guarda los pares (y lo que haga falta para reutilizarlos) generados con esa tolerancia"""
+        if entrada is not None:
+            datos['tolerancia'] = tolerancia
+            entrada['candidatos'][clave] = datos
+    
+    def limpiar(self):
+        """Descarta todas las entradas"""
+        self.entradas.clear()
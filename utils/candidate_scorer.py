@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from utils.date_parser import DateParser
+from utils.amount_parser import AmountParser
+
+# Nanosegundos por día (diferencias de fechas en días enteros, como Timedelta.days)
+NS_POR_DIA = 86400 * 10 ** 9
+
+class CandidateScorer:
+    """Reglas de matching evaluadas sobre pares candidatos en bloque
+    
+    Recibe los datos ya preparados por ReconciliationEngine (Fecha_Banco, Fecha_Sistema,
+    Monto_Neto, Monto, Documento_Banco) y convierte cada columna una sola vez. Los pares se
+    indican con arreglos alineados de posiciones (banco, sistema) y cada regla devuelve un
+    arreglo por par, con el mismo criterio que los helpers fila a fila del motor.
+    """
+    
+    def __init__(self, banco_df, sistema_df, workflow_type='workflow_1', tolerance_days=10,
+                 date_parser=None, amount_parser=None):
+        self.banco_df = banco_df
+        self.sistema_df = sistema_df
+        self.workflow_type = workflow_type
+        self.tolerance_days = tolerance_days
+        self.date_parser = date_parser or DateParser()
+        self.amount_parser = amount_parser or AmountParser()
+        
+        # Fechas normalizadas en nanosegundos (NaT como mínimo int64), montos y sus partes enteras
+        self.fechas_banco = self._nanosegundos(banco_df, 'Fecha_Banco')
+        self.fechas_sistema = self._nanosegundos(sistema_df, 'Fecha_Sistema')
+        self.importes_banco = self._montos(banco_df, 'Monto_Neto')
+        self.importes_sistema = self._montos(sistema_df, 'Monto')
+        self.montos_banco = self._montos_enteros(banco_df, 'Monto_Neto')
+        self.montos_sistema = self._montos_enteros(sistema_df, 'Monto')
+        
+        # Documentos como texto sin espacios; vacíos y 'nan' no cuentan como documento
+        col_sistema = 'Nro.Ref.Bco' if workflow_type == 'workflow_1' else 'documento'
+        self.documentos_banco = self._documentos(banco_df, 'Documento_Banco')
+        self.documentos_sistema = self._documentos(sistema_df, col_sistema)
+    
+    def diferencia_dias(self, pos_bco, pos_sis):
+        """Días entre Fecha_Banco y Fecha_Sistema de cada par (float, NaN si falta alguna fecha)"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        return self._dias(self.fechas_banco[pos_bco], self.fechas_sistema[pos_sis])
+    
+    def diferencia_montos(self, pos_bco, pos_sis):
+        """Monto_Neto (banco) menos Monto (sistema) de cada par"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        return self.importes_banco[pos_bco] - self.importes_sistema[pos_sis]
+    
+    def montos_iguales(self, pos_bco, pos_sis):
+        """Pares con la misma parte entera de monto"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        return self.montos_banco[pos_bco] == self.montos_sistema[pos_sis]
+    
+    def son_exactos(self, pos_bco, pos_sis):
+        """Misma fecha y mismo monto entero (_is_exact_match)"""
+        return (self.diferencia_dias(pos_bco, pos_sis) == 0) & self.montos_iguales(pos_bco, pos_sis)
+    
+    def son_tolerantes(self, pos_bco, pos_sis, tolerance_days=None):
+        """Fechas a no más de tolerance_days días y mismo monto entero (_is_tolerant_match)"""
+        if tolerance_days is None:
+            tolerance_days = self.tolerance_days
+        dias = self.diferencia_dias(pos_bco, pos_sis)
+        return (np.abs(dias) <= tolerance_days) & self.montos_iguales(pos_bco, pos_sis)
+    
+    def son_por_documento(self, pos_bco, pos_sis):
+        """Mismo documento (no vacío) y mismo monto entero (_is_document_match)"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        doc_banco = self.documentos_banco[pos_bco]
+        doc_sistema = self.documentos_sistema[pos_sis]
+        validos = (doc_banco != '') & (doc_sistema != '')
+        return validos & (doc_banco == doc_sistema) & (self.montos_banco[pos_bco] == self.montos_sistema[pos_sis])
+    
+    def puntuar(self, pos_bco, pos_sis, tolerance_days=None):
+        """Todas las reglas y diferencias de los pares en una tabla (una fila por par)"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        return pd.DataFrame({
+            'pos_banco': pos_bco,
+            'pos_sistema': pos_sis,
+            'dif_dias': self.diferencia_dias(pos_bco, pos_sis),
+            'dif_monto': self.diferencia_montos(pos_bco, pos_sis),
+            'exacto': self.son_exactos(pos_bco, pos_sis),
+            'tolerante': self.son_tolerantes(pos_bco, pos_sis, tolerance_days),
+            'documento': self.son_por_documento(pos_bco, pos_sis)
+        })
+    
+    def registros(self, pos_bco, pos_sis, match_type):
+        """Registros de match de los pares (mismas columnas que _create_match_record)"""
+        pos_bco, pos_sis = self._posiciones(pos_bco, pos_sis)
+        banco = self.banco_df
+        sistema = self.sistema_df
+        
+        # Diferencia_Dias sobre las columnas 'Fecha' originales, como _calculate_date_diff
+        fechas_banco = self._nanosegundos(banco, 'Fecha', normalizar=False)[pos_bco]
+        fechas_sistema = self._nanosegundos(sistema, 'Fecha', normalizar=False)[pos_sis]
+        diferencia = self._dias(fechas_banco, fechas_sistema)
+        
+        return pd.DataFrame({
+            'Match_Type': match_type,
+            'Fecha_Banco': self._columna(banco, 'Fecha', None)[pos_bco],
+            'Fecha_Sistema': self._columna(sistema, 'Fecha', None)[pos_sis],
+            'Monto_Banco': self._columna(banco, 'Monto_Neto', 0)[pos_bco],
+            'Monto_Sistema': self._columna(sistema, 'Monto', 0)[pos_sis],
+            'Diferencia_Monto': self.diferencia_montos(pos_bco, pos_sis),
+            'Documento_Banco': self._columna(banco, 'Numero_Documento', '')[pos_bco],
+            'Documento_Sistema': self._columna(sistema, 'Documento', '')[pos_sis],
+            'Descripcion_Banco': self._columna(banco, 'Descripcion', '')[pos_bco],
+            'Concepto_Sistema': self._columna(sistema, 'Concepto', '')[pos_sis],
+            'ID_Banco': self._columna(banco, 'ID_Banco', None)[pos_bco],
+            'ID_Sistema': self._columna(sistema, 'ID_Sistema', None)[pos_sis],
+            'Diferencia_Dias': pd.array(diferencia, dtype='Int64')
+        })
+    
+    def _posiciones(self, pos_bco, pos_sis):
+        """Posiciones como arreglos int64 alineados"""
+        pos_bco = np.asarray(pos_bco, dtype=np.int64)
+        pos_sis = np.asarray(pos_sis, dtype=np.int64)
+        if pos_bco.shape != pos_sis.shape:
+            raise ValueError("Las posiciones de banco y sistema deben tener el mismo largo")
+        return pos_bco, pos_sis
+    
+    def _dias(self, fechas_a, fechas_b):
+        """Diferencia en días enteros (redondeo hacia abajo, como Timedelta.days); NaN si falta una fecha"""
+        nulo = np.iinfo(np.int64).min
+        validas = (fechas_a != nulo) & (fechas_b != nulo)
+        dias = np.floor_divide(np.where(validas, fechas_a - fechas_b, 0), NS_POR_DIA).astype(np.float64)
+        dias[~validas] = np.nan
+        return dias
+    
+    def _nanosegundos(self, df, columna, normalizar=True):
+        """Fechas de una columna como int64 en nanosegundos (NaT si la columna falta)"""
+        if columna not in df.columns:
+            return np.full(len(df), np.iinfo(np.int64).min, dtype=np.int64)
+        fechas = self.date_parser.parsear(df[columna], formato='mixed', normalizar=normalizar)
+        return fechas.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    
+    def _montos(self, df, columna):
+        """Montos de una columna como float (vacíos o faltantes valen 0)"""
+        if columna not in df.columns:
+            return np.zeros(len(df))
+        numeros = self.amount_parser.parsear(df[columna]).to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.nan_to_num(numeros, nan=0.0)
+    
+    def _montos_enteros(self, df, columna):
+        """Parte entera de los montos de una columna (vacíos o faltantes valen 0)"""
+        if columna not in df.columns:
+            return np.zeros(len(df), dtype=np.int64)
+        return self.amount_parser.parte_entera(df[columna])
+    
+    def _documentos(self, df, columna):
+        """Documentos como texto sin espacios ('' si falta, está vacío o es 'nan')"""
+        if columna not in df.columns:
+            return np.full(len(df), '', dtype=object)
+        textos = df[columna].astype(str).str.strip()
+        return textos.where(textos != 'nan', '').to_numpy(dtype=object)
+    
+    def _columna(self, df, columna, defecto):
+        """Valores de una columna como arreglo (el valor por defecto si falta)"""
+        if columna not in df.columns:
+            return np.full(len(df), defecto, dtype=object)
+        return df[columna].to_numpy()
@@ -175,6 +175,44 @@ class ChartGenerator:
         
         return fig
     
+    def create_tolerance_curve(self, curva, tolerancia_actual=None):
+        """Crea la curva de verificadas y sin conciliar según la tolerancia en días"""
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=curva['tolerancia'],
+            y=curva['verificadas'],
+            mode='lines+markers',
+            name='Verificadas',
+            line=dict(color=self.colors['conciliado'])
+        ))
+        fig.add_trace(go.Scatter(
+            x=curva['tolerancia'],
+            y=curva['sin_conciliar_banco'],
+            mode='lines+markers',
+            name='Sin Conciliar Banco',
+            line=dict(color=self.colors['banco'])
+        ))
+        fig.add_trace(go.Scatter(
+            x=curva['tolerancia'],
+            y=curva['sin_conciliar_sistema'],
+            mode='lines+markers',
+            name='Sin Conciliar Sistema',
+            line=dict(color=self.colors['sistema'])
+        ))
+        
+        if tolerancia_actual is not None:
+            fig.add_vline(x=tolerancia_actual, line_dash='dash', line_color=self.colors['diferencia'])
+        
+        fig.update_layout(
+            title="Verificadas según Tolerancia de Fechas",
+            xaxis_title="Tolerancia (días)",
+            yaxis_title="Cantidad de Registros",
+            height=400,
+            hovermode='x unified'
+        )
+        
+        return fig
+    
     def create_match_type_distribution(self, reconciliation_result):
         """Crea distribución de tipos de match"""
         matched_df = reconciliation_result['matched']
@@ -245,7 +283,8 @@ class ChartGenerator:
     
     def create_daily_summary(self, reconciliation_result):
         """Crea resumen diario de conciliación"""
-        matched_df = reconciliation_result['matched']
+        # Copia: se agregan columnas y la vista puede estar compartida (memoizar_vistas)
+        matched_df = reconciliation_result['matched'].copy()
         
         if matched_df.empty or 'Fecha_Banco' not in matched_df.columns:
             fig = go.Figure()
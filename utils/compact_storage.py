@@ -0,0 +1,97 @@
+import sys
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401 - solo se verifica que las cadenas Arrow estén disponibles
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+# Columnas de pocos valores distintos que siempre se guardan como categóricas
+COLUMNAS_CATEGORICAS = ['Dependencia', 'Asunto', 'Tipo Valor', 'Estado', 'cliprov', 'Dep. Origen']
+
+# Números de documento: se conservan como texto Python (los usa el matching) pero internados
+COLUMNAS_DOCUMENTO = ['Número de documento', 'Comprobante', 'Nro.Ref.Bco', 'documento', 'Nro.Trans.']
+
+class CompactStorage:
+    """Representación compacta de columnas de texto: categóricas, cadenas Arrow y documentos internados"""
+    
+    # Proporción máxima de valores distintos para convertir automáticamente a categórica
+    MAX_PROPORCION_CATEGORIAS = 0.5
+    
+    def __init__(self):
+        self.ultimo_reporte = None
+    
+    def compactar(self, df, texto_vacio=False):
+        """Devuelve df con sus columnas de texto en representación compacta
+        
+        Con texto_vacio=True los valores se guardan como texto y los nulos como '' (los mismos
+        valores que clean_data_types); si no, los valores y nulos se conservan. El reporte de
+        memoria por columna queda en self.ultimo_reporte.
+        """
+        resultado = df.copy(deep=False)
+        for j in range(df.shape[1]):
+            serie = df.iloc[:, j]
+            if serie.dtype != object:
+                continue
+            columna = self._compactar_columna(serie, texto_vacio)
+            if columna is not None:
+                resultado.isetitem(j, columna)
+        
+        self.ultimo_reporte = self.reporte_memoria(df, resultado)
+        antes = self.ultimo_reporte['bytes_antes'].sum()
+        despues = self.ultimo_reporte['bytes_despues'].sum()
+        logger.info("💾 Memoria compacta: %.1f MB → %.1f MB", antes / 1024 ** 2, despues / 1024 ** 2)
+        return resultado
+    
+    def reporte_memoria(self, antes, despues):
+        """Memoria por columna (bytes y tipo) antes y después de compactar"""
+        bytes_antes = antes.memory_usage(deep=True, index=False).to_numpy()
+        bytes_despues = despues.memory_usage(deep=True, index=False).to_numpy()
+        reporte = pd.DataFrame({
+            'columna': [str(col) for col in antes.columns],
+            'tipo_antes': [str(tipo) for tipo in antes.dtypes],
+            'bytes_antes': bytes_antes,
+            'tipo_despues': [str(tipo) for tipo in despues.dtypes],
+            'bytes_despues': bytes_despues,
+        })
+        reporte['ahorro_%'] = np.where(
+            bytes_antes > 0, (1 - bytes_despues / np.maximum(bytes_antes, 1)) * 100, 0.0
+        ).round(1)
+        return reporte
+    
+    def _compactar_columna(self, serie, texto_vacio):
+        """Convierte una columna de objetos; devuelve None si conviene dejarla como está"""
+        codigos, unicos = pd.factorize(serie.to_numpy())
+        
+        if texto_vacio:
+            # Mismo resultado que astype(str) + replace('nan', ''), calculado sobre valores únicos
+            textos = [str(valor) for valor in unicos]
+            textos = ['' if texto == 'nan' else texto for texto in textos] + ['']
+            codigos_texto, categorias = pd.factorize(np.array(textos, dtype=object))
+            codigos = codigos_texto[codigos]
+        else:
+            categorias = unicos
+        
+        solo_texto = all(isinstance(valor, str) for valor in categorias)
+        nombre = serie.name
+        
+        if nombre in COLUMNAS_DOCUMENTO and solo_texto:
+            # Valores repetidos comparten el mismo objeto str (también entre banco y sistema)
+            internados = np.array([sys.intern(valor) for valor in categorias] + [np.nan], dtype=object)
+            return pd.Series(internados[codigos], index=serie.index, name=nombre)
+        
+        pocos_distintos = len(categorias) <= self.MAX_PROPORCION_CATEGORIAS * len(serie)
+        if nombre in COLUMNAS_CATEGORICAS or pocos_distintos:
+            categorica = pd.Categorical.from_codes(codigos, categories=pd.Index(categorias, dtype=object))
+            return pd.Series(categorica, index=serie.index, name=nombre)
+        
+        if solo_texto and ARROW_DISPONIBLE:
+            valores = np.array(list(categorias) + [None], dtype=object)[codigos]
+            return pd.Series(pd.array(valores, dtype='string[pyarrow]'), index=serie.index, name=nombre)
+        
+        return None
@@ -1,17 +1,50 @@
+import logging
 import pandas as pd
 import numpy as np
 import io
 import re
 from datetime import datetime
 import warnings
+from utils.streaming_reader import StreamingReader
+from utils.spreadsheet_reader import SpreadsheetReader
+from utils.header_locator import HeaderLocator
+from utils.layout_registry import LayoutRegistry
+from utils.date_parser import DateParser
+from utils.amount_parser import AmountParser
+from utils.compact_storage import CompactStorage
+from utils.memory_tracker import copiar
+from utils.marker_scanner import MarkerScanner, SALDO_FINAL_BANCO, SALDO_INICIAL_BANCO, SALDO_FINAL_SISTEMA, SALDO_SISTEMA
+
+logger = logging.getLogger(__name__)
+
 warnings.filterwarnings('ignore')
 
 class DataProcessor:
     """Clase para procesar y limpiar archivos bancarios y de sistema"""
     
-    def __init__(self):
+    # Columnas del sistema donde se busca el corte de "Saldos Finales" (en orden de prioridad)
+    COLUMNAS_CORTE_SISTEMA = ['documento', 'Nro.Ref.Bco']
+    
+    # Versión de la limpieza de archivos: cambiarla invalida la caché de archivos procesados
+    VERSION = '2.0'
+    
+    def __init__(self, ventana_header=50, compacto=False, layout_registry=None):
         self.bank_keywords = ['BRO', 'BROU', 'BANCO', 'BANK']
         self.system_keywords = ['AYP', 'SISTEMA', 'SYSTEM', 'LOGICO']
+        # Los headers siempre están en las primeras filas: se buscan en una ventana acotada
+        self.header_locator = HeaderLocator(ventana=ventana_header)
+        # Layouts ya vistos (fila de header, mapeo de columnas, formatos): se comparte entre archivos
+        self.layout_registry = layout_registry or LayoutRegistry()
+        # Marcas de headers y saldos clasificadas una sola vez por celda
+        self.marker_scanner = MarkerScanner()
+        # Conversión de fechas compartida (cada fecha distinta se convierte una vez)
+        self.date_parser = DateParser()
+        # Conversión de montos con detección de separadores por columna
+        self.amount_parser = AmountParser()
+        # Modo compacto: columnas de texto como categóricas / cadenas Arrow en lugar de str
+        self.compacto = compacto
+        self.compact_storage = CompactStorage()
+        self.ultimo_header = None
     
     def read_file(self, uploaded_file):
         """Lee un archivo subido y lo convierte a DataFrame"""
@@ -31,6 +64,28 @@ class DataProcessor:
         else:
             raise ValueError(f"Formato de archivo no soportado: {uploaded_file.name}")
     
+    def process_file_streaming(self, uploaded_file, file_type='banco', chunk_size=50000):
+        """Lee y limpia un archivo por bloques, sin mantener copias completas del contenido en memoria"""
+        if uploaded_file is None:
+            raise ValueError("No se ha proporcionado ningún archivo")
+        
+        # Acepta archivos subidos o rutas (lotes de conciliación)
+        nombre = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+        if nombre.endswith(('.xls', '.xlsx')):
+            # Planillas: lectura fila por fila que se detiene en el saldo final
+            reader = SpreadsheetReader(self, chunk_size=chunk_size)
+            if file_type == 'banco':
+                return reader.read_bank_file(uploaded_file)
+            return reader.read_system_file(uploaded_file)
+        
+        if not nombre.endswith('.csv'):
+            raise ValueError(f"Formato de archivo no soportado: {nombre}")
+        
+        reader = StreamingReader(self, chunk_size=chunk_size)
+        if file_type == 'banco':
+            return reader.read_bank_csv(uploaded_file)
+        return reader.read_system_csv(uploaded_file)
+    
     def is_bank_file(self, filename):
         """Determina si un archivo es del banco basado en su nombre"""
         filename_upper = filename.upper()
@@ -57,85 +112,121 @@ class DataProcessor:
     
     def _is_scotia_file(self, df):
         """Detecta si es un archivo del banco Scotia"""
-        # Buscar patrones típicos de Scotia en las primeras filas
-        for idx in range(min(20, len(df))):
-            row_str = ' '.join(df.iloc[idx].astype(str).str.upper())
-            if 'SCOTIA' in row_str or 'FECHA REFERENCIA' in row_str:
-                return True
-        return False
+        return self.header_locator.es_scotia(df)
+    
+    def _localizar_header(self, df, tipo):
+        """Ubica el header con el plan del layout si ya es conocido, o con la detección completa"""
+        ubicacion = self.layout_registry.localizar(df, tipo, self.header_locator)
+        self.ultimo_header = ubicacion
+        return ubicacion
+    
+    def _mapear_columnas(self, df, ubicacion=None):
+        """Aplica el mapeo de columnas del layout (hoy, la corrección de codificación)"""
+        plan = ubicacion.get('plan') if ubicacion else None
+        if plan is not None:
+            return df.rename(columns=plan['mapeo']) if plan['mapeo'] else df
+        
+        mapeo = self._mapeo_codificacion(df.columns)
+        if ubicacion is not None:
+            ubicacion['mapeo'] = mapeo
+        return df.rename(columns=mapeo) if mapeo else df
+    
+    def _formato_sugerido(self, ubicacion, columna):
+        """Formato de fecha que el layout conocido usó para la columna"""
+        plan = ubicacion.get('plan') if ubicacion else None
+        return plan['formatos_fecha'].get(columna) if plan is not None else None
+    
+    def _columnas_tipo(self, df, ubicacion, rol, candidatas):
+        """Columnas de texto o montos a convertir: las del plan de tipos si el layout es conocido"""
+        plan = ubicacion.get('plan') if ubicacion else None
+        if plan is not None:
+            candidatas = plan['tipos'][rol]
+        return [col for col in candidatas if col in df.columns]
+    
+    def _convencion_sugerida(self, ubicacion, columna):
+        """Convención de separadores que el layout conocido usó para la columna de montos"""
+        plan = ubicacion.get('plan') if ubicacion else None
+        return plan['tipos']['monto'].get(columna) if plan is not None else None
+    
+    def _parsear_montos(self, df_clean, columnas, ubicacion):
+        """Convierte las columnas de montos; devuelve la convención de separadores de cada una"""
+        convenciones = {}
+        for col in columnas:
+            # Limpiar separadores y "$" según la convención detectada (o la del layout conocido)
+            df_clean[col] = self.amount_parser.parsear(df_clean[col], self._convencion_sugerida(ubicacion, col))
+            convenciones[col] = self.amount_parser.ultima_convencion
+        return convenciones
     
     def process_bank_file(self, df):
         """Procesa y limpia un archivo bancario siguiendo el método exacto del usuario"""
-        df_clean = df.copy()
-        print(f"📋 Procesando archivo banco: {len(df_clean)} filas, {len(df_clean.columns)} columnas")
-        
-        # Detectar si es archivo Scotia y aplicar procesamiento específico
-        is_scotia = self._is_scotia_bank_file(df_clean)
+        df_clean = copiar(df)
+        logger.info("📋 Procesando archivo banco: %d filas, %d columnas", len(df_clean), len(df_clean.columns))
         
+        # Detectar si es archivo Scotia (header "Dep. Origen") o BROU (fila con "Fecha" sin ":")
+        ubicacion = self._localizar_header(df_clean, 'banco')
+        is_scotia = ubicacion['layout'] == 'scotia'
         if is_scotia:
-            print("🏦 Archivo Scotia detectado - aplicando procesamiento específico")
-            # Buscar fila con "Dep. Origen" específico para Scotia
-            header_row = None
-            for idx in range(min(25, len(df_clean))):
-                row_str = ' '.join(df_clean.iloc[idx].astype(str)).upper()
-                if 'DEP. ORIGEN' in row_str and 'FECHA' in row_str:
-                    header_row = idx
-                    break
-            
-            if header_row is not None:
-                df_clean = df_clean.iloc[header_row:].reset_index(drop=True)
-                df_clean.columns = df_clean.iloc[0]
-                df_clean = df_clean.drop(df_clean.index[0]).reset_index(drop=True)
-                print(f"✅ Headers Scotia encontrados en fila {header_row}")
-        else:
-            # Método exacto del usuario: buscar fila con "Fecha" sin ":"
-            fila_fecha = df_clean.apply(lambda fila: (
-                fila.astype(str).str.contains("Fecha", case=False, na=False) & 
-                ~fila.astype(str).str.contains(":", na=False)
-            )).any(axis=1)
-            
-            if fila_fecha.any():
-                indice_fecha = fila_fecha.idxmax()
-                df_clean = df_clean.loc[indice_fecha:].reset_index(drop=True)
-                df_clean.columns = df_clean.iloc[0]
-                df_clean = df_clean.drop(df_clean.index[0]).reset_index(drop=True)
-                print(f"✅ Headers banco encontrados en fila {indice_fecha}")
+            logger.info("🏦 Archivo Scotia detectado - aplicando procesamiento específico")
+        
+        header_row = ubicacion['fila_header']
+        if header_row is not None:
+            df_clean = df_clean.iloc[header_row:].reset_index(drop=True)
+            df_clean.columns = df_clean.iloc[0]
+            df_clean = df_clean.drop(df_clean.index[0]).reset_index(drop=True)
+            if is_scotia:
+                logger.info("✅ Headers Scotia encontrados en fila %s", header_row)
+            else:
+                logger.info("✅ Headers banco encontrados en fila %s", header_row)
+        
+        # Aplicar corrección de codificación (mapeo de columnas del layout)
+        df_clean = self._mapear_columnas(df_clean, ubicacion)
         
-        # Aplicar corrección de codificación
-        df_clean = self._corregir_columnas_codificacion(df_clean)
+        # Clasificar headers/saldos de cada fila una sola vez; la limpieza corta sobre estas marcas
+        filas = self.marker_scanner.filas(self.marker_scanner.escanear(df_clean))
         
         # Eliminar filas después de "Saldo Final"
-        valores_a_dejar = ["Saldo Final", "saldo final", "Saldo final", " Saldo anterior"]
-        mask = df_clean.apply(lambda row: row.astype(str).str.strip().isin(valores_a_dejar).any(), axis=1)
-        primera_fila_saldo = mask[mask].index[0] if mask.any() else None
+        primera_fila_saldo = self.marker_scanner.primera(filas, SALDO_FINAL_BANCO)
         if primera_fila_saldo is not None:
             df_clean = df_clean.iloc[:primera_fila_saldo].reset_index(drop=True)
+            filas = filas[:primera_fila_saldo]
+        
+        return self._finalizar_archivo_banco(df_clean, filas, ubicacion)
+    
+    def _finalizar_archivo_banco(self, df_clean, filas=None, ubicacion=None):
+        """Limpieza del banco posterior al corte de "Saldo Final" (tipos, IDs, fechas)"""
+        if filas is None:
+            filas = self.marker_scanner.filas(self.marker_scanner.escanear(df_clean))
         
         # Eliminar columnas y filas completamente vacías
-        df_clean = df_clean.dropna(axis=1, how="all").dropna(how="all").reset_index(drop=True)
+        no_vacias = df_clean.notna().any(axis=1).to_numpy()
+        df_clean = df_clean.dropna(axis=1, how="all")[no_vacias].reset_index(drop=True)
+        filas = filas[no_vacias]
         
         # Eliminar filas con "saldo inicial"
-        filtro = df_clean.apply(lambda fila: fila.astype(str).str.contains(r'^saldo inicial$', case=False, regex=True)).any(axis=1)
+        filtro = (filas & SALDO_INICIAL_BANCO) != 0
         df_clean = df_clean[~filtro].reset_index(drop=True)
         
         # Procesar fechas usando método del usuario
+        formatos_fecha = {}
         if "Fecha" in df_clean.columns:
-            df_clean["Fecha"] = pd.to_datetime(df_clean["Fecha"], format="mixed", errors='coerce')
-            df_clean["Fecha"] = df_clean["Fecha"].dt.normalize()
+            df_clean["Fecha"] = self.date_parser.parsear(
+                df_clean["Fecha"], formato="mixed", formato_sugerido=self._formato_sugerido(ubicacion, "Fecha")
+            )
+            formatos_fecha["Fecha"] = self.date_parser.ultimo_formato
         
         # Convertir columnas de documento a string
         valores_str = ["Número de documento", " Concepto", "Comprobante"]
-        columnas_existentes = [col for col in valores_str if col in df_clean.columns]
-        for col in columnas_existentes:
+        columnas_texto = self._columnas_tipo(df_clean, ubicacion, 'texto', valores_str)
+        for col in columnas_texto:
             df_clean[col] = df_clean[col].astype(str)
         
         # Convertir columnas numéricas con mejor manejo de errores
         valores_num = ["Crédito", "Débito", "Saldo", "saldo"]
-        columnas_existentes = [col for col in valores_num if col in df_clean.columns]
-        for col in columnas_existentes:
-            # Limpiar valores antes de conversión
-            df_clean[col] = df_clean[col].astype(str).str.replace(',', '').str.replace('$', '').str.strip()
-            df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
+        columnas_monto = self._columnas_tipo(df_clean, ubicacion, 'monto', valores_num)
+        convenciones = self._parsear_montos(df_clean, columnas_monto, ubicacion)
+        
+        tipos = {'fecha': list(formatos_fecha), 'texto': columnas_texto, 'monto': convenciones}
+        self.layout_registry.registrar(ubicacion, tipos, formatos_fecha)
         
         # Agregar ID y rellenar NaN
         df_clean['ID_banco'] = range(1, len(df_clean) + 1)
@@ -145,40 +236,61 @@ class DataProcessor:
         # Limpiar tipos de datos para evitar errores de Arrow
         df_clean = self.clean_data_types(df_clean)
         
-        print(f"✅ Banco procesado: {len(df_clean)} filas, columnas: {list(df_clean.columns)}")
+        logger.info("✅ Banco procesado: %d filas, columnas: %s", len(df_clean), list(df_clean.columns))
         return df_clean
     
     def process_system_file(self, df):
         """Procesa y limpia un archivo del sistema siguiendo el método exacto del usuario"""
-        df_clean = df.copy()
-        print(f"📋 Procesando archivo sistema: {len(df_clean)} filas, {len(df_clean.columns)} columnas")
+        df_clean = copiar(df)
+        logger.info("📋 Procesando archivo sistema: %d filas, %d columnas", len(df_clean), len(df_clean.columns))
         
         # Método exacto del usuario: buscar fila que contiene exactamente 'Fecha' o 'fec' (sin dos puntos)
-        mask = df_clean.apply(lambda fila: fila.astype(str).str.strip().str.match(r'^(Fecha|fec)$', case=False, na=False)).any(axis=1)
+        ubicacion = self._localizar_header(df_clean, 'sistema')
+        indice_fecha = ubicacion['fila_header']
         
-        if mask.any():
-            indice_fecha = mask[mask].index[0]
-            df_clean = df_clean.loc[indice_fecha:].reset_index(drop=True)
+        if indice_fecha is not None:
+            df_clean = df_clean.iloc[indice_fecha:].reset_index(drop=True)
             df_clean.columns = df_clean.iloc[0]
             df_clean = df_clean.drop(df_clean.index[0]).reset_index(drop=True)
-            print(f"✅ Headers sistema encontrados en fila {indice_fecha}")
+            logger.info("✅ Headers sistema encontrados en fila %s", indice_fecha)
         
         # Limpiar columnas y filas vacías
         df_clean = df_clean.dropna(axis=1, how="all").dropna(how="all").reset_index(drop=True)
         
-        # Eliminar filas después de "Saldos Finales"
-        saldos_finales = ["Saldos Finales", "Saldo Final"]
-        columnas_busqueda = ['documento', 'Nro.Ref.Bco']
-        patron = '|'.join(saldos_finales)
+        # Clasificar headers/saldos de cada celda una sola vez; la limpieza corta sobre estas marcas
+        marcas = self.marker_scanner.escanear(df_clean)
         
-        for col in columnas_busqueda:
+        # Eliminar filas después de "Saldos Finales"
+        for col in self.COLUMNAS_CORTE_SISTEMA:
             if col in df_clean.columns:
-                mask = df_clean[col].astype(str).str.strip().str.contains(patron, case=False, na=False)
-                if mask.any():
-                    primera_ocurrencia = mask[mask].index[0]
+                filas = self.marker_scanner.filas(marcas, self._posiciones_columnas(df_clean, [col]))
+                primera_ocurrencia = self.marker_scanner.primera(filas, SALDO_FINAL_SISTEMA)
+                if primera_ocurrencia is not None:
                     df_clean = df_clean.iloc[:primera_ocurrencia].reset_index(drop=True)
+                    marcas = marcas[:primera_ocurrencia]
                     break
         
+        return self._finalizar_archivo_sistema(df_clean, marcas, ubicacion)
+    
+    def _mascara_saldo_final_sistema(self, serie):
+        """Marca las celdas de una columna de referencia que indican "Saldos Finales" """
+        marcas = self.marker_scanner.escanear(serie.to_frame())
+        return pd.Series((marcas[:, 0] & SALDO_FINAL_SISTEMA) != 0, index=serie.index)
+    
+    def _posiciones_columnas(self, df, columnas):
+        """Posiciones de las columnas de df cuyos nombres están en columnas"""
+        return np.flatnonzero(df.columns.isin(columnas))
+    
+    def _finalizar_archivo_sistema(self, df_clean, marcas=None, ubicacion=None):
+        """Limpieza del sistema posterior al corte de "Saldos Finales" (fechas, tipos, IDs)"""
+        if marcas is None:
+            marcas = self.marker_scanner.escanear(df_clean)
+        
+        # Las columnas de fecha y montos se convierten más abajo: sus textos de saldo dejan de existir
+        columnas_convertidas = ["fec", "Fecha", "Debe", "Haber", "Saldo", "debe", "haber", "saldo"]
+        columnas_texto = np.flatnonzero(~df_clean.columns.isin(columnas_convertidas))
+        filas_saldo = (self.marker_scanner.filas(marcas, columnas_texto) & SALDO_SISTEMA) != 0
+        
         # Limpiar formato de fechas (eliminar comillas simples)
         columnas_fecha = ['fec', 'Fecha']
         for col in columnas_fecha:
@@ -189,29 +301,34 @@ class DataProcessor:
         # Procesar fechas usando método del usuario
         columnas_fecha = ["fec", "Fecha"]
         columnas_existentes = [col for col in columnas_fecha if col in df_clean.columns]
+        formatos_fecha = {}
         for col in columnas_existentes:
             try:
-                df_clean[col] = pd.to_datetime(df_clean[col], format='mixed', errors='coerce')
-                df_clean[col] = df_clean[col].dt.normalize()
-                print(f"✅ Columna '{col}' convertida a datetime")
+                df_clean[col] = self.date_parser.parsear(
+                    df_clean[col], formato='mixed', formato_sugerido=self._formato_sugerido(ubicacion, col)
+                )
+                formatos_fecha[col] = self.date_parser.ultimo_formato
+                logger.info("✅ Columna '%s' convertida a datetime", col)
             except Exception as e:
-                print(f"❌ Error procesando columna '{col}': {e}")
+                logger.warning("❌ Error procesando columna '%s': %s", col, e)
         
         # Convertir columnas de referencia a string
         columnas_referencia = ["Nro.Ref.Bco", "documento"]
-        columnas_existentes = [col for col in columnas_referencia if col in df_clean.columns]
-        for col in columnas_existentes:
+        columnas_texto = self._columnas_tipo(df_clean, ubicacion, 'texto', columnas_referencia)
+        for col in columnas_texto:
             try:
                 df_clean[col] = df_clean[col].astype(str)
-                print(f"✅ Columna '{col}' convertida a string")
+                logger.info("✅ Columna '%s' convertida a string", col)
             except Exception as e:
-                print(f"❌ Error convirtiendo columna '{col}': {e}")
+                logger.warning("❌ Error convirtiendo columna '%s': %s", col, e)
         
         # Convertir columnas numéricas
         columnas_numericas = ["Debe", "Haber", "Saldo", "debe", "haber", "saldo"]
-        columnas_existentes = [col for col in columnas_numericas if col in df_clean.columns]
-        for col in columnas_existentes:
-            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+        columnas_monto = self._columnas_tipo(df_clean, ubicacion, 'monto', columnas_numericas)
+        convenciones = self._parsear_montos(df_clean, columnas_monto, ubicacion)
+        
+        tipos = {'fecha': list(formatos_fecha), 'texto': columnas_texto, 'monto': convenciones}
+        self.layout_registry.registrar(ubicacion, tipos, formatos_fecha)
         
         # Agregar ID
         df_clean['ID_sistema'] = range(1, len(df_clean) + 1)
@@ -221,17 +338,16 @@ class DataProcessor:
         columnas_existentes = [col for col in columnas_buscadas if col in df_clean.columns]
         if columnas_existentes:
             df_clean[columnas_existentes] = df_clean[columnas_existentes].fillna(0)
-            print(f"✅ Columnas rellenadas con 0: {columnas_existentes}")
+            logger.info("✅ Columnas rellenadas con 0: %s", columnas_existentes)
         
-        # Eliminar filas con patrones de saldo
-        patron = r'^\s*saldo\s+(?:inicial|anterior|final)\s*$'
-        mask = df_clean.apply(
-            lambda fila: fila.astype(str).str.contains(patron, case=False, regex=True)
-        ).any(axis=1)
-        if mask.any():
-            df_clean = df_clean.drop(index=mask[mask].index[0]).reset_index(drop=True)
+        # Eliminar la primera fila con patrones de saldo
+        if filas_saldo.any():
+            df_clean = df_clean.drop(index=df_clean.index[int(np.argmax(filas_saldo))]).reset_index(drop=True)
         
-        print(f"✅ Sistema procesado: {len(df_clean)} filas, columnas: {list(df_clean.columns)}")
+        if self.compacto:
+            df_clean = self.compact_storage.compactar(df_clean)
+        
+        logger.info("✅ Sistema procesado: %d filas, columnas: %s", len(df_clean), list(df_clean.columns))
         return df_clean
     
     def _fix_duplicate_columns(self, df):
@@ -270,114 +386,6 @@ class DataProcessor:
                 return idx
         return None
     
-    def _clean_bank_data(self, df):
-        """Limpia datos específicos del banco siguiendo la lógica del notebook original"""
-        
-        # Paso 1: Encontrar la fila que contiene "Fecha" (sin ":") y empezar desde ahí
-        fila_fecha = df.apply(lambda fila: (
-            fila.astype(str).str.contains("Fecha", case=False, na=False) & 
-            ~fila.astype(str).str.contains(":", na=False)
-        )).any(axis=1)
-        
-        if fila_fecha.any():
-            indice_fecha = fila_fecha.idxmax()
-            df = df.loc[indice_fecha:].reset_index(drop=True)
-            
-            # Usar primera fila como headers pero manejar duplicados
-            new_headers = []
-            used_names = set()
-            
-            for i, col_value in enumerate(df.iloc[0]):
-                # Convertir a string y limpiar
-                col_name = str(col_value).strip()
-                
-                # Si está vacío, usar posición de columna
-                if not col_name or col_name.lower() in ['nan', 'none', '']:
-                    col_name = f'Column_{i}'
-                
-                # Manejar duplicados agregando sufijo
-                original_name = col_name
-                counter = 1
-                while col_name in used_names:
-                    col_name = f"{original_name}_{counter}"
-                    counter += 1
-                
-                used_names.add(col_name)
-                new_headers.append(col_name)
-            
-            df.columns = new_headers
-            df = df.drop(df.index[0]).reset_index(drop=True)
-        
-        # Paso 2: Eliminar filas desde "Saldo Final" hacia abajo
-        valores_a_dejar = ["Saldo Final", "saldo final", "Saldo final", " Saldo anterior"]
-        mask = df.apply(lambda row: row.astype(str).str.strip().isin(valores_a_dejar).any(), axis=1)
-        primera_fila_saldo = mask[mask].index[0] if mask.any() else None
-        
-        if primera_fila_saldo is not None:
-            df = df.iloc[:primera_fila_saldo].reset_index(drop=True)
-        
-        # Paso 3: Eliminar columnas y filas completamente vacías
-        df = df.dropna(axis=1, how="all").dropna(how="all").reset_index(drop=True)
-        
-        # Paso 4: Eliminar filas que contengan "saldo inicial"
-        filtro = df.apply(lambda fila: fila.astype(str).str.contains(r'^saldo inicial$', case=False, regex=True)).any(axis=1)
-        df = df[~filtro].reset_index(drop=True)
-        
-        return df
-    
-    def _clean_system_data(self, df):
-        """Limpia datos específicos del sistema siguiendo la lógica del notebook original"""
-        
-        # Paso 1: Encontrar la fila que contiene exactamente 'Fecha' o 'fec' y reorganizar
-        mask = df.apply(lambda fila: fila.astype(str).str.strip().str.match(r'^(Fecha|fec)$', case=False, na=False)).any(axis=1)
-        
-        if mask.any():
-            indice_fecha = mask[mask].index[0]
-            df = df.loc[indice_fecha:].reset_index(drop=True)
-            
-            # Usar primera fila como headers pero manejar duplicados
-            new_headers = []
-            used_names = set()
-            
-            for i, col_value in enumerate(df.iloc[0]):
-                # Convertir a string y limpiar
-                col_name = str(col_value).strip()
-                
-                # Si está vacío, usar posición de columna
-                if not col_name or col_name.lower() in ['nan', 'none', '']:
-                    col_name = f'Column_{i}'
-                
-                # Manejar duplicados agregando sufijo
-                original_name = col_name
-                counter = 1
-                while col_name in used_names:
-                    col_name = f"{original_name}_{counter}"
-                    counter += 1
-                
-                used_names.add(col_name)
-                new_headers.append(col_name)
-            
-            df.columns = new_headers
-            df = df.drop(df.index[0]).reset_index(drop=True)
-        
-        # Paso 2: Limpiar columnas y filas vacías
-        df = df.dropna(axis=1, how="all").dropna(how="all").reset_index(drop=True)
-        
-        # Paso 3: Eliminar filas después de "Saldos Finales"
-        saldos_finales = ["Saldos Finales", "Saldo Final"]
-        columnas_busqueda = ['documento', 'Nro.Ref:Bco']
-        patron = '|'.join(saldos_finales)
-        
-        for col in columnas_busqueda:
-            if col in df.columns:
-                mask = df[col].astype(str).str.strip().str.contains(patron, case=False, na=False)
-                if mask.any():
-                    primera_ocurrencia = mask[mask].index[0]
-                    df = df.iloc[:primera_ocurrencia].reset_index(drop=True)
-                    break
-        
-        return df
-    
     def _normalize_bank_columns(self, df):
         """Normaliza los nombres de columnas del banco"""
         column_mapping = {
@@ -497,8 +505,7 @@ class DataProcessor:
                 df = df.rename(columns={date_col_found: 'Fecha'})
             
             # Formatear fecha siguiendo el notebook original - formato d/m/Y
-            df["Fecha"] = pd.to_datetime(df["Fecha"], format="%d/%m/%Y", errors='coerce', dayfirst=True)
-            df["Fecha"] = df["Fecha"].dt.normalize()
+            df["Fecha"] = self.date_parser.parsear(df["Fecha"], formato="%d/%m/%Y", dayfirst=True)
         
         # Convertir columnas específicas a string (del notebook original)
         valores_str = ["Número de documento", " Concepto", "Concepto"]
@@ -515,7 +522,7 @@ class DataProcessor:
         columnas_existentes = [col for col in valores_num if col in df.columns]
         
         for col in columnas_existentes:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = self.amount_parser.parsear(df[col])
         
         # Agregar ID y rellenar NaN en columnas numéricas (del notebook original)
         df['ID_banco'] = range(1, len(df) + 1)
@@ -526,14 +533,8 @@ class DataProcessor:
     
     def _convert_to_numeric(self, series):
         """Convierte una serie a numérica, manejando diferentes formatos"""
-        # Reemplazar comas por puntos para decimales
-        series_clean = series.astype(str).str.replace(',', '.')
-        
-        # Remover caracteres no numéricos excepto punto y signo negativo
-        series_clean = series_clean.str.replace(r'[^\d.-]', '', regex=True)
-        
-        # Convertir a numérico
-        return pd.to_numeric(series_clean, errors='coerce')
+        # La convención de separadores (1.234,56 o 1,234.56) se detecta en la columna
+        return self.amount_parser.parsear(series)
     
     def get_summary(self, df, file_type="archivo"):
         """Genera un resumen del DataFrame procesado"""
@@ -550,7 +551,7 @@ class DataProcessor:
         
         # Información de fechas
         if 'Fecha' in df.columns:
-            dates = pd.to_datetime(df['Fecha'], errors='coerce')
+            dates = self.date_parser.parsear(df['Fecha'], formato=None, normalizar=False)
             summary['fecha_desde'] = dates.min()
             summary['fecha_hasta'] = dates.max()
         
@@ -564,9 +565,21 @@ class DataProcessor:
         
         return summary
     
+    def firma(self):
+        """Identifica la versión y el modo de la limpieza (para la caché de archivos)"""
+        return f"{self.VERSION}|{'compacto' if self.compacto else 'texto'}"
+    
+    def reporte_memoria(self):
+        """Memoria por columna antes y después de la última compactación (modo compacto)"""
+        return self.compact_storage.ultimo_reporte
+    
     def clean_data_types(self, df):
         """Limpia tipos de datos mixtos para evitar errores de Arrow"""
-        df_clean = df.copy()
+        if self.compacto:
+            # Mismos valores de texto, guardados como categóricas / cadenas Arrow sin copiar el frame
+            return self.compact_storage.compactar(df, texto_vacio=True)
+        
+        df_clean = copiar(df)
         
         for col in df_clean.columns:
             if df_clean[col].dtype == 'object':
@@ -579,27 +592,18 @@ class DataProcessor:
     
     def _corregir_columnas_codificacion(self, df):
         """Corrige nombres de columnas mal codificados por problemas de encoding"""
+        mapeo = self._mapeo_codificacion(df.columns)
+        return df.rename(columns=mapeo) if mapeo else df
+    
+    def _mapeo_codificacion(self, columnas):
+        """Nombres mal codificados presentes en las columnas y su corrección"""
         column_corrections = {
             "DÃ©bito": "Débito",
             "CrÃ©dito": "Crédito",
             "DescripciÃ³n": "Descripción",
             "NÃºmero": "Número"
         }
-        
-        for old_name, new_name in column_corrections.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        return df
-    
-    def _is_scotia_bank_file(self, df):
-        """Detecta si es un archivo del banco Scotia específicamente"""
-        # Buscar patrones típicos de Scotia en las primeras filas
-        for idx in range(min(20, len(df))):
-            row_str = ' '.join(df.iloc[idx].astype(str)).upper()
-            if 'SCOTIA' in row_str or 'FECHA REFERENCIA' in row_str:
-                return True
-        return False
+        return {old_name: new_name for old_name, new_name in column_corrections.items() if old_name in columnas}
     
     def _procesar_columnas_fecha_sistema(self, df):
         """Detecta columnas de fecha ('fec' o 'Fecha') y las convierte a datetime normalizado"""
@@ -608,26 +612,25 @@ class DataProcessor:
         
         for col in columnas_existentes:
             try:
-                print(f"🔍 Procesando columna fecha '{col}' - muestra: {df[col].head(3).tolist()}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("🔍 Procesando columna fecha '%s' - muestra: %s", col, df[col].head(3).tolist())
                 
                 # Usar tu recomendación: mixed y luego normalize
-                if not pd.api.types.is_datetime64_any_dtype(df[col]):
-                    df[col] = pd.to_datetime(df[col], format='mixed', errors='coerce')
-                    df[col] = df[col].dt.normalize()
+                if not self.date_parser.ya_convertida(df[col]):
+                    df[col] = self.date_parser.parsear(df[col], formato='mixed')
                 
                 exitosos = len(df) - df[col].isna().sum()
-                print(f"✅ Columna '{col}' procesada: {exitosos}/{len(df)} fechas válidas")
+                logger.info("✅ Columna '%s' procesada: %s/%s fechas válidas", col, exitosos, len(df))
                 
             except Exception as e:
-                print(f"❌ Error procesando columna '{col}': {e}")
+                logger.warning("❌ Error procesando columna '%s': %s", col, e)
                 # Fallback si falla
                 try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                    df[col] = df[col].dt.normalize()
+                    df[col] = self.date_parser.parsear(df[col], formato=None)
                     exitosos = len(df) - df[col].isna().sum()
-                    print(f"✅ Fallback exitoso: {exitosos}/{len(df)} fechas válidas")
+                    logger.info("✅ Fallback exitoso: %s/%s fechas válidas", exitosos, len(df))
                 except:
-                    print(f"❌ Fallback también falló para '{col}'")
+                    logger.warning("❌ Fallback también falló para '%s'", col)
         
         return df
     
@@ -640,7 +643,7 @@ class DataProcessor:
             try:
                 df[col] = df[col].astype(str)
             except Exception as e:
-                print(f"Error convirtiendo columna '{col}': {e}")
+                logger.warning("Error convirtiendo columna '%s': %s", col, e)
         
         return df
     
@@ -650,7 +653,7 @@ class DataProcessor:
         columnas_existentes = [col for col in columnas_numericas if col in df.columns]
         
         for col in columnas_existentes:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            df[col] = self.amount_parser.parsear(df[col])
         
         return df
     
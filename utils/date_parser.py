@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Formatos estrictos equivalentes a format='mixed' (mes antes que día y año de 4 dígitos)
+FORMATOS_CANDIDATOS = [
+    '%m/%d/%Y',
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%m-%d-%Y',
+    '%Y/%m/%d',
+]
+
+class DateParser:
+    """Servicio compartido de conversión de fechas: cada texto distinto se convierte una sola vez
+
+    Una columna que ya es datetime64 se considera convertida (esa es su marca) y no se vuelve
+    a parsear; solo se normaliza si se pide.
+    """
+
+    TAMANO_MUESTRA = 20
+
+    def __init__(self):
+        self.ultimo_formato = None
+
+    def parsear(self, valores, formato='mixed', dayfirst=False, normalizar=True, formato_sugerido=None):
+        """Equivale a pd.to_datetime(valores, format=formato, dayfirst=dayfirst, errors='coerce')
+
+        formato puede ser 'mixed', None (formato inferido por pandas) o un formato explícito.
+        Con normalizar=True además se aplica .dt.normalize(). formato_sugerido (por ejemplo el
+        de un layout ya conocido) se prueba primero al inferir el formato estricto de 'mixed'.
+        """
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+        self.ultimo_formato = None
+
+        if self.ya_convertida(serie):
+            resultado = serie
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            # Números como fechas: se respeta la conversión original de pandas
+            resultado = pd.to_datetime(serie, format=formato, dayfirst=dayfirst, errors='coerce')
+        else:
+            resultado = self._parsear_unicos(serie, formato, dayfirst, formato_sugerido)
+
+        if normalizar:
+            resultado = resultado.dt.normalize()
+        return resultado
+
+    def ya_convertida(self, serie):
+        """Indica si la columna ya fue convertida a fechas (dtype datetime64)"""
+        return pd.api.types.is_datetime64_any_dtype(serie)
+
+    def parsear_valor(self, valor):
+        """Convierte un valor suelto (como pd.to_datetime(valor, errors='coerce'))"""
+        if isinstance(valor, pd.Timestamp):
+            return valor
+        return pd.to_datetime(valor, errors='coerce')
+
+    def _parsear_unicos(self, serie, formato, dayfirst, formato_sugerido=None):
+        """Convierte los valores únicos y los vuelve a expandir a todas las filas"""
+        codigos, unicos = pd.factorize(serie.to_numpy())
+        if len(unicos) == 0:
+            return pd.Series(np.full(len(serie), np.datetime64('NaT'), dtype='datetime64[ns]'),
+                             index=serie.index, name=serie.name)
+
+        if formato == 'mixed' and not dayfirst:
+            convertidos = self._parsear_mixto(unicos, formato_sugerido)
+        else:
+            convertidos = pd.to_datetime(unicos, format=formato, dayfirst=dayfirst, errors='coerce')
+
+        if not (isinstance(convertidos, pd.DatetimeIndex) and convertidos.tz is None):
+            # Zonas horarias u otros resultados no uniformes: conversión original fila por fila
+            return pd.to_datetime(serie, format=formato, dayfirst=dayfirst, errors='coerce')
+
+        # El código -1 (nulo) toma el último elemento agregado (NaT)
+        fechas = np.append(convertidos.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+        return pd.Series(fechas[codigos], index=serie.index, name=serie.name)
+
+    def _parsear_mixto(self, unicos, formato_sugerido=None):
+        """format='mixed' sobre valores únicos, usando un formato estricto cuando la muestra lo permite"""
+        formato = None
+        if formato_sugerido is not None:
+            formato = self.inferir_formato(unicos, [formato_sugerido])
+        if formato is None:
+            formato = self.inferir_formato(unicos)
+        if formato is None:
+            return pd.to_datetime(unicos, format='mixed', errors='coerce')
+
+        self.ultimo_formato = formato
+        convertidos = pd.to_datetime(unicos, format=formato, errors='coerce')
+        fallidos = np.flatnonzero(convertidos.isna())
+        if len(fallidos) == 0:
+            return convertidos
+
+        # Valores fuera del formato (día > 12, espacios, otros formatos): conversión flexible
+        valores = convertidos.to_numpy(dtype='datetime64[ns]').copy()
+        valores[fallidos] = pd.to_datetime(unicos[fallidos], format='mixed', errors='coerce').to_numpy(dtype='datetime64[ns]')
+        return pd.DatetimeIndex(valores)
+
+    def inferir_formato(self, unicos, candidatos=FORMATOS_CANDIDATOS):
+        """Elige el formato candidato que más valores de la muestra convierte igual que format='mixed'"""
+        muestra = [v for v in unicos[:self.TAMANO_MUESTRA] if isinstance(v, str)]
+        if not muestra:
+            return None
+        referencia = pd.to_datetime(muestra, format='mixed', errors='coerce')
+
+        mejor, mejor_aciertos = None, 0
+        for formato in candidatos:
+            convertidos = pd.to_datetime(muestra, format=formato, errors='coerce')
+            validos = convertidos.notna()
+            # Un formato que da una fecha distinta a la flexible nunca es válido
+            if (convertidos[validos] != referencia[validos]).any():
+                continue
+            aciertos = int(validos.sum())
+            if aciertos > mejor_aciertos:
+                mejor, mejor_aciertos = formato, aciertos
+        return mejor
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+class DatePartitioner:
+    """Particiones por fecha del banco, con el sistema solapado según la ventana del cruce
+
+    Cada fila del banco cae en una sola partición ([inicio, inicio + dias)); el sistema de cada
+    partición son las filas que pueden formar par con alguna de ellas, así que un par con
+    fechas válidas se genera en una sola partición. Las filas sin fecha no forman pares en los
+    cruces con ventana y no entran en ninguna partición.
+    """
+
+    def __init__(self, dias=31):
+        if dias < 1:
+            raise ValueError("Las particiones deben ser de al menos un día")
+        self.dias = dias
+
+    def particiones(self, fechas_banco, fechas_sistema, desde=None, hasta=None):
+        """Lista de (posiciones banco, posiciones sistema) de cada partición no vacía
+
+        La ventana es fecha_sistema - fecha_banco entre desde y hasta (Timedelta; None = sin
+        límite), la misma convención que IntervalJoin.pares.
+        """
+        nulo = np.iinfo(np.int64).min
+        f_banco = np.asarray(fechas_banco, dtype='datetime64[ns]').view(np.int64)
+        f_sistema = np.asarray(fechas_sistema, dtype='datetime64[ns]').view(np.int64)
+        validas_banco = f_banco != nulo
+        validas_sistema = f_sistema != nulo
+        if not validas_banco.any():
+            return []
+
+        ancho = pd.Timedelta(days=self.dias).value
+        primero = pd.Timestamp(f_banco[validas_banco].min()).normalize().value
+        numero = np.where(validas_banco, (f_banco - primero) // ancho, -1)
+
+        # Sistema ordenado por fecha: el tramo de cada partición se busca por bisección
+        orden_sistema = np.flatnonzero(validas_sistema)
+        orden_sistema = orden_sistema[np.argsort(f_sistema[orden_sistema], kind='stable')]
+        fechas_ordenadas = f_sistema[orden_sistema]
+
+        particiones = []
+        for k in np.unique(numero[validas_banco]).tolist():
+            inicio = primero + k * ancho
+            fin = inicio + ancho
+            # Banco en [inicio, fin): sistema en [inicio + desde, fin + hasta)
+            izquierda = np.searchsorted(fechas_ordenadas, inicio + pd.Timedelta(desde).value) if desde is not None else 0
+            derecha = np.searchsorted(fechas_ordenadas, fin + pd.Timedelta(hasta).value) if hasta is not None else len(fechas_ordenadas)
+            pos_sistema = np.sort(orden_sistema[izquierda:derecha])
+            particiones.append((np.flatnonzero(numero == k), pos_sistema))
+        return particiones
+
+    def ejecutar(self, funcion, particiones, max_workers=1):
+        """Aplica funcion a cada partición (en hilos si max_workers > 1); resultados en orden"""
+        if max_workers <= 1 or len(particiones) <= 1:
+            return [funcion(particion) for particion in particiones]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(particiones))) as pool:
+            return list(pool.map(funcion, particiones))
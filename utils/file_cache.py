@@ -0,0 +1,172 @@
+import os
+import hashlib
+import tempfile
+import logging
+import pandas as pd
+from utils.data_processor import DataProcessor
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401 - solo se verifica que Parquet esté disponible
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    # pyarrow está en requirements.txt: sin él la caché funciona, pero en pickle
+    PARQUET_DISPONIBLE = False
+    logger.warning("⚠️ pyarrow no está instalado: la caché de archivos se guarda en pickle")
+
+# Directorio y tamaño máximo por defecto (se pueden cambiar por variables de entorno)
+DIRECTORIO_CACHE = os.environ.get(
+    'CONCILIACION_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'conciliacion')
+)
+MAX_BYTES_CACHE = int(os.environ.get('CONCILIACION_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+class FileCache:
+    """Caché en disco de archivos ya limpiados, indexada por el SHA-256 de su contenido"""
+    
+    EXTENSIONES = {'parquet': '.parquet', 'pickle': '.pkl'}
+    BLOQUE_HASH = 1024 * 1024
+    
+    def __init__(self, directorio=None, max_bytes=None, version=None):
+        self.directorio = directorio or DIRECTORIO_CACHE
+        self.max_bytes = MAX_BYTES_CACHE if max_bytes is None else int(max_bytes)
+        # La versión del procesador invalida la caché cuando cambia la limpieza
+        self.version = version or DataProcessor.VERSION
+        os.makedirs(self.directorio, exist_ok=True)
+    
+    def clave(self, uploaded_file, file_type='banco', firma=''):
+        """Calcula la clave: SHA-256 del contenido + versión del procesador + tipo de archivo"""
+        sha = hashlib.sha256()
+        if isinstance(uploaded_file, str):
+            with open(uploaded_file, 'rb') as f:
+                for bloque in iter(lambda: f.read(self.BLOQUE_HASH), b''):
+                    sha.update(bloque)
+        else:
+            uploaded_file.seek(0)
+            for bloque in iter(lambda: uploaded_file.read(self.BLOQUE_HASH), b''):
+                sha.update(bloque)
+            uploaded_file.seek(0)
+        sha.update(f"|{self.version}|{file_type}|{firma}".encode('utf-8'))
+        return sha.hexdigest()
+    
+    def obtener(self, clave):
+        """Devuelve el DataFrame guardado para la clave, o None si no está en caché"""
+        for formato, extension in self.EXTENSIONES.items():
+            ruta = os.path.join(self.directorio, clave + extension)
+            if not os.path.exists(ruta):
+                continue
+            try:
+                if formato == 'parquet':
+                    df = pd.read_parquet(ruta)
+                else:
+                    df = pd.read_pickle(ruta)
+            except Exception as e:
+                logger.warning("⚠️ Entrada de caché ilegible, se descarta: %s", str(e))
+                self._eliminar(ruta)
+                return None
+            # Marcar como usada recientemente para el desalojo LRU (la caché es opcional)
+            try:
+                os.utime(ruta)
+            except OSError:
+                pass
+            return df
+        return None
+    
+    def guardar(self, clave, df):
+        """Guarda el DataFrame (Parquet si es posible, si no pickle) y aplica el límite de tamaño"""
+        formato = 'parquet' if self._admite_parquet(df) else 'pickle'
+        ruta = os.path.join(self.directorio, clave + self.EXTENSIONES[formato])
+        
+        # Escritura atómica: varios procesos pueden compartir el directorio
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        os.close(fd)
+        try:
+            if formato == 'parquet':
+                try:
+                    df.to_parquet(temporal, index=True)
+                except Exception:
+                    # Columnas con tipos mixtos que Parquet no representa
+                    formato = 'pickle'
+                    ruta = os.path.join(self.directorio, clave + self.EXTENSIONES[formato])
+            if formato == 'pickle':
+                df.to_pickle(temporal)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                self._eliminar(temporal)
+        
+        self.desalojar()
+        return ruta
+    
+    def cargar_o_procesar(self, uploaded_file, file_type, procesar, firma='', clave=None):
+        """Devuelve el archivo limpio desde la caché o lo procesa con procesar() y lo guarda
+
+        firma distingue variantes de la limpieza (por ejemplo el modo compacto). clave evita
+        volver a leer el contenido si quien llama ya la calculó con self.clave().
+        """
+        clave = clave or self.clave(uploaded_file, file_type, firma)
+        df = self.obtener(clave)
+        if df is not None:
+            logger.info("⚡ Archivo %s cargado desde caché (%s filas)", file_type, len(df))
+            return df
+        
+        df = procesar()
+        try:
+            self.guardar(clave, df)
+        except OSError as e:
+            # La caché es opcional: un disco lleno o sin permisos no debe frenar la carga
+            logger.warning("⚠️ No se pudo guardar en caché: %s", str(e))
+        return df
+    
+    def cargar_archivo(self, uploaded_file, file_type='banco', processor=None, clave=None):
+        """Lee y limpia un archivo (ruta o archivo subido) usando la caché"""
+        processor = processor or DataProcessor()
+        return self.cargar_o_procesar(
+            uploaded_file, file_type,
+            lambda: processor.process_file_streaming(uploaded_file, file_type),
+            firma=processor.firma(), clave=clave
+        )
+    
+    def desalojar(self):
+        """Elimina las entradas usadas hace más tiempo hasta respetar el tamaño máximo"""
+        entradas = self.entradas()
+        total = sum(tamano for _, tamano, _ in entradas)
+        for ruta, tamano, _ in sorted(entradas, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            self._eliminar(ruta)
+            total -= tamano
+        return total
+    
+    def entradas(self):
+        """Lista (ruta, bytes, último uso) de las entradas de la caché"""
+        entradas = []
+        extensiones = tuple(self.EXTENSIONES.values())
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(extensiones):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                info = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            entradas.append((ruta, info.st_size, info.st_mtime))
+        return entradas
+    
+    def limpiar(self):
+        """Vacía la caché"""
+        for ruta, _, _ in self.entradas():
+            self._eliminar(ruta)
+    
+    def _admite_parquet(self, df):
+        """Parquet requiere pyarrow y nombres de columnas de texto únicos"""
+        return (PARQUET_DISPONIBLE and df.columns.is_unique
+                and all(isinstance(col, str) for col in df.columns))
+    
+    def _eliminar(self, ruta):
+        """Elimina un archivo ignorando que otro proceso ya lo haya borrado"""
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+from utils.marker_scanner import MarkerScanner, HEADER_BANCO, HEADER_SISTEMA
+
+class HeaderLocator:
+    """Localiza la fila de headers revisando solo las primeras filas del archivo"""
+    
+    # Filas usadas para detectar Scotia y su header "Dep. Origen"
+    FILAS_SCOTIA = 20
+    FILAS_HEADER_SCOTIA = 25
+    
+    def __init__(self, ventana=50):
+        self.ventana = max(int(ventana), 1)
+        self.scanner = MarkerScanner()
+    
+    def localizar(self, df, tipo='banco'):
+        """Devuelve fila del header, layout detectado ('scotia', 'brou' o 'sistema') y tiempo
+        
+        tipo='banco' detecta Scotia/BROU, 'brou' omite la detección de Scotia y 'sistema'
+        busca el header del sistema. Si el header no está en la ventana inicial, la búsqueda
+        sigue en ventanas del doble de tamaño, por lo que el resultado es el mismo que
+        recorrer todo el archivo.
+        """
+        inicio = time.perf_counter()
+        
+        if tipo == 'banco' and self.es_scotia(df):
+            layout = 'scotia'
+            fila, escaneadas = self._buscar_header_scotia(df)
+        elif tipo in ('banco', 'brou'):
+            layout = 'brou'
+            fila, escaneadas = self._buscar_por_ventanas(df, HEADER_BANCO)
+        elif tipo == 'sistema':
+            layout = 'sistema'
+            fila, escaneadas = self._buscar_por_ventanas(df, HEADER_SISTEMA)
+        else:
+            raise ValueError(f"Tipo de archivo no soportado: {tipo}")
+        
+        return {
+            'fila_header': fila,
+            'layout': layout,
+            'filas_escaneadas': escaneadas,
+            'tiempo_ms': (time.perf_counter() - inicio) * 1000
+        }
+    
+    def es_scotia(self, df):
+        """Detecta archivos Scotia por sus primeras filas"""
+        for fila in self._unir_filas(df.iloc[:self.FILAS_SCOTIA]):
+            if 'SCOTIA' in fila or 'FECHA REFERENCIA' in fila:
+                return True
+        return False
+    
+    def mascara(self, df, bit):
+        """Marca (arreglo booleano) las filas con alguna celda que cumple el patrón del bit"""
+        return (self.scanner.filas(self.scanner.escanear(df)) & bit) != 0
+    
+    def _buscar_por_ventanas(self, df, bit):
+        """Busca la primera fila que cumple el patrón, ampliando la ventana si no aparece"""
+        inicio = 0
+        tamano = self.ventana
+        while inicio < len(df):
+            mask = self.mascara(df.iloc[inicio:inicio + tamano], bit)
+            if mask.any():
+                return inicio + int(np.argmax(mask)), inicio + len(mask)
+            inicio += len(mask)
+            tamano *= 2
+        return None, len(df)
+    
+    def _buscar_header_scotia(self, df):
+        """Busca la fila con "Dep. Origen" y "Fecha" en las primeras filas de un archivo Scotia"""
+        filas = self._unir_filas(df.iloc[:self.FILAS_HEADER_SCOTIA])
+        for idx, fila in enumerate(filas):
+            if 'DEP. ORIGEN' in fila and 'FECHA' in fila:
+                return idx, len(filas)
+        return None, len(filas)
+    
+    def _unir_filas(self, df):
+        """Une las celdas de cada fila en un texto en mayúsculas"""
+        return [' '.join(fila).upper() for fila in df.astype(str).to_numpy()]
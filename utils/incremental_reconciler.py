@@ -0,0 +1,186 @@
+import os
+import tempfile
+import logging
+import numpy as np
+import pandas as pd
+from utils.reconciliation import ReconciliationEngine
+
+logger = logging.getLogger(__name__)
+
+# Directorio por defecto del estado de cada cuenta (se puede cambiar por variable de entorno)
+DIRECTORIO_ESTADO = os.environ.get(
+    'CONCILIACION_ESTADO_DIR',
+    os.path.join(os.path.expanduser('~'), '.conciliacion', 'incremental')
+)
+
+# Columnas que no forman parte de la huella (se renumeran en cada corrida)
+COLUMNAS_SIN_HUELLA = ['ID_banco', 'ID_sistema', 'Periodo']
+
+class IncrementalReconciler:
+    """Conciliación período a período con partidas abiertas persistidas por cuenta
+    
+    El estado de la cuenta guarda las partidas sin conciliar de banco y sistema y las huellas
+    (hash del contenido de cada fila) de las ya verificadas. En cada período solo se concilian
+    las filas nuevas junto con las abiertas: las filas que ya se vieron (extractos que se
+    solapan o se vuelven a subir) se descartan por huella, y las partidas abiertas que se
+    concilian tarde se toman automáticamente. Solo se generan pares con alguna fila nueva (las
+    partidas abiertas entre sí ya se cruzaron en su período), así que un período sin filas
+    nuevas no cruza nada.
+    """
+    
+    VERSION_ESTADO = 1
+    
+    def __init__(self, cuenta, directorio=None, engine=None, tolerance_days=10):
+        self.cuenta = cuenta
+        self.directorio = directorio or DIRECTORIO_ESTADO
+        self.engine = engine or ReconciliationEngine(tolerance_days=tolerance_days)
+        os.makedirs(self.directorio, exist_ok=True)
+    
+    def ruta_estado(self):
+        """Archivo con el estado de la cuenta"""
+        nombre = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(self.cuenta))
+        return os.path.join(self.directorio, f"{nombre}.pkl")
+    
+    def conciliar(self, banco_df, sistema_df, workflow_type='workflow_1', periodo=None):
+        """Concilia las filas nuevas del período contra las partidas abiertas y actualiza el estado
+        
+        Devuelve el resultado de ReconciliationEngine.reconcile (IDs renumerados sobre partidas
+        abiertas + filas nuevas, con la columna 'Periodo' de origen) más la clave 'incremental'
+        con los conteos del período.
+        """
+        estado = self.cargar_estado()
+        if estado['workflow_type'] is not None and estado['workflow_type'] != workflow_type:
+            raise ValueError(f"El estado de la cuenta {self.cuenta} es de {estado['workflow_type']}, no de {workflow_type}")
+        periodo = periodo if periodo is not None else len(estado['periodos']) + 1
+        
+        nuevos_banco, huellas_banco = self._filas_nuevas(banco_df, 'banco', estado, periodo)
+        nuevos_sistema, huellas_sistema = self._filas_nuevas(sistema_df, 'sistema', estado, periodo)
+        logger.info("📅 Período %s de %s: %d filas nuevas de banco y %d de sistema contra %d + %d abiertas",
+                    periodo, self.cuenta, len(nuevos_banco), len(nuevos_sistema), len(estado['banco']), len(estado['sistema']))
+        
+        # Partidas abiertas primero y luego las nuevas, con IDs consecutivos para esta corrida
+        banco = self._unir(estado['banco'], nuevos_banco, 'ID_banco')
+        sistema = self._unir(estado['sistema'], nuevos_sistema, 'ID_sistema')
+        huellas_banco = np.concatenate([estado['huellas_abiertas_banco'], huellas_banco])
+        huellas_sistema = np.concatenate([estado['huellas_abiertas_sistema'], huellas_sistema])
+        
+        # Pares solo con alguna fila nueva: las abiertas entre sí ya se cruzaron antes
+        ids_nuevos = (banco['ID_banco'].to_numpy()[len(estado['banco']):], sistema['ID_sistema'].to_numpy()[len(estado['sistema']):])
+        if len(nuevos_banco) == 0 and len(nuevos_sistema) == 0:
+            logger.info("⏭️ Período %s de %s sin filas nuevas: no se cruza nada", periodo, self.cuenta)
+        resultado = self.engine.reconcile(banco, sistema, workflow_type, ids_nuevos=ids_nuevos)
+        
+        # Las filas conciliadas pasan a huellas verificadas; el resto queda abierto
+        conciliadas_banco = banco['ID_banco'].isin(resultado.pares['ID_banco']).to_numpy()
+        conciliadas_sistema = sistema['ID_sistema'].isin(resultado.pares['ID_sistema']).to_numpy()
+        abiertas_previas_banco = np.arange(len(banco)) < len(estado['banco'])
+        abiertas_previas_sistema = np.arange(len(sistema)) < len(estado['sistema'])
+        
+        estado['verificadas_banco'] = np.union1d(estado['verificadas_banco'], huellas_banco[conciliadas_banco])
+        estado['verificadas_sistema'] = np.union1d(estado['verificadas_sistema'], huellas_sistema[conciliadas_sistema])
+        estado['banco'] = banco[~conciliadas_banco].reset_index(drop=True)
+        estado['sistema'] = sistema[~conciliadas_sistema].reset_index(drop=True)
+        estado['huellas_abiertas_banco'] = huellas_banco[~conciliadas_banco]
+        estado['huellas_abiertas_sistema'] = huellas_sistema[~conciliadas_sistema]
+        estado['workflow_type'] = workflow_type
+        estado['periodos'].append(periodo)
+        self.guardar_estado(estado)
+        
+        resultado['incremental'] = {
+            'periodo': periodo,
+            'nuevas_banco': len(nuevos_banco),
+            'nuevas_sistema': len(nuevos_sistema),
+            'repetidas_banco': len(banco_df) - len(nuevos_banco),
+            'repetidas_sistema': len(sistema_df) - len(nuevos_sistema),
+            'abiertas_previas_banco': int(abiertas_previas_banco.sum()),
+            'abiertas_previas_sistema': int(abiertas_previas_sistema.sum()),
+            'conciliadas_tarde_banco': int((conciliadas_banco & abiertas_previas_banco).sum()),
+            'conciliadas_tarde_sistema': int((conciliadas_sistema & abiertas_previas_sistema).sum()),
+            'abiertas_banco': len(estado['banco']),
+            'abiertas_sistema': len(estado['sistema'])
+        }
+        logger.info("📌 Quedan abiertas %d partidas de banco y %d de sistema (%d de períodos anteriores conciliadas ahora)",
+                    len(estado['banco']), len(estado['sistema']), resultado['incremental']['conciliadas_tarde_banco'])
+        return resultado
+    
+    def partidas_abiertas(self):
+        """Partidas de banco y sistema sin conciliar al cierre del último período"""
+        estado = self.cargar_estado()
+        return estado['banco'], estado['sistema']
+    
+    def cargar_estado(self):
+        """Estado guardado de la cuenta (vacío si no hay o es de otra versión)"""
+        ruta = self.ruta_estado()
+        if os.path.exists(ruta):
+            try:
+                estado = pd.read_pickle(ruta)
+                if estado.get('version') == self.VERSION_ESTADO:
+                    return estado
+                logger.warning("⚠️ Estado de %s de otra versión, se empieza de cero", self.cuenta)
+            except Exception as e:
+                logger.warning("⚠️ Estado de %s ilegible, se empieza de cero: %s", self.cuenta, str(e))
+        vacio = np.array([], dtype=np.uint64)
+        return {
+            'version': self.VERSION_ESTADO,
+            'workflow_type': None,
+            'periodos': [],
+            'banco': pd.DataFrame(),
+            'sistema': pd.DataFrame(),
+            'huellas_abiertas_banco': vacio,
+            'huellas_abiertas_sistema': vacio,
+            'verificadas_banco': vacio,
+            'verificadas_sistema': vacio
+        }
+    
+    def guardar_estado(self, estado):
+        """Guarda el estado de la cuenta (escritura atómica)"""
+        ruta = self.ruta_estado()
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        os.close(fd)
+        try:
+            pd.to_pickle(estado, temporal)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        return ruta
+    
+    def reiniciar(self):
+        """Elimina el estado de la cuenta (el próximo período empieza de cero)"""
+        ruta = self.ruta_estado()
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    
+    def huellas(self, df):
+        """Hash del contenido de cada fila (sin IDs) más su número de aparición entre filas iguales
+        
+        Las filas idénticas dentro de un mismo archivo (dos transferencias iguales el mismo día)
+        reciben huellas distintas, y la misma fila en un extracto que se vuelve a subir, la misma.
+        """
+        if len(df) == 0:
+            return np.array([], dtype=np.uint64)
+        columnas = sorted(str(col) for col in df.columns if col not in COLUMNAS_SIN_HUELLA)
+        datos = df.rename(columns=str)[columnas]
+        # Texto normalizado: la misma fila da la misma huella con o sin modo compacto
+        texto = datos.astype(object).where(datos.notna(), '').astype(str)
+        contenido = pd.util.hash_pandas_object(texto, index=False).to_numpy()
+        aparicion = pd.Series(contenido).groupby(contenido).cumcount().to_numpy()
+        return pd.util.hash_pandas_object(
+            pd.DataFrame({'contenido': contenido, 'aparicion': aparicion}), index=False
+        ).to_numpy()
+    
+    def _filas_nuevas(self, df, tipo, estado, periodo):
+        """Filas no vistas antes (ni verificadas ni abiertas) con su período y sus huellas"""
+        huellas = self.huellas(df)
+        vistas = np.concatenate([estado[f'verificadas_{tipo}'], estado[f'huellas_abiertas_{tipo}']])
+        nuevas = ~np.isin(huellas, vistas)
+        filas = df[nuevas].copy()
+        filas['Periodo'] = periodo
+        return filas, huellas[nuevas]
+    
+    def _unir(self, abiertas, nuevas, columna_id):
+        """Partidas abiertas seguidas de las filas nuevas, con IDs 1..n"""
+        partes = [parte for parte in (abiertas, nuevas) if len(parte.columns)]
+        union = pd.concat(partes, ignore_index=True) if partes else nuevas.reset_index(drop=True)
+        union[columna_id] = range(1, len(union) + 1)
+        return union
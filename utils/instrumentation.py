@@ -0,0 +1,124 @@
+import io
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+import pandas as pd
+from utils.memory_tracker import MemoryTracker
+
+try:
+    import resource
+except ImportError:
+    # Windows: sin getrusage, el pico de memoria residente queda vacío
+    resource = None
+
+# Logger padre de los módulos de utils (cada módulo usa logging.getLogger(__name__))
+NOMBRE_LOGGER = 'utils'
+
+# Nivel por defecto de los mensajes de conciliación (se puede cambiar por variable de entorno)
+NIVEL_POR_DEFECTO = os.environ.get('CONCILIACION_LOG_LEVEL', 'WARNING')
+
+# Columnas del reporte de etapas (result['timings'])
+COLUMNAS_ETAPAS = ['etapa', 'segundos', 'filas_entrada', 'filas_salida', 'candidatos', 'pico_bytes', 'pico_rss_bytes']
+
+logger = logging.getLogger(__name__)
+
+def configurar_logging(nivel=None, stream=None):
+    """Nivel (DEBUG, INFO, WARNING...) y salida (por defecto stderr) de los mensajes de conciliación
+    
+    Por debajo del nivel los mensajes no se formatean: en WARNING (por defecto) el detalle
+    de depuración no tiene costo.
+    """
+    base = logging.getLogger(NOMBRE_LOGGER)
+    base.setLevel(nivel or NIVEL_POR_DEFECTO)
+    for handler in [h for h in base.handlers if getattr(h, 'conciliacion', False)]:
+        base.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.conciliacion = True
+    base.addHandler(handler)
+    return handler
+
+@contextmanager
+def capturar_logs(nivel=None):
+    """Captura en un StringIO los mensajes de conciliación emitidos dentro del bloque"""
+    base = logging.getLogger(NOMBRE_LOGGER)
+    salida = io.StringIO()
+    handler = logging.StreamHandler(salida)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    nivel_anterior = base.level
+    if nivel is not None:
+        base.setLevel(nivel)
+    base.addHandler(handler)
+    try:
+        yield salida
+    finally:
+        base.removeHandler(handler)
+        base.setLevel(nivel_anterior)
+
+def pico_rss():
+    """Pico de memoria residente del proceso en bytes (None si el sistema no lo informa)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa kilobytes; macOS, bytes
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+class Instrumentacion:
+    """Tiempo, filas de entrada y salida, candidatos y memoria de cada etapa de una conciliación
+    
+    Cada etapa queda como un registro (en orden de inicio; las etapas anidadas van después de
+    la que las contiene) y se informa al logger en nivel INFO. El pico de memoria de Python
+    (pico_bytes) solo se mide con un MemoryTracker activo; el pico de memoria residente del
+    proceso (pico_rss_bytes) se toma siempre al cerrar la etapa.
+    """
+    
+    def __init__(self, memory_tracker=None):
+        self.memory_tracker = memory_tracker or MemoryTracker(activo=False)
+        self.registros = []
+    
+    @contextmanager
+    def etapa(self, nombre, filas_entrada=None):
+        """Mide una etapa; el bloque puede completar filas_salida y candidatos en el registro"""
+        registro = dict.fromkeys(COLUMNAS_ETAPAS)
+        registro['etapa'] = nombre
+        registro['filas_entrada'] = filas_entrada
+        self.registros.append(registro)
+        medidas = len(self.memory_tracker.registros)
+        inicio = time.perf_counter()
+        try:
+            with self.memory_tracker.etapa(nombre):
+                yield registro
+        finally:
+            registro['segundos'] = time.perf_counter() - inicio
+            if len(self.memory_tracker.registros) > medidas:
+                registro['pico_bytes'] = self.memory_tracker.registros[-1]['pico_bytes']
+            registro['pico_rss_bytes'] = pico_rss()
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("⏱️ %s", self.describir(registro))
+    
+    def agregar(self, registros):
+        """Suma registros medidos en otra instrumentación (por ejemplo, en hilos de particiones)"""
+        self.registros.extend(registros)
+    
+    def reporte(self):
+        """Tabla de etapas: segundos, filas de entrada y salida, candidatos y picos de memoria"""
+        reporte = pd.DataFrame(self.registros, columns=COLUMNAS_ETAPAS)
+        # Conteos enteros aunque haya etapas sin dato
+        enteras = [columna for columna in COLUMNAS_ETAPAS if columna not in ('etapa', 'segundos')]
+        reporte[enteras] = reporte[enteras].astype('Int64')
+        return reporte
+    
+    def describir(self, registro):
+        """Resumen de una etapa en una línea"""
+        partes = [f"{registro['etapa']}: {registro['segundos']:.3f}s"]
+        if registro['filas_salida'] is not None:
+            partes.append(f"filas {registro['filas_entrada']} → {registro['filas_salida']}")
+        elif registro['filas_entrada'] is not None:
+            partes.append(f"filas {registro['filas_entrada']}")
+        if registro['candidatos'] is not None:
+            partes.append(f"{registro['candidatos']} candidatos")
+        if registro['pico_bytes'] is not None:
+            partes.append(f"pico {registro['pico_bytes'] / 1024 ** 2:.1f} MB")
+        return ", ".join(partes)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+class IntervalJoin:
+    """Cruce por clave con ventana de fechas: cada grupo de la clave se ordena por fecha y los
+    límites de la ventana se buscan por bisección, así que solo se generan pares válidos"""
+    
+    def codigos(self, columnas_izq, columnas_der):
+        """Códigos enteros de una clave de una o más columnas, comunes a ambos lados
+        
+        Los códigos siguen el orden de primera aparición en el lado izquierdo (el orden de los
+        grupos de un merge de pandas).
+        """
+        n_izq = len(columnas_izq[0])
+        codigos = None
+        for izq, der in zip(columnas_izq, columnas_der):
+            valores = np.concatenate([np.asarray(izq), np.asarray(der)])
+            codigos_columna, unicos = pd.factorize(valores, use_na_sentinel=False)
+            if codigos is None:
+                codigos = codigos_columna.astype(np.int64)
+            else:
+                # Empaquetar y volver a factorizar: mantiene el orden de aparición y códigos chicos
+                codigos, _ = pd.factorize(codigos * max(len(unicos), 1) + codigos_columna)
+                codigos = codigos.astype(np.int64)
+        return codigos[:n_izq], codigos[n_izq:]
+    
+    def pares(self, claves_izq, claves_der, fechas_izq=None, fechas_der=None, desde=None, hasta=None):
+        """Pares (posición izquierda, posición derecha) con la misma clave y fecha en la ventana
+        
+        La ventana es fecha_izq - fecha_der entre desde y hasta (Timedelta; None = sin límite).
+        Sin ventana se devuelven todos los pares con la misma clave. Con ventana, las fechas
+        nulas no forman pares. Los pares salen agrupados por posición izquierda.
+        """
+        claves_izq = np.asarray(claves_izq, dtype=np.int64)
+        claves_der = np.asarray(claves_der, dtype=np.int64)
+        con_ventana = desde is not None or hasta is not None
+        
+        if con_ventana:
+            nulo = np.iinfo(np.int64).min
+            f_izq = np.asarray(fechas_izq, dtype='datetime64[ns]').view(np.int64)
+            f_der = np.asarray(fechas_der, dtype='datetime64[ns]').view(np.int64)
+            validas_izq = np.flatnonzero(f_izq != nulo)
+            validas_der = np.flatnonzero(f_der != nulo)
+            f_izq = f_izq[validas_izq]
+            inferior = f_izq - pd.Timedelta(hasta).value if hasta is not None else None
+            superior = f_izq - pd.Timedelta(desde).value if desde is not None else None
+            
+            # Rangos densos de todas las fechas y límites: clave y fecha entran en un solo int64
+            valores = [f_der[validas_der]] + [limite for limite in (inferior, superior) if limite is not None]
+            fechas = np.unique(np.concatenate(valores))
+            tamano = len(fechas) + 1
+            rango_der = np.searchsorted(fechas, f_der[validas_der])
+            rango_inferior = np.searchsorted(fechas, inferior) if inferior is not None else np.zeros(len(validas_izq), dtype=np.int64)
+            rango_superior = np.searchsorted(fechas, superior) if superior is not None else np.full(len(validas_izq), tamano - 1)
+        else:
+            validas_izq = np.arange(len(claves_izq))
+            validas_der = np.arange(len(claves_der))
+            tamano = 1
+            rango_der = np.zeros(len(validas_der), dtype=np.int64)
+            rango_inferior = np.zeros(len(validas_izq), dtype=np.int64)
+            rango_superior = np.zeros(len(validas_izq), dtype=np.int64)
+        
+        compuesta_der = claves_der[validas_der] * tamano + rango_der
+        orden = np.argsort(compuesta_der, kind='stable')
+        compuesta_der = compuesta_der[orden]
+        posiciones_der = validas_der[orden]
+        
+        base_izq = claves_izq[validas_izq] * tamano
+        desde_pos = np.searchsorted(compuesta_der, base_izq + rango_inferior, side='left')
+        hasta_pos = np.searchsorted(compuesta_der, base_izq + rango_superior, side='right')
+        cantidades = np.maximum(hasta_pos - desde_pos, 0)
+        
+        total = int(cantidades.sum())
+        pos_izq = np.repeat(validas_izq, cantidades)
+        inicio_rango = np.repeat(np.cumsum(cantidades) - cantidades, cantidades)
+        pos_der = posiciones_der[np.repeat(desde_pos, cantidades) + np.arange(total) - inicio_rango]
+        return pos_izq, pos_der
+    
+    def ordenar_como_merge(self, grupos_izq, pos_izq, pos_der):
+        """Ordena los pares como un merge interno de pandas: grupo (orden de aparición), izquierda, derecha"""
+        orden = np.lexsort((pos_der, pos_izq, np.asarray(grupos_izq)[pos_izq]))
+        return pos_izq[orden], pos_der[orden]
+    
+    def posiciones_en_merge(self, grupos_izq, grupos_der, pos_izq, pos_der):
+        """Posición (índice) que cada par tendría en el merge interno completo por la clave de grupos"""
+        grupos_izq = np.asarray(grupos_izq)
+        grupos_der = np.asarray(grupos_der)
+        n_grupos = int(max(grupos_izq.max(initial=-1), grupos_der.max(initial=-1))) + 1
+        filas_izq = np.bincount(grupos_izq, minlength=n_grupos)
+        filas_der = np.bincount(grupos_der, minlength=n_grupos)
+        inicio_grupo = np.cumsum(filas_izq * filas_der) - filas_izq * filas_der
+        
+        grupo = grupos_izq[pos_izq]
+        indice = (inicio_grupo[grupo] + self._orden_en_grupo(grupos_izq)[pos_izq] * filas_der[grupo]
+                  + self._orden_en_grupo(grupos_der)[pos_der])
+        return indice
+    
+    def _orden_en_grupo(self, grupos):
+        """Número de fila de cada elemento dentro de su grupo (en orden original)"""
+        orden = np.argsort(grupos, kind='stable')
+        ordenados = grupos[orden]
+        inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]]) if len(grupos) else np.array([], dtype=np.int64)
+        tamanos = np.diff(np.r_[inicios, len(grupos)])
+        numeros = np.empty(len(grupos), dtype=np.int64)
+        numeros[orden] = np.arange(len(grupos)) - np.repeat(inicios, tamanos)
+        return numeros
@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+import json
+import hashlib
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Registro persistente por defecto (vacío: solo en memoria)
+RUTA_REGISTRO = os.environ.get('CONCILIACION_LAYOUTS')
+
+# Versión de los planes: cambiarla descarta los planes guardados con otra estructura
+VERSION_PLANES = 2
+
+class LayoutRegistry:
+    """Layouts de archivos ya vistos: huella del header -> plan de lectura
+    
+    El plan guarda la fila del header, el layout detectado, el mapeo de columnas, el plan de
+    tipos (columnas de fecha y texto, y la convención de separadores de cada columna de montos)
+    y el formato de fecha detectado. Un archivo nuevo cuya fila de header coincide con la huella
+    usa el plan directamente, sin volver a recorrer las filas ni a detectar los separadores; un
+    layout nuevo pasa por la detección completa una sola vez.
+    
+    La instancia se comparte entre sesiones (hilos): los planes se leen y modifican bajo un lock.
+    """
+    
+    def __init__(self, ruta=None):
+        self.ruta = ruta or RUTA_REGISTRO
+        self.planes = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        if self.ruta and os.path.exists(self.ruta):
+            self._cargar()
+    
+    def huella(self, tipo, encabezados):
+        """Huella del layout: tipo de archivo y textos de la fila de header"""
+        firma = '\x1f'.join([tipo] + list(encabezados))
+        return hashlib.sha1(firma.encode('utf-8')).hexdigest()[:16]
+    
+    def encabezados(self, fila):
+        """Textos de una fila de header, tal como quedan los nombres de columna"""
+        return [str(valor) for valor in fila]
+    
+    def localizar(self, df, tipo, locator):
+        """Ubicación del header (como HeaderLocator.localizar) usando los planes conocidos
+        
+        La ubicación incluye 'huella', 'plan' (o None si el layout es nuevo) y 'desde_registro'.
+        Un plan se usa si la fila de header que indica tiene exactamente sus encabezados; solo se
+        compara esa fila.
+        """
+        inicio = time.perf_counter()
+        with self._lock:
+            planes = self._planes_recientes(tipo)
+        for plan in planes:
+            fila = plan['fila_header']
+            if fila >= len(df) or self.encabezados(df.iloc[fila]) != plan['encabezados']:
+                continue
+            with self._lock:
+                self.aciertos += 1
+                plan['usos'] += 1
+            return {
+                'fila_header': fila,
+                'layout': plan['layout'],
+                'filas_escaneadas': 1,
+                'tiempo_ms': (time.perf_counter() - inicio) * 1000,
+                'huella': plan['huella'],
+                'plan': plan,
+                'desde_registro': True
+            }
+        
+        with self._lock:
+            self.fallos += 1
+        ubicacion = locator.localizar(df, tipo)
+        huella = None
+        if ubicacion['fila_header'] is not None:
+            huella = self.huella(tipo, self.encabezados(df.iloc[ubicacion['fila_header']]))
+        ubicacion['huella'] = huella
+        ubicacion['plan'] = None
+        ubicacion['desde_registro'] = False
+        if huella is not None:
+            ubicacion['encabezados'] = self.encabezados(df.iloc[ubicacion['fila_header']])
+            ubicacion['tipo'] = tipo
+        return ubicacion
+    
+    def registrar(self, ubicacion, tipos, formatos_fecha):
+        """Guarda el plan resuelto por la detección completa para un layout nuevo"""
+        if ubicacion is None or ubicacion.get('huella') is None or ubicacion.get('plan') is not None:
+            return None
+        plan = {
+            'version': VERSION_PLANES,
+            'huella': ubicacion['huella'],
+            'tipo': ubicacion['tipo'],
+            'layout': ubicacion['layout'],
+            'fila_header': int(ubicacion['fila_header']),
+            'encabezados': ubicacion['encabezados'],
+            'mapeo': dict(ubicacion.get('mapeo', {})),
+            'tipos': {
+                'fecha': list(tipos['fecha']),
+                'texto': list(tipos['texto']),
+                'monto': dict(tipos['monto'])
+            },
+            'formatos_fecha': dict(formatos_fecha),
+            'usos': 1
+        }
+        with self._lock:
+            self.planes[plan['huella']] = plan
+            if self.ruta:
+                self._guardar()
+        logger.info("🗂️ Layout %s registrado (%s)", plan['layout'], plan['huella'])
+        return plan
+    
+    def limpiar(self):
+        """Olvida todos los layouts registrados"""
+        with self._lock:
+            self.planes = {}
+            if self.ruta and os.path.exists(self.ruta):
+                os.remove(self.ruta)
+    
+    def _planes_recientes(self, tipo):
+        """Planes del tipo de archivo, los más usados primero (llamar con el lock tomado)"""
+        planes = [plan for plan in self.planes.values() if plan['tipo'] == tipo]
+        return sorted(planes, key=lambda plan: plan['usos'], reverse=True)
+    
+    def _cargar(self):
+        """Lee los planes guardados; un registro ilegible se ignora"""
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                planes = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ Registro de layouts ilegible, se ignora: %s", str(e))
+            planes = {}
+        # Los planes de otra versión se vuelven a detectar
+        self.planes = {huella: plan for huella, plan in planes.items() if plan.get('version') == VERSION_PLANES}
+    
+    def _guardar(self):
+        """Escritura atómica del registro (varios procesos pueden compartirlo; llamar con el lock tomado)"""
+        directorio = os.path.dirname(os.path.abspath(self.ruta))
+        os.makedirs(directorio, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.planes, f, ensure_ascii=False)
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            logger.warning("⚠️ No se pudo guardar el registro de layouts: %s", str(e))
+            if os.path.exists(temporal):
+                os.remove(temporal)
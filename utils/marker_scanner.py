@@ -0,0 +1,83 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Bits de marcas por celda (todas se evalúan en una sola pasada por valor único de cada columna)
+HEADER_BANCO = 1            # Contiene "Fecha" y no contiene ":" (BROU)
+HEADER_SISTEMA = 2          # Es exactamente "Fecha" o "fec" (sistema)
+SALDO_FINAL_BANCO = 4       # "Saldo Final" del banco (valor exacto sin espacios)
+SALDO_INICIAL_BANCO = 8     # "saldo inicial" del banco
+SALDO_FINAL_SISTEMA = 16    # Contiene "Saldos Finales" o "Saldo Final" (columnas de referencia)
+SALDO_SISTEMA = 32          # "saldo inicial/anterior/final" del sistema
+
+PATRON_FECHA = re.compile('fecha', re.IGNORECASE)
+PATRON_FECHA_SISTEMA = re.compile(r'^(Fecha|fec)$', re.IGNORECASE)
+PATRON_SALDO_INICIAL_BANCO = re.compile(r'^saldo inicial$', re.IGNORECASE)
+PATRON_SALDO_FINAL_SISTEMA = re.compile('Saldos Finales|Saldo Final', re.IGNORECASE)
+PATRON_SALDO_SISTEMA = re.compile(r'^\s*saldo\s+(?:inicial|anterior|final)\s*$', re.IGNORECASE)
+
+# Valores de corte del banco (se comparan después de quitar espacios, como en el método original)
+VALORES_SALDO_FINAL_BANCO = ["Saldo Final", "saldo final", "Saldo final", " Saldo anterior"]
+
+class MarkerScanner:
+    """Clasifica las celdas de un archivo con todas las marcas de header y saldos en una sola pasada"""
+    
+    def escanear(self, df):
+        """Devuelve una matriz (filas x columnas) con los bits de marcas de cada celda
+        
+        Solo se revisan columnas de texto: números y fechas nunca contienen marcas.
+        Cada columna se factoriza y los patrones se evalúan una vez por valor único.
+        """
+        marcas = np.zeros(df.shape, dtype=np.uint8)
+        for j in range(df.shape[1]):
+            serie = df.iloc[:, j]
+            if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+                continue
+            codigos, unicos = pd.factorize(serie.to_numpy())
+            if len(unicos) == 0:
+                continue
+            bits_unicos = np.fromiter((self._clasificar_valor(v) for v in unicos), dtype=np.uint8, count=len(unicos))
+            if not bits_unicos.any():
+                continue
+            # El código -1 (nulo) toma el último elemento agregado, que siempre vale 0
+            bits_unicos = np.append(bits_unicos, np.uint8(0))
+            marcas[:, j] = bits_unicos[codigos]
+        return marcas
+    
+    def filas(self, marcas, columnas=None):
+        """Une las marcas de cada fila (opcionalmente solo de algunas columnas por posición)"""
+        if columnas is not None:
+            marcas = marcas[:, columnas]
+        if marcas.shape[1] == 0:
+            return np.zeros(marcas.shape[0], dtype=np.uint8)
+        return np.bitwise_or.reduce(marcas, axis=1)
+    
+    def primera(self, filas, bit):
+        """Posición de la primera fila con el bit, o None"""
+        posiciones = np.flatnonzero(filas & bit)
+        return int(posiciones[0]) if len(posiciones) else None
+    
+    def _clasificar_valor(self, valor):
+        """Bits de marcas de un valor de celda"""
+        if not isinstance(valor, str):
+            valor = str(valor)
+        # Filtro rápido: todas las marcas contienen "fec" o "saldo"
+        plegado = valor.casefold()
+        if 'fec' not in plegado and 'saldo' not in plegado:
+            return 0
+        
+        bits = 0
+        limpio = valor.strip()
+        if PATRON_FECHA.search(valor) and ':' not in valor:
+            bits |= HEADER_BANCO
+        if PATRON_FECHA_SISTEMA.match(limpio):
+            bits |= HEADER_SISTEMA
+        if limpio in VALORES_SALDO_FINAL_BANCO:
+            bits |= SALDO_FINAL_BANCO
+        if PATRON_SALDO_INICIAL_BANCO.search(valor):
+            bits |= SALDO_INICIAL_BANCO
+        if PATRON_SALDO_FINAL_SISTEMA.search(limpio):
+            bits |= SALDO_FINAL_SISTEMA
+        if PATRON_SALDO_SISTEMA.search(valor):
+            bits |= SALDO_SISTEMA
+        return bits
@@ -0,0 +1,233 @@
+import heapq
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class MatchAssigner:
+    """Asignación uno a uno de pares candidatos (sistema, banco)
+    
+    Maximiza la cantidad de pares y, entre las asignaciones máximas, minimiza la suma de costos
+    (la diferencia de días). Los pares se separan en componentes conexas: las que forman una
+    estrella (un registro con varios candidatos que no tienen otro) se resuelven vectorizadas y
+    el resto con caminos de aumento de costo mínimo por componente.
+    """
+    
+    # Componentes más grandes se resuelven con máxima cantidad de pares pero desempate aproximado
+    MAX_ARISTAS_OPTIMO = 20000
+    
+    def __init__(self):
+        self.ultimo_reporte = {}
+    
+    def asignar(self, ids_izq, ids_der, costos):
+        """Devuelve la máscara de los pares elegidos (a igualdad de costo, el primero en el orden dado)"""
+        izq, _ = pd.factorize(np.asarray(ids_izq))
+        der, _ = pd.factorize(np.asarray(ids_der))
+        costos = np.asarray(costos, dtype=np.int64)
+        elegidas = np.zeros(len(izq), dtype=bool)
+        self.ultimo_reporte = {'aristas': len(izq), 'estrellas': 0, 'optimas': 0, 'aproximadas': 0}
+        if len(izq) == 0:
+            return elegidas
+        
+        # Estrellas: todas las aristas de un registro llegan a contrapartes sin otro candidato
+        grado_izq = np.bincount(izq)
+        grado_der = np.bincount(der)
+        hojas_der = grado_der[der] == 1
+        hojas_izq = grado_izq[izq] == 1
+        estrella_izq = np.bincount(izq, weights=~hojas_der) == 0
+        estrella_der = np.bincount(der, weights=~hojas_izq) == 0
+        en_estrella_izq = estrella_izq[izq]
+        en_estrella = en_estrella_izq | estrella_der[der]
+        
+        # En cada estrella se queda la arista de menor costo (la primera si empatan)
+        centro = np.where(en_estrella_izq, izq, len(grado_izq) + der)
+        posiciones = np.flatnonzero(en_estrella)
+        orden = posiciones[np.lexsort((posiciones, costos[posiciones], centro[posiciones]))]
+        primeras = np.r_[True, centro[orden][1:] != centro[orden][:-1]] if len(orden) else np.array([], dtype=bool)
+        elegidas[orden[primeras]] = True
+        self.ultimo_reporte['estrellas'] = int(primeras.sum())
+        
+        resto = np.flatnonzero(~en_estrella)
+        for aristas in self._componentes(izq[resto], der[resto]):
+            aristas = resto[aristas]
+            if len(aristas) > self.MAX_ARISTAS_OPTIMO:
+                elegidas[self._asignar_maximo(izq[aristas], der[aristas], costos[aristas], aristas)] = True
+                self.ultimo_reporte['aproximadas'] += 1
+            else:
+                elegidas[self._asignar_optimo(izq[aristas], der[aristas], costos[aristas], aristas)] = True
+                self.ultimo_reporte['optimas'] += 1
+        
+        if self.ultimo_reporte['aproximadas']:
+            logger.warning("⚠️ %d grupos de candidatos con más de %d pares: cantidad máxima, desempate por diferencia aproximado",
+                           self.ultimo_reporte['aproximadas'], self.MAX_ARISTAS_OPTIMO)
+        return elegidas
+    
+    def _componentes(self, izq, der):
+        """Agrupa las aristas en componentes conexas (unión-búsqueda con compresión de caminos)"""
+        desplazamiento = int(izq.max()) + 1 if len(izq) else 0
+        padre = {}
+        
+        def raiz(nodo):
+            padre.setdefault(nodo, nodo)
+            while padre[nodo] != nodo:
+                padre[nodo] = padre[padre[nodo]]
+                nodo = padre[nodo]
+            return nodo
+        
+        for a, b in zip(izq.tolist(), (der + desplazamiento).tolist()):
+            raiz_a, raiz_b = raiz(a), raiz(b)
+            if raiz_a != raiz_b:
+                padre[max(raiz_a, raiz_b)] = min(raiz_a, raiz_b)
+        
+        etiquetas = np.fromiter((raiz(a) for a in izq.tolist()), dtype=np.int64, count=len(izq))
+        orden = np.argsort(etiquetas, kind='stable')
+        cortes = np.flatnonzero(np.diff(etiquetas[orden])) + 1
+        return np.split(orden, cortes)
+    
+    def _asignar_optimo(self, izq, der, costos, aristas):
+        """Asignación máxima de costo mínimo con caminos de aumento más cortos (Dijkstra con potenciales)"""
+        # Nodos numerados en orden creciente (componentes chicas: más rápido que np.unique)
+        izq, der = izq.tolist(), der.tolist()
+        numeros_izq = {nodo: numero for numero, nodo in enumerate(sorted(set(izq)))}
+        numeros_der = {nodo: numero for numero, nodo in enumerate(sorted(set(der)))}
+        izq = [numeros_izq[nodo] for nodo in izq]
+        der = [numeros_der[nodo] for nodo in der]
+        n_izq, n_der = len(numeros_izq), len(numeros_der)
+        
+        # Mejor arista (menor costo, primera en el orden) de cada par de nodos
+        mejor = {}
+        for posicion, (u, v, costo) in enumerate(zip(izq, der, costos.tolist())):
+            actual = mejor.get((u, v))
+            if actual is None or costo < actual[0]:
+                mejor[(u, v)] = (costo, posicion)
+        adyacencia = [[] for _ in range(n_izq)]
+        for (u, v), (costo, _) in mejor.items():
+            adyacencia[u].append((v, costo))
+        
+        pareja_izq = [-1] * n_izq
+        pareja_der = [-1] * n_der
+        costo_pareja = [0] * n_izq
+        potencial_izq = [0] * n_izq
+        potencial_der = [0] * n_der
+        infinito = float('inf')
+        
+        while True:
+            dist_izq = [infinito] * n_izq
+            dist_der = [infinito] * n_der
+            previo_der = [-1] * n_der
+            cola = []
+            for u in range(n_izq):
+                if pareja_izq[u] == -1:
+                    dist_izq[u] = 0
+                    cola.append((0, 0, u))
+            heapq.heapify(cola)
+            
+            destino, distancia_destino = -1, infinito
+            while cola:
+                distancia, lado, nodo = heapq.heappop(cola)
+                if lado == 0:
+                    if distancia > dist_izq[nodo]:
+                        continue
+                    for v, costo in adyacencia[nodo]:
+                        if pareja_izq[nodo] == v:
+                            continue
+                        nueva = distancia + costo + potencial_izq[nodo] - potencial_der[v]
+                        if nueva < dist_der[v]:
+                            dist_der[v] = nueva
+                            previo_der[v] = nodo
+                            heapq.heappush(cola, (nueva, 1, v))
+                else:
+                    if distancia > dist_der[nodo]:
+                        continue
+                    u = pareja_der[nodo]
+                    if u == -1:
+                        # Primer nodo libre del banco alcanzado: camino de aumento más corto
+                        destino, distancia_destino = nodo, distancia
+                        break
+                    nueva = distancia - costo_pareja[u] + potencial_der[nodo] - potencial_izq[u]
+                    if nueva < dist_izq[u]:
+                        dist_izq[u] = nueva
+                        heapq.heappush(cola, (nueva, 0, u))
+            
+            if destino == -1:
+                break
+            
+            for u in range(n_izq):
+                potencial_izq[u] += min(dist_izq[u], distancia_destino)
+            for v in range(n_der):
+                potencial_der[v] += min(dist_der[v], distancia_destino)
+            
+            v = destino
+            while v != -1:
+                u = previo_der[v]
+                siguiente = pareja_izq[u]
+                pareja_izq[u] = v
+                pareja_der[v] = u
+                costo_pareja[u] = mejor[(u, v)][0]
+                v = siguiente
+        
+        return aristas[[mejor[(u, v)][1] for u, v in enumerate(pareja_izq) if v != -1]]
+    
+    def _asignar_maximo(self, izq, der, costos, aristas):
+        """Asignación de cardinalidad máxima para componentes muy grandes
+        
+        Parte de la asignación voraz por menor costo y la completa con caminos de aumento
+        (probando primero las aristas de menor costo); el desempate por costo no es óptimo.
+        """
+        nodos_izq, izq = np.unique(izq, return_inverse=True)
+        nodos_der, der = np.unique(der, return_inverse=True)
+        n_izq, n_der = len(nodos_izq), len(nodos_der)
+        
+        adyacencia = [[] for _ in range(n_izq)]
+        mejor = {}
+        pareja_izq = [-1] * n_izq
+        pareja_der = [-1] * n_der
+        for posicion in np.lexsort((np.arange(len(costos)), costos)).tolist():
+            u, v = int(izq[posicion]), int(der[posicion])
+            if (u, v) in mejor:
+                continue
+            mejor[(u, v)] = posicion
+            adyacencia[u].append(v)
+            if pareja_izq[u] == -1 and pareja_der[v] == -1:
+                pareja_izq[u] = v
+                pareja_der[v] = u
+        
+        aumento = True
+        while aumento:
+            aumento = False
+            visitado = bytearray(n_der)
+            punteros = [0] * n_izq
+            for raiz in range(n_izq):
+                if pareja_izq[raiz] == -1 and self._aumentar(raiz, adyacencia, pareja_izq, pareja_der, visitado, punteros):
+                    aumento = True
+        
+        return aristas[[mejor[(u, v)] for u, v in enumerate(pareja_izq) if v != -1]]
+    
+    def _aumentar(self, raiz, adyacencia, pareja_izq, pareja_der, visitado, punteros):
+        """Busca (en profundidad, sin recursión) un camino de aumento desde un nodo libre y lo aplica"""
+        pila = [raiz]
+        elegidos = []
+        while pila:
+            u = pila[-1]
+            avanzo = False
+            while punteros[u] < len(adyacencia[u]):
+                v = adyacencia[u][punteros[u]]
+                punteros[u] += 1
+                if visitado[v]:
+                    continue
+                visitado[v] = 1
+                elegidos.append(v)
+                if pareja_der[v] == -1:
+                    for nodo_izq, nodo_der in zip(pila, elegidos):
+                        pareja_izq[nodo_izq] = nodo_der
+                        pareja_der[nodo_der] = nodo_izq
+                    return True
+                pila.append(pareja_der[v])
+                avanzo = True
+                break
+            if not avanzo:
+                pila.pop()
+                if elegidos:
+                    elegidos.pop()
+        return False
@@ -0,0 +1,79 @@
+import time
+import logging
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def activar_copy_on_write(activo=True):
+    """Activa el modo copy-on-write de pandas: las copias comparten buffers hasta que se modifican
+    
+    La opción es de todo el proceso (no del hilo): se fija una vez al iniciar. Con copy-on-write
+    to_numpy() puede devolver arreglos de solo lectura, que no se deben modificar sin copiarlos.
+    """
+    pd.set_option('mode.copy_on_write', activo)
+
+def copy_on_write_activo():
+    """Indica si pandas está en modo copy-on-write"""
+    return bool(pd.get_option('mode.copy_on_write'))
+
+def copiar(df):
+    """Copia un DataFrame: superficial con copy-on-write (solo se materializan las columnas
+    que se modifican), completa en el modo clásico de pandas"""
+    return df.copy(deep=not copy_on_write_activo())
+
+class MemoryTracker:
+    """Registra el pico de memoria (bytes asignados por Python/numpy) y el tiempo de cada etapa"""
+    
+    def __init__(self, activo=True):
+        self.activo = activo
+        self.registros = []
+        self._pila = []
+    
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide una etapa; las etapas anidadas se registran por separado y cuentan en el pico de la externa"""
+        if not self.activo:
+            yield
+            return
+        
+        iniciado_aqui = not tracemalloc.is_tracing()
+        if iniciado_aqui:
+            tracemalloc.start()
+        if self._pila:
+            # Conservar el pico de la etapa externa antes de reiniciarlo
+            self._pila[-1]['pico'] = max(self._pila[-1]['pico'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        
+        actual, _ = tracemalloc.get_traced_memory()
+        marco = {'inicio_bytes': actual, 'pico': actual}
+        self._pila.append(marco)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            actual, pico = tracemalloc.get_traced_memory()
+            self._pila.pop()
+            pico = max(pico, marco['pico'])
+            if self._pila:
+                self._pila[-1]['pico'] = max(self._pila[-1]['pico'], pico)
+            self.registros.append({
+                'etapa': nombre,
+                'pico_bytes': pico - marco['inicio_bytes'],
+                'neto_bytes': actual - marco['inicio_bytes'],
+                'segundos': segundos,
+            })
+            if iniciado_aqui:
+                tracemalloc.stop()
+    
+    def reporte(self):
+        """Tabla de etapas con pico y variación neta de memoria (bytes) y tiempo"""
+        return pd.DataFrame(self.registros, columns=['etapa', 'pico_bytes', 'neto_bytes', 'segundos'])
+    
+    def imprimir(self):
+        """Registra en el log (INFO) el reporte de memoria por etapa"""
+        for registro in self.registros:
+            logger.info("💾 %s: pico %.1f MB, neto %.1f MB, %.2fs", registro['etapa'], registro['pico_bytes'] / 1024 ** 2,
+                        registro['neto_bytes'] / 1024 ** 2, registro['segundos'])
@@ -2,64 +2,272 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import re
+import time
+import copy
+import logging
+from utils.date_parser import DateParser
+from utils.amount_parser import AmountParser
+from utils.memory_tracker import MemoryTracker, copiar
+from utils.interval_join import IntervalJoin
+from utils.match_assigner import MatchAssigner
+from utils.candidate_scorer import CandidateScorer
+from utils.date_partitioner import DatePartitioner
+from utils.instrumentation import Instrumentacion
+from utils.reconciliation_result import ReconciliationResult, VISTAS
+
+# Cruce de candidatos de cada workflow
+JOIN_INTERVALO = 'intervalo'    # Clave y ventana de fechas resueltas en el cruce (solo pares válidos)
+JOIN_COMPUESTA = 'compuesta'    # Workflow 1: clave (cola de 3 dígitos, monto entero), fechas después
+JOIN_COLA = 'cola'              # Workflow 1 original: muchos a muchos por cola de 3 dígitos
+JOIN_MERGE = 'merge'            # Workflow 2 original: merge por montos enteros, fechas después
+
+# Resolución de pares en conflicto (un registro con varios candidatos)
+ASIGNACION_OPTIMA = 'optima'    # Máxima cantidad de pares; a igualdad, menor diferencia de fechas
+ASIGNACION_PRIMERA = 'primera'  # Método original: drop_duplicates(keep='first') por sistema y banco
+
+# Pasadas de la cascada del Workflow 1 (de la más estricta a la más laxa)
+PASADA_DOCUMENTO = 'documento'  # Documento completo igual y monto entero igual
+PASADA_MISMO_DIA = 'mismo_dia'  # Misma fecha y monto entero igual
+PASADA_COLA = 'cola'            # Cola de 3 dígitos, monto entero igual y fecha sistema 0 a +tolerancia días
+PASADA_MONTO = 'monto'          # Solo monto entero igual, fechas a +-tolerancia días
+CASCADA_WORKFLOW1 = [PASADA_DOCUMENTO, PASADA_MISMO_DIA, PASADA_COLA, PASADA_MONTO]
+
+# Columnas auxiliares del cruce del Workflow 1 que no quedan en las verificadas
+COLUMNAS_TEMPORALES_WORKFLOW1 = ['tail', 'dif_dias', 'Monto_entero', 'Monto_Neto_entero']
+
+# Columnas de los datos preparados que usan las estadísticas
+COLUMNAS_ESTADISTICAS = ['Débito', 'Crédito', 'Monto_Neto', 'Monto_Banco', 'debe', 'haber', 'Debe', 'Haber',
+                         'Monto', 'Monto_Sistema', 'Diferencia_Monto', 'ID_sistema', 'Match_Type']
+
+logger = logging.getLogger(__name__)
 
 class ReconciliationEngine:
     """Motor de conciliación bancaria"""
     
-    def __init__(self, tolerance_days=10):
+    def __init__(self, tolerance_days=10, memory_tracker=None, join_workflow1=JOIN_INTERVALO,
+                 join_workflow2=JOIN_INTERVALO, asignacion=ASIGNACION_OPTIMA, cascada=None, candidate_cache=None,
+                 particion_dias=None, workers_particion=1):
         self.tolerance_days = tolerance_days
         self.quality_metrics = {}
         self.workflow_type = 'workflow_1'  # Default
+        # Conversión de fechas compartida: columnas ya convertidas (datetime64) no se vuelven a parsear
+        self.date_parser = DateParser()
+        # Montos: mismo conversor que DataProcessor, con partes enteras int64 para comparar
+        self.amount_parser = AmountParser()
+        # Pico de memoria por etapa (inactivo salvo que se pase un MemoryTracker)
+        self.memory_tracker = memory_tracker or MemoryTracker(activo=False)
+        # Tiempo, filas, candidatos y memoria por etapa de la última conciliación (result['timings'])
+        self.instrumentacion = Instrumentacion(self.memory_tracker)
+        # Cruce de cada workflow y sus métricas (método, candidatos generados, segundos)
+        self.join_workflow1 = join_workflow1
+        self.join_workflow2 = join_workflow2
+        self.join_metrics = {}
+        # Asignación uno a uno de los pares verificados
+        self.asignacion = asignacion
+        self.match_assigner = MatchAssigner()
+        # Pasadas del Workflow 1 (None = solo cola + monto); cada match registra su pasada
+        self.cascada = list(cascada) if cascada else None
+        # Reglas de matching en bloque sobre los últimos datos puntuados
+        self._scorer_actual = None
+        self._scorer_clave = None
+        # Datos preparados y pares candidatos reutilizables entre conciliaciones (CandidateCache)
+        self.candidate_cache = candidate_cache
+        self._entrada_cache = None
+        # Candidatos por particiones de fechas del banco (None = sin particionar), en hilos opcionales
+        self.particion_dias = particion_dias
+        self.workers_particion = workers_particion
+        if particion_dias and self.cascada:
+            # Cada pasada asigna sobre todo lo que quedó libre: la cascada no se puede particionar
+            logger.warning("⚠️ La cascada del Workflow 1 no se particiona: particion_dias solo se aplica al Workflow 2")
+        # IDs (banco, sistema) de las filas nuevas de la conciliación en curso (None = todas cuentan)
+        self._ids_nuevos = None
         # Solo comparación exacta de enteros para montos
-        
-    def reconcile(self, banco_df, sistema_df, workflow_type='workflow_1'):
-        """Realiza la conciliación entre archivos bancarios y de sistema"""
+    
+    def reconcile(self, banco_df, sistema_df, workflow_type='workflow_1', ids_nuevos=None):
+        """Realiza la conciliación entre archivos bancarios y de sistema
+        
+        Devuelve un ReconciliationResult (mismas claves que un dict) cuyas vistas 'matched',
+        'unmatched_banco' y 'unmatched_sistema' se arman al leerlas. Con ids_nuevos=(IDs de
+        banco, IDs de sistema) solo se generan pares con al menos una fila nueva: el banco nuevo
+        contra todo el sistema y el resto del banco contra el sistema nuevo (conciliación
+        incremental; los pares entre filas ya cruzadas antes no se vuelven a generar).
+        """
         self.workflow_type = workflow_type
+        self._ids_nuevos = None if ids_nuevos is None else (np.asarray(ids_nuevos[0]), np.asarray(ids_nuevos[1]))
+        self.instrumentacion = Instrumentacion(self.memory_tracker)
         
-        print(f"🔍 Iniciando conciliación - {workflow_type}:")
-        print(f"   Banco: {len(banco_df)} filas, columnas: {list(banco_df.columns)}")
-        print(f"   Sistema: {len(sistema_df)} filas, columnas: {list(sistema_df.columns)}")
-        
-        # ANÁLISIS DE CALIDAD DE DATOS
-        print("🔍 Analizando calidad de datos...")
-        quality_report = self._analyze_data_quality(banco_df, sistema_df)
-        
-        # Preparar datos según el workflow
-        banco_clean = self._prepare_bank_data(banco_df.copy())
-        sistema_clean = self._prepare_system_data(sistema_df.copy())
+        logger.info("🔍 Iniciando conciliación - %s: banco %d filas, sistema %d filas", workflow_type, len(banco_df), len(sistema_df))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("   Columnas banco: %s", list(banco_df.columns))
+            logger.debug("   Columnas sistema: %s", list(sistema_df.columns))
         
-        print(f"📊 Datos preparados:")
-        print(f"   Banco: {len(banco_clean)} filas")
-        print(f"   Sistema: {len(sistema_clean)} filas")
+        quality_report, banco_clean, sistema_clean = self._datos_preparados(banco_df, sistema_df)
         
         # Verificar montos de ejemplo
-        if len(banco_clean) > 0:
-            print(f"   Ejemplo banco - Monto_Neto: {banco_clean.iloc[0].get('Monto_Neto', 'N/A')}")
-        if len(sistema_clean) > 0:
-            print(f"   Ejemplo sistema - Monto: {sistema_clean.iloc[0].get('Monto', 'N/A')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            if len(banco_clean) > 0:
+                logger.debug("   Ejemplo banco - Monto_Neto: %s", banco_clean.iloc[0].get('Monto_Neto', 'N/A'))
+            if len(sistema_clean) > 0:
+                logger.debug("   Ejemplo sistema - Monto: %s", sistema_clean.iloc[0].get('Monto', 'N/A'))
         
         # Realizar matching
-        matched, unmatched_banco, unmatched_sistema = self._perform_matching(
-            banco_clean, sistema_clean
-        )
-        
-        print(f"✅ Resultado conciliación:")
-        print(f"   Matches: {len(matched)}")
-        print(f"   Sin conciliar banco: {len(unmatched_banco)}")
-        print(f"   Sin conciliar sistema: {len(unmatched_sistema)}")
-        
-        # Generar estadísticas
-        stats = self._generate_statistics(matched, unmatched_banco, unmatched_sistema)
-        
-        return {
-            'matched': matched,
-            'unmatched_banco': unmatched_banco,
-            'unmatched_sistema': unmatched_sistema,
+        with self.instrumentacion.etapa('matching', len(banco_clean) + len(sistema_clean)) as etapa:
+            matched, unmatched_banco, unmatched_sistema = self._perform_matching(
+                banco_clean, sistema_clean
+            )
+            etapa['filas_salida'] = len(matched)
+            etapa['candidatos'] = self.join_metrics.get('candidatos')
+        
+        logger.info("✅ Resultado conciliación: %d matches, sin conciliar %d banco y %d sistema",
+                    len(matched), len(unmatched_banco), len(unmatched_sistema))
+        
+        # Generar estadísticas sobre los datos preparados y los pares
+        pares = self._pares_resultado(matched)
+        with self.instrumentacion.etapa('estadisticas', len(banco_clean) + len(sistema_clean)):
+            stats = self._generate_statistics(banco_clean, sistema_clean, pares)
+        
+        # Resultado liviano: datos preparados una vez y pares conciliados; las vistas se arman al leerlas
+        valores = {
             'banco_data': banco_clean,
             'sistema_data': sistema_clean,
             'statistics': stats,
-            'workflow_type': workflow_type
+            'workflow_type': workflow_type,
+            'timings': self.instrumentacion.reporte()
         }
+        if banco_clean['ID_banco'].is_unique and sistema_clean['ID_sistema'].is_unique:
+            motor = ReconciliationEngine()
+            motor.workflow_type = workflow_type
+            return ReconciliationResult(valores, pares, motor)
+        # Con IDs repetidos un par no identifica sus filas: las vistas se guardan ya armadas
+        logger.warning("⚠️ IDs repetidos: el resultado guarda las vistas completas")
+        valores.update({'matched': matched, 'unmatched_banco': unmatched_banco, 'unmatched_sistema': unmatched_sistema})
+        return ReconciliationResult(valores, pares)
+    
+    def vista_resultado(self, clave, banco_data, sistema_data, pares):
+        """Arma 'matched', 'unmatched_banco' o 'unmatched_sistema' desde los datos preparados y los pares
+        
+        Mismas filas, columnas, orden e índice que las devueltas por _perform_matching.
+        """
+        if clave not in VISTAS:
+            raise KeyError(clave)
+        if self.workflow_type == 'workflow_2':
+            # Las vistas del Workflow 2 salen de las copias con montos enteros y fec convertida
+            banco_data, sistema_data = self._datos_workflow2(banco_data, sistema_data)
+        
+        if clave == 'unmatched_banco':
+            sin_conciliar = banco_data[~banco_data['ID_banco'].isin(pares['ID_banco'])]
+        elif clave == 'unmatched_sistema':
+            sin_conciliar = sistema_data[~sistema_data['ID_sistema'].isin(pares['ID_sistema'])]
+        if clave != 'matched':
+            return copiar(sin_conciliar) if self.workflow_type == 'workflow_2' else sin_conciliar
+        
+        if len(pares) == 0:
+            return pd.DataFrame()
+        pos_sis, pos_bco = self._posiciones_pares(pares, banco_data, sistema_data)
+        if self.workflow_type == 'workflow_2':
+            return self._armar_pares_workflow2(sistema_data, banco_data, pos_sis, pos_bco, pares.index)
+        
+        matched = self._armar_pares_workflow1(sistema_data, banco_data, pos_sis, pos_bco)
+        if pares['pasada'].notna().any():
+            matched['pasada'] = pares['pasada'].to_numpy()
+        return matched.drop(columns=COLUMNAS_TEMPORALES_WORKFLOW1, errors='ignore')
+    
+    def _pares_resultado(self, matched):
+        """IDs, pasada y diferencia de días de los pares conciliados (con el índice de matched)"""
+        if matched.empty:
+            return pd.DataFrame({'ID_banco': [], 'ID_sistema': [], 'pasada': [], 'dif_dias': []})
+        if self.workflow_type == 'workflow_2':
+            dif_dias = (matched['fec'] - matched['Fecha']).dt.days
+        else:
+            dif_dias = (matched['Fecha_sistema'] - matched['Fecha_banco']).dt.days
+        return pd.DataFrame({
+            'ID_banco': matched['ID_banco'].to_numpy(),
+            'ID_sistema': matched['ID_sistema'].to_numpy(),
+            'pasada': matched['pasada'].to_numpy() if 'pasada' in matched.columns else None,
+            'dif_dias': dif_dias.to_numpy()
+        }, index=matched.index)
+    
+    def barrido_tolerancia(self, banco_df, sistema_df, workflow_type='workflow_1', tolerancias=None):
+        """Verificadas y sin conciliar para cada tolerancia (en días), sin repetir la conciliación
+        
+        Los pares candidatos se generan una sola vez con la tolerancia mayor; para cada tolerancia
+        se cuentan los candidatos con el histograma acumulado de dif_dias y se repite solo la
+        asignación uno a uno sobre los IDs. Devuelve un DataFrame con una fila por tolerancia.
+        """
+        tolerancias = sorted(set(range(0, 16) if tolerancias is None else tolerancias))
+        self.workflow_type = workflow_type
+        self._ids_nuevos = None
+        _, banco_clean, sistema_clean = self._datos_preparados(banco_df, sistema_df)
+        total_banco, total_sistema = len(banco_clean), len(sistema_clean)
+        
+        filas = []
+        if workflow_type == 'workflow_2':
+            # La ventana del Workflow 2 es fija (3 días): la curva es plana
+            matched, _, _ = self._perform_workflow2_matching(banco_clean, sistema_clean)
+            conteos = [(self.join_metrics.get('candidatos', 0), len(matched))] * len(tolerancias)
+        elif self.cascada:
+            # Cada pasada depende de lo conciliado antes: se repite el matching por tolerancia
+            tolerancia_original = self.tolerance_days
+            conteos = []
+            try:
+                for tolerancia in tolerancias:
+                    self.tolerance_days = tolerancia
+                    matched, _, _ = self._perform_workflow1_matching(banco_clean, sistema_clean)
+                    conteos.append((self.join_metrics.get('candidatos', 0), len(matched)))
+            finally:
+                self.tolerance_days = tolerancia_original
+        else:
+            pares = self._pares_workflow1(banco_clean, sistema_clean, max(tolerancias))
+            if pares is None or pares.empty:
+                conteos = [(0, 0)] * len(tolerancias)
+            else:
+                dif_dias = pares['dif_dias'].to_numpy(dtype=np.int64)
+                acumulados = np.cumsum(np.bincount(dif_dias, minlength=max(tolerancias) + 1))
+                ids = pares[['ID_sistema', 'ID_banco']]
+                conteos = []
+                for tolerancia in tolerancias:
+                    en_ventana = dif_dias <= tolerancia
+                    asignados = self._asignar_uno_a_uno(ids[en_ventana], dif_dias[en_ventana])
+                    conteos.append((int(acumulados[tolerancia]), len(asignados)))
+        
+        for tolerancia, (candidatos, verificadas) in zip(tolerancias, conteos):
+            filas.append({
+                'tolerancia': tolerancia,
+                'candidatos': candidatos,
+                'verificadas': verificadas,
+                'sin_conciliar_banco': total_banco - verificadas,
+                'sin_conciliar_sistema': total_sistema - verificadas,
+                'porcentaje_conciliacion': verificadas / max(total_banco, 1) * 100
+            })
+        return pd.DataFrame(filas)
+    
+    def _datos_preparados(self, banco_df, sistema_df):
+        """Calidad y datos preparados de la entrada (con caché, los mismos datos se preparan una vez)"""
+        self._entrada_cache = None
+        if self.candidate_cache is not None:
+            self._entrada_cache = self.candidate_cache.entrada(banco_df, sistema_df, self.workflow_type)
+        
+        if self._entrada_cache is not None and self._entrada_cache['preparados'] is not None:
+            logger.info("♻️ Calidad y preparación reutilizadas de la caché")
+            quality_report, banco_clean, sistema_clean = self._entrada_cache['preparados']
+            self.quality_metrics = quality_report
+            return quality_report, banco_clean, sistema_clean
+        
+        # ANÁLISIS DE CALIDAD DE DATOS
+        filas = len(banco_df) + len(sistema_df)
+        with self.instrumentacion.etapa('calidad', filas) as etapa:
+            quality_report = self._analyze_data_quality(banco_df, sistema_df)
+            etapa['filas_salida'] = filas
+        
+        # Preparar datos según el workflow
+        with self.instrumentacion.etapa('preparacion', filas) as etapa:
+            banco_clean = self._prepare_bank_data(copiar(banco_df))
+            sistema_clean = self._prepare_system_data(copiar(sistema_df))
+            etapa['filas_salida'] = len(banco_clean) + len(sistema_clean)
+        
+        if self._entrada_cache is not None:
+            self._entrada_cache['preparados'] = (quality_report, banco_clean, sistema_clean)
+        return quality_report, banco_clean, sistema_clean
     
     def _prepare_bank_data(self, df):
         """Prepara datos bancarios para conciliación"""
@@ -81,7 +289,7 @@ class ReconciliationEngine:
         
         # Normalizar fechas para banco
         if 'Fecha' in df.columns:
-            df['Fecha_Banco'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.normalize()
+            df['Fecha_Banco'] = self.date_parser.parsear(df['Fecha'], formato=None)
         
         # Para archivos Scotia, el documento está en 'Comprobante'
         if 'Comprobante' in df.columns and 'Número de documento' not in df.columns:
@@ -106,8 +314,8 @@ class ReconciliationEngine:
         if 'Monto' not in df.columns:
             if 'Debe' in df.columns and 'Haber' in df.columns:
                 # Para sistema: primero convertir a numérico
-                df['Debe'] = pd.to_numeric(df['Debe'], errors='coerce').fillna(0)
-                df['Haber'] = pd.to_numeric(df['Haber'], errors='coerce').fillna(0)
+                df['Debe'] = self.amount_parser.parsear(df['Debe']).fillna(0)
+                df['Haber'] = self.amount_parser.parsear(df['Haber']).fillna(0)
                 # Para sistema: usar valores absolutos directamente (no restar)
                 df['Monto'] = df['Debe'] + df['Haber']  # Sumar ambos para obtener monto total
                 # Si ambos están vacíos, usar el que tenga valor
@@ -117,8 +325,8 @@ class ReconciliationEngine:
                 df.loc[~mask_debe & mask_haber, 'Monto'] = df.loc[~mask_debe & mask_haber, 'Haber']
             elif 'debe' in df.columns and 'haber' in df.columns:
                 # Workflow 2: debe/haber en minúsculas
-                df['debe'] = pd.to_numeric(df['debe'], errors='coerce').fillna(0)
-                df['haber'] = pd.to_numeric(df['haber'], errors='coerce').fillna(0)
+                df['debe'] = self.amount_parser.parsear(df['debe']).fillna(0)
+                df['haber'] = self.amount_parser.parsear(df['haber']).fillna(0)
                 df['Monto'] = df['haber'].fillna(0) - df['debe'].fillna(0)
             elif 'Monto_Neto' in df.columns:
                 df['Monto'] = df['Monto_Neto']
@@ -127,14 +335,14 @@ class ReconciliationEngine:
         
         # Normalizar fechas según el workflow
         if self.workflow_type == 'workflow_2' and 'fec' in df.columns:
-            df['Fecha_Sistema'] = pd.to_datetime(df['fec'], errors='coerce').dt.normalize()
+            df['Fecha_Sistema'] = self.date_parser.parsear(df['fec'], formato=None)
         elif self.workflow_type == 'workflow_1' and 'Fecha' in df.columns:
             # Para Workflow 1 (cuentas 4103, 4355, 10377): usar columna 'Fecha'
-            df['Fecha_Sistema'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.normalize()
+            df['Fecha_Sistema'] = self.date_parser.parsear(df['Fecha'], formato=None)
         elif 'Fecha' in df.columns:
-            df['Fecha_Sistema'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.normalize()
+            df['Fecha_Sistema'] = self.date_parser.parsear(df['Fecha'], formato=None)
         elif 'fec' in df.columns:
-            df['Fecha_Sistema'] = pd.to_datetime(df['fec'], errors='coerce').dt.normalize()
+            df['Fecha_Sistema'] = self.date_parser.parsear(df['fec'], formato=None)
         
         df['Matched'] = False
         df['Match_ID'] = None
@@ -150,16 +358,79 @@ class ReconciliationEngine:
     
     def _perform_workflow1_matching(self, banco_df, sistema_df):
         """Matching para Workflow 1 usando tail matching (últimos 3 dígitos) + tolerancia de fechas como en notebook"""
-        print("🔄 Ejecutando Workflow 1 con tail matching")
+        logger.info("🔄 Ejecutando Workflow 1 con tail matching")
         
-        # Copias seguras
-        bco = banco_df.copy()
-        sis = sistema_df.copy()
+        verificadas = self._pares_workflow1(banco_df, sistema_df, self.tolerance_days)
+        
+        if verificadas is None:
+            return pd.DataFrame(), banco_df, sistema_df
         
-        # Función para obtener los últimos 3 dígitos como en tu notebook
-        def cola_3(s):
-            s = s.fillna('').astype(str).str.strip()
-            return s.str[-3:].str.zfill(3)  # '7' -> '007'
+        if verificadas.empty:
+            logger.info("⚠️ No se encontraron registros dentro de la tolerancia de fechas Y montos exactos")
+            return pd.DataFrame(), banco_df, sistema_df
+        
+        # Asignación uno a uno: máxima cantidad de pares y, a igualdad, menor diferencia de días
+        # (la cascada ya asigna dentro de cada pasada)
+        if not self.cascada:
+            verificadas = self._asignar_uno_a_uno(verificadas, verificadas['dif_dias'].to_numpy())
+        
+        # Limpiar columnas temporales
+        verificadas = verificadas.drop(columns=COLUMNAS_TEMPORALES_WORKFLOW1, errors='ignore')
+        verificadas = verificadas.reset_index(drop=True)
+        
+        # Calcular no coincidentes
+        matched_sistema_ids = verificadas['ID_sistema'].unique()
+        unmatched_sistema = sistema_df[~sistema_df['ID_sistema'].isin(matched_sistema_ids)]
+        
+        matched_banco_ids = verificadas['ID_banco'].unique()
+        unmatched_banco = banco_df[~banco_df['ID_banco'].isin(matched_banco_ids)]
+        
+        logger.info("🎯 Workflow 1 completado: %d registros verificados", len(verificadas))
+        return verificadas, unmatched_banco, unmatched_sistema
+    
+    def _pares_workflow1(self, banco_df, sistema_df, tolerancia):
+        """Pares verificados del Workflow 1 con dif_dias hasta la tolerancia, antes de la asignación
+        
+        Con caché, pares ya generados con una tolerancia igual o mayor solo se vuelven a filtrar.
+        """
+        clave_cache = ('workflow_1', self.join_workflow1)
+        con_cache = self._entrada_cache is not None and not self.cascada and self._ids_nuevos is None
+        guardados = self.candidate_cache.candidatos(self._entrada_cache, clave_cache, tolerancia) if con_cache else None
+        
+        inicio = time.perf_counter()
+        self.join_metrics = {}
+        with self.instrumentacion.etapa('cruce', len(banco_df) + len(sistema_df)) as etapa:
+            if guardados is not None:
+                verificadas = guardados['verificadas']
+                self.join_metrics = dict(guardados['metricas'], desde_cache=True)
+                generada = guardados['tolerancia']
+            else:
+                # Con caché los pares se generan con la tolerancia máxima para reutilizarlos
+                generada = max(tolerancia, self.candidate_cache.tolerancia) if con_cache else tolerancia
+                if self._ids_nuevos is not None and not self.cascada:
+                    verificadas = self._workflow1_con_nuevas(banco_df, sistema_df, generada)
+                elif self.particion_dias and not self.cascada:
+                    verificadas = self._workflow1_particionado(banco_df, sistema_df, generada)
+                else:
+                    verificadas = self._candidatos_workflow1(banco_df, sistema_df, generada)
+                if con_cache and verificadas is not None:
+                    self.candidate_cache.guardar_candidatos(
+                        self._entrada_cache, clave_cache, {'verificadas': verificadas, 'metricas': dict(self.join_metrics)}, generada
+                    )
+            if generada != tolerancia and verificadas is not None:
+                verificadas = verificadas[verificadas['dif_dias'] <= tolerancia].reset_index(drop=True)
+            etapa['candidatos'] = self.join_metrics.get('candidatos')
+            etapa['filas_salida'] = len(verificadas) if verificadas is not None else 0
+        self.join_metrics['segundos'] = time.perf_counter() - inicio
+        if 'metodo' in self.join_metrics:
+            logger.info("⏱️ Cruce %s: %d candidatos en %.3fs", self.join_metrics['metodo'], self.join_metrics['candidatos'], self.join_metrics['segundos'])
+        return verificadas
+    
+    def _candidatos_workflow1(self, banco_df, sistema_df, tolerancia):
+        """Pares verificados del Workflow 1 antes de la asignación uno a uno (None si no hay cruce posible)"""
+        # Copias seguras
+        bco = copiar(banco_df)
+        sis = copiar(sistema_df)
         
         # Preparar colas de 3 dígitos para el banco (usar Numero_Documento)
         doc_col_banco = None
@@ -169,18 +440,230 @@ class ReconciliationEngine:
                 break
         
         if not doc_col_banco:
-            print("⚠️ No se encontró columna de número de documento en banco")
-            return pd.DataFrame(), banco_df, sistema_df
-            
-        bco['tail'] = cola_3(bco[doc_col_banco])
+            logger.warning("⚠️ No se encontró columna de número de documento en banco")
+            return None
+        
+        bco['tail'] = self._cola_3(bco[doc_col_banco])
         
         # Preparar colas de 3 dígitos para el sistema (usar Nro.Ref.Bco)
         if 'Nro.Ref.Bco' not in sis.columns:
-            print("⚠️ No se encontró columna Nro.Ref.Bco en sistema")
-            return pd.DataFrame(), banco_df, sistema_df
+            logger.warning("⚠️ No se encontró columna Nro.Ref.Bco en sistema")
+            return None
+        
+        sis['tail'] = self._cola_3(sis['Nro.Ref.Bco'])
+        
+        # Partes enteras de los montos (sin decimales) calculadas una vez por fila antes del merge
+        sis['Monto_entero'] = self.amount_parser.parte_entera(sis['Monto'])
+        bco['Monto_Neto_entero'] = self.amount_parser.parte_entera(bco['Monto_Neto'])
+        
+        # Cruce de candidatos: por intervalo, por clave compuesta o por cola de 3 dígitos (método original)
+        if self.cascada:
+            return self._workflow1_cascada(sis, bco)
+        if self.join_workflow1 == JOIN_COLA:
+            return self._workflow1_por_cola(sis, bco, tolerancia)
+        return self._workflow1_por_clave(sis, bco, ventana_en_cruce=self.join_workflow1 == JOIN_INTERVALO, tolerancia=tolerancia)
+    
+    def _cola_3(self, s):
+        """Últimos 3 dígitos del documento como en el notebook ('7' -> '007')"""
+        s = s.fillna('').astype(str).str.strip()
+        return s.str[-3:].str.zfill(3)
+    
+    def _workflow1_particionado(self, banco_df, sistema_df, tolerancia):
+        """Verificadas del Workflow 1 generadas por particiones de fechas (mismo resultado que sin particionar)
+        
+        Cada partición cruza el banco de su rango con el sistema de 0 a +tolerancia días
+        después; los pares se juntan, se deduplican y se ordenan como el cruce completo.
+        """
+        if not self._particionable(banco_df, sistema_df, 'Fecha', 'Fecha'):
+            return self._candidatos_workflow1(banco_df, sistema_df, tolerancia)
+        
+        particiones = DatePartitioner(self.particion_dias).particiones(
+            self.date_parser.parsear(banco_df['Fecha'], formato='mixed'),
+            self.date_parser.parsear(sistema_df['Fecha'], formato='mixed'),
+            pd.Timedelta(0), pd.Timedelta(days=tolerancia)
+        )
+        verificadas = self._candidatos_por_particion(
+            particiones, lambda motor, bco, sis: motor._candidatos_workflow1(bco, sis, tolerancia), banco_df, sistema_df
+        )
+        if verificadas is None:
+            return None
+        return self._ordenar_como_cruce_workflow1(verificadas, banco_df, sistema_df)
+    
+    def _workflow1_con_nuevas(self, banco_df, sistema_df, tolerancia):
+        """Verificadas del Workflow 1 con al menos una fila nueva, en el orden del cruce completo"""
+        generar = self._workflow1_particionado if self.particion_dias else self._candidatos_workflow1
+        if not self._ids_unicos(banco_df, sistema_df):
+            return generar(banco_df, sistema_df, tolerancia)
+        claves = (self.amount_parser.parte_entera(banco_df['Monto_Neto']), self.amount_parser.parte_entera(sistema_df['Monto']))
+        verificadas = self._candidatos_con_nuevas(lambda bco, sis: generar(bco, sis, tolerancia), banco_df, sistema_df, claves)
+        if verificadas is None:
+            return None
+        return self._ordenar_como_cruce_workflow1(verificadas, banco_df, sistema_df)
+    
+    def _ordenar_como_cruce_workflow1(self, verificadas, banco_df, sistema_df):
+        """Pares generados por partes en el orden del cruce completo: grupos de cola en orden de
+        aparición en el sistema, sistema, banco"""
+        pos_sis, pos_bco = self._posiciones_pares(verificadas, banco_df, sistema_df)
+        grupos, _ = pd.factorize(self._cola_3(sistema_df['Nro.Ref.Bco']).to_numpy())
+        orden = np.lexsort((pos_bco, pos_sis, grupos[pos_sis]))
+        return verificadas.iloc[orden].reset_index(drop=True)
+    
+    def _workflow1_por_clave(self, sis, bco, ventana_en_cruce=True, tolerancia=None):
+        """Verificadas del Workflow 1 cruzando por clave compuesta (cola, monto entero)
+        
+        Solo se generan pares con la misma cola y el mismo monto entero. Con ventana_en_cruce la
+        ventana de 0 a tolerancia días (por defecto tolerance_days) se resuelve dentro del cruce;
+        si no, se filtra sobre los pares. Las verificadas (filas, columnas y orden) son las
+        mismas que las de _workflow1_por_cola.
+        """
+        tolerancia = self.tolerance_days if tolerancia is None else tolerancia
+        cruce = IntervalJoin()
+        claves_sis, claves_bco = cruce.codigos([sis['tail'], sis['Monto_entero']], [bco['tail'], bco['Monto_Neto_entero']])
+        fechas_sis = self.date_parser.parsear(sis['Fecha'], formato='mixed').to_numpy(dtype='datetime64[ns]')
+        fechas_bco = self.date_parser.parsear(bco['Fecha'], formato='mixed').to_numpy(dtype='datetime64[ns]')
+        
+        # Ventana de fechas: sistema de 0 a +tolerance_days días después del banco (fechas normalizadas)
+        desde, hasta = pd.Timedelta(0), pd.Timedelta(days=tolerancia)
+        if ventana_en_cruce:
+            pos_sis, pos_bco = cruce.pares(claves_sis, claves_bco, fechas_sis, fechas_bco, desde, hasta)
+        else:
+            pos_sis, pos_bco = cruce.pares(claves_sis, claves_bco)
+        
+        metodo = JOIN_INTERVALO if ventana_en_cruce else JOIN_COMPUESTA
+        self.join_metrics = {'metodo': metodo, 'candidatos': len(pos_sis)}
+        logger.info("📋 Encontrados %d candidatos por cola y monto entero", len(pos_sis))
+        if len(pos_sis) == 0:
+            logger.info("⚠️ No hubo coincidencias por cola de 3 y monto")
+            return None
+        
+        if not ventana_en_cruce:
+            with self.instrumentacion.etapa('filtro_fechas', len(pos_sis)) as etapa:
+                diferencia = fechas_sis[pos_sis] - fechas_bco[pos_bco]
+                validas = ~np.isnat(diferencia)
+                diferencia = np.where(validas, diferencia, np.timedelta64(0, 'ns'))
+                en_ventana = validas & (diferencia >= desde.to_timedelta64()) & (diferencia <= hasta.to_timedelta64())
+                pos_sis, pos_bco = pos_sis[en_ventana], pos_bco[en_ventana]
+                etapa['filas_salida'] = len(pos_sis)
+        
+        # Orden del merge por cola: grupos de cola en orden de aparición en el sistema
+        colas_sis, _ = cruce.codigos([sis['tail']], [bco['tail']])
+        pos_sis, pos_bco = cruce.ordenar_como_merge(colas_sis, pos_sis, pos_bco)
+        
+        verificadas = self._armar_pares_workflow1(sis, bco, pos_sis, pos_bco)
+        logger.info("   Registros verificados: %d (fechas 0 a +%d días Y montos enteros iguales)", len(verificadas), tolerancia)
+        return verificadas
+    
+    def _workflow1_cascada(self, sis, bco):
+        """Verificadas del Workflow 1 en varias pasadas, de la más estricta a la más laxa
+        
+        Cada pasada cruza solo los registros que quedaron sin conciliar en las anteriores,
+        asigna uno a uno sus candidatos y marca los pares con la columna 'pasada'.
+        Devuelve None si ninguna pasada generó candidatos.
+        """
+        cruce = IntervalJoin()
+        fechas_sis = self.date_parser.parsear(sis['Fecha'], formato='mixed').to_numpy(dtype='datetime64[ns]')
+        fechas_bco = self.date_parser.parsear(bco['Fecha'], formato='mixed').to_numpy(dtype='datetime64[ns]')
+        documentos_sis = sis['Nro.Ref.Bco'].fillna('').astype(str).str.strip()
+        doc_col_banco = 'Numero_Documento' if 'Numero_Documento' in bco.columns else 'Número de documento'
+        documentos_bco = bco[doc_col_banco].fillna('').astype(str).str.strip()
+        
+        # Clave, ventana (fecha sistema - fecha banco) y registros válidos de cada pasada
+        tolerancia = pd.Timedelta(days=self.tolerance_days)
+        pasadas = {
+            PASADA_DOCUMENTO: ([documentos_sis, sis['Monto_entero']], [documentos_bco, bco['Monto_Neto_entero']], None, None),
+            PASADA_MISMO_DIA: ([sis['Monto_entero']], [bco['Monto_Neto_entero']], pd.Timedelta(0), pd.Timedelta(0)),
+            PASADA_COLA: ([sis['tail'], sis['Monto_entero']], [bco['tail'], bco['Monto_Neto_entero']], pd.Timedelta(0), tolerancia),
+            PASADA_MONTO: ([sis['Monto_entero']], [bco['Monto_Neto_entero']], -tolerancia, tolerancia),
+        }
+        con_documento_sis = ~documentos_sis.isin(['', 'nan']).to_numpy()
+        con_documento_bco = ~documentos_bco.isin(['', 'nan']).to_numpy()
+        
+        libres_sis = np.ones(len(sis), dtype=bool)
+        libres_bco = np.ones(len(bco), dtype=bool)
+        nuevas = None
+        if self._ids_nuevos is not None:
+            nuevas = (sis['ID_sistema'].isin(self._ids_nuevos[1]).to_numpy(), bco['ID_banco'].isin(self._ids_nuevos[0]).to_numpy())
+        resultados = []
+        self.join_metrics = {'metodo': 'cascada', 'candidatos': 0, 'pasadas': {}}
+        for nombre in self.cascada:
+            if nombre not in pasadas:
+                raise ValueError(f"Pasada de cascada no soportada: {nombre}")
+            inicio = time.perf_counter()
+            columnas_sis, columnas_bco, desde, hasta = pasadas[nombre]
+            restantes_sis = np.flatnonzero(libres_sis & con_documento_sis if nombre == PASADA_DOCUMENTO else libres_sis)
+            restantes_bco = np.flatnonzero(libres_bco & con_documento_bco if nombre == PASADA_DOCUMENTO else libres_bco)
+            
+            claves_sis, claves_bco = cruce.codigos(
+                [np.asarray(columna)[restantes_sis] for columna in columnas_sis],
+                [np.asarray(columna)[restantes_bco] for columna in columnas_bco]
+            )
+            if desde is None and hasta is None:
+                pos_sis, pos_bco = cruce.pares(claves_sis, claves_bco)
+            else:
+                pos_sis, pos_bco = cruce.pares(claves_sis, claves_bco, fechas_sis[restantes_sis], fechas_bco[restantes_bco], desde, hasta)
+            pos_sis, pos_bco = cruce.ordenar_como_merge(claves_sis, pos_sis, pos_bco)
+            pos_sis, pos_bco = restantes_sis[pos_sis], restantes_bco[pos_bco]
+            if nuevas is not None:
+                # Conciliación incremental: solo pares con alguna fila nueva
+                con_nueva = nuevas[0][pos_sis] | nuevas[1][pos_bco]
+                pos_sis, pos_bco = pos_sis[con_nueva], pos_bco[con_nueva]
             
-        sis['tail'] = cola_3(sis['Nro.Ref.Bco'])
+            conciliadas = 0
+            if len(pos_sis):
+                candidatas = self._armar_pares_workflow1(sis, bco, pos_sis, pos_bco)
+                # Costo: diferencia absoluta de días (sin fecha, al final en los desempates)
+                costos = candidatas['dif_dias'].abs().fillna(np.iinfo(np.int32).max).to_numpy()
+                candidatas = self._asignar_uno_a_uno(candidatas, costos)
+                candidatas['pasada'] = nombre
+                libres_sis[pos_sis[candidatas.index]] = False
+                libres_bco[pos_bco[candidatas.index]] = False
+                resultados.append(candidatas)
+                conciliadas = len(candidatas)
+            
+            self.join_metrics['candidatos'] += len(pos_sis)
+            self.join_metrics['pasadas'][nombre] = {
+                'candidatos': len(pos_sis),
+                'conciliadas': conciliadas,
+                'segundos': time.perf_counter() - inicio
+            }
+            logger.info("   Pasada %s: %d candidatos, %d conciliadas (quedan %d sistema, %d banco)",
+                        nombre, len(pos_sis), conciliadas, int(libres_sis.sum()), int(libres_bco.sum()))
+        
+        if not resultados:
+            logger.info("⚠️ Ninguna pasada de la cascada generó candidatos")
+            return None
+        return pd.concat(resultados, ignore_index=True)
+    
+    def _armar_pares_workflow1(self, sis, bco, pos_sis, pos_bco):
+        """Arma solo los pares indicados con las mismas columnas (y sufijos) que el merge por cola"""
+        # La cola del banco se descarta: en las pasadas de la cascada puede no coincidir con la del sistema
+        izquierda = sis.iloc[pos_sis].reset_index(drop=True)
+        derecha = bco.iloc[pos_bco].drop(columns='tail', errors='ignore').reset_index(drop=True)
+        izquierda['_par'] = np.arange(len(pos_sis))
+        derecha['_par'] = np.arange(len(pos_bco))
+        verificadas = izquierda.merge(
+            derecha,
+            on='_par',
+            how='inner',
+            suffixes=('_sistema', '_banco'),
+            validate='one_to_one'
+        ).drop(columns='_par')
+        
+        verificadas['Fecha_sistema'] = self.date_parser.parsear(verificadas['Fecha_sistema'], formato='mixed')
+        verificadas['Fecha_banco'] = self.date_parser.parsear(verificadas['Fecha_banco'], formato='mixed')
+        verificadas['dif_dias'] = (verificadas['Fecha_sistema'] - verificadas['Fecha_banco']).dt.days
+        verificadas['monto_dif'] = verificadas['Monto'] - verificadas['Monto_Neto']
+        verificadas['verificada'] = 'v'
+        verificadas['match_quality'] = np.where(verificadas['dif_dias'] == 0, 'exacto', 'tolerancia_fecha')
+        return verificadas
+    
+    def _workflow1_por_cola(self, sis, bco, tolerancia=None):
+        """Verificadas del Workflow 1 con el método original: merge muchos a muchos por cola de 3 dígitos
         
+        Genera todos los pares con la misma cola y después filtra fechas y montos. Devuelve None
+        si no hay candidatos.
+        """
+        tolerancia = self.tolerance_days if tolerancia is None else tolerancia
         # Merge por cola de 3 dígitos
         merged = sis.merge(
             bco,
@@ -190,33 +673,43 @@ class ReconciliationEngine:
             validate='many_to_many'
         )
         
+        self.join_metrics = {'metodo': JOIN_COLA, 'candidatos': len(merged)}
         if merged.empty:
-            print("⚠️ No hubo coincidencias por cola de 3")
-            return pd.DataFrame(), banco_df, sistema_df
+            logger.info("⚠️ No hubo coincidencias por cola de 3")
+            return None
         
-        print(f"📋 Encontrados {len(merged)} matches por tail matching")
+        logger.info("📋 Encontrados %d matches por tail matching", len(merged))
         
+        with self.instrumentacion.etapa('filtro_fechas', len(merged)) as etapa:
+            verificadas = self._filtrar_workflow1_por_cola(merged, tolerancia)
+            etapa['filas_salida'] = len(verificadas)
+        
+        return verificadas
+    
+    def _filtrar_workflow1_por_cola(self, merged, tolerancia):
+        """Convierte fechas del merge por cola y deja los pares con fechas 0 a +tolerancia días y montos enteros iguales"""
         # Debugging de fechas antes de procesar
-        print(f"🔍 Debug fechas antes de conversión:")
-        print(f"   Muestra Fecha_sistema: {merged['Fecha_sistema'].head(3).tolist()}")
-        print(f"   Muestra Fecha_banco: {merged['Fecha_banco'].head(3).tolist()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Debug fechas antes de conversión:")
+            logger.debug("   Muestra Fecha_sistema: %s", merged['Fecha_sistema'].head(3).tolist())
+            logger.debug("   Muestra Fecha_banco: %s", merged['Fecha_banco'].head(3).tolist())
         
         # Procesar fechas con más opciones de formato y normalizar
-        merged['Fecha_sistema'] = pd.to_datetime(merged['Fecha_sistema'], format='mixed', errors='coerce').dt.normalize()
-        merged['Fecha_banco'] = pd.to_datetime(merged['Fecha_banco'], format='mixed', errors='coerce').dt.normalize()
+        merged['Fecha_sistema'] = self.date_parser.parsear(merged['Fecha_sistema'], formato='mixed')
+        merged['Fecha_banco'] = self.date_parser.parsear(merged['Fecha_banco'], formato='mixed')
         
         # Verificar conversión exitosa
         fecha_sistema_nulas = merged['Fecha_sistema'].isna().sum()
         fecha_banco_nulas = merged['Fecha_banco'].isna().sum()
-        print(f"📊 Fechas convertidas - Sistema NaN: {fecha_sistema_nulas}, Banco NaN: {fecha_banco_nulas}")
+        logger.debug("📊 Fechas convertidas - Sistema NaN: %d, Banco NaN: %d", fecha_sistema_nulas, fecha_banco_nulas)
         
         if fecha_sistema_nulas > 0 or fecha_banco_nulas > 0:
-            print("⚠️ Problemas con conversión de fechas - intentando formatos alternativos")
+            logger.info("⚠️ Problemas con conversión de fechas - intentando formatos alternativos")
             # Intentar otros formatos comunes
             if fecha_sistema_nulas > 0:
-                merged['Fecha_sistema'] = pd.to_datetime(merged['Fecha_sistema'], dayfirst=True, errors='coerce')
+                merged['Fecha_sistema'] = self.date_parser.parsear(merged['Fecha_sistema'], formato=None, dayfirst=True, normalizar=False)
             if fecha_banco_nulas > 0:
-                merged['Fecha_banco'] = pd.to_datetime(merged['Fecha_banco'], dayfirst=True, errors='coerce')
+                merged['Fecha_banco'] = self.date_parser.parsear(merged['Fecha_banco'], formato=None, dayfirst=True, normalizar=False)
         
         # Calcular diferencias solo si las fechas son válidas
         # CORRECCIÓN: dif_dias debe ser positivo cuando fecha_sistema > fecha_banco
@@ -225,30 +718,24 @@ class ReconciliationEngine:
         # Calcular diferencia de montos
         merged['monto_dif'] = merged['Monto'] - merged['Monto_Neto']
         
-        print(f"📊 Análisis de diferencias de fechas:")
-        print(f"   Min diferencia: {merged['dif_dias'].min()}")
-        print(f"   Max diferencia: {merged['dif_dias'].max()}")
-        valid_diffs = merged['dif_dias'].notna()
-        print(f"   Diferencias válidas: {valid_diffs.sum()} de {len(merged)}")
-        if valid_diffs.any():
-            in_range = ((merged['dif_dias'] >= 0) & (merged['dif_dias'] <= self.tolerance_days) & valid_diffs).sum()
-            print(f"   Registros con dif 0 a +{self.tolerance_days}: {in_range}")
+        if logger.isEnabledFor(logging.DEBUG):
+            valid_diffs = merged['dif_dias'].notna()
+            logger.debug("📊 Análisis de diferencias de fechas: min %s, max %s, válidas %d de %d",
+                         merged['dif_dias'].min(), merged['dif_dias'].max(), valid_diffs.sum(), len(merged))
+            if valid_diffs.any():
+                in_range = ((merged['dif_dias'] >= 0) & (merged['dif_dias'] <= tolerancia) & valid_diffs).sum()
+                logger.debug("   Registros con dif 0 a +%d: %d", tolerancia, in_range)
         
         # CORRECCIÓN CRÍTICA: SOLO verificar transacciones que cumplan AMBAS condiciones
         merged['verificada'] = ''
         merged['match_quality'] = ''
         
         # ÚNICA CONDICIÓN DE VERIFICACIÓN: fecha sistema dentro de tolerancia DESPUÉS de fecha banco + montos enteros iguales
-        print(f"🔍 DEBUG - Aplicando tolerancia: fecha sistema debe estar 0 a +{self.tolerance_days} días después de fecha banco")
-        print(f"🔍 DEBUG - Comparando solo la parte entera de los montos (sin decimales)")
-        
-        # Convertir montos a enteros para comparación (sin decimales)
-        merged['Monto_entero'] = merged['Monto'].fillna(0).astype(float).astype(int)
-        merged['Monto_Neto_entero'] = merged['Monto_Neto'].fillna(0).astype(float).astype(int)
+        logger.debug("🔍 Aplicando tolerancia: fecha sistema 0 a +%d días después de fecha banco, solo parte entera de los montos", tolerancia)
         
         verificacion_estricta = (
             (merged['dif_dias'] >= 0) &  # Fecha sistema igual o posterior a fecha banco
-            (merged['dif_dias'] <= self.tolerance_days) &  # Fecha sistema dentro de tolerancia
+            (merged['dif_dias'] <= tolerancia) &  # Fecha sistema dentro de tolerancia
             merged['dif_dias'].notna() &  # Solo fechas válidas
             (merged['Monto_entero'] == merged['Monto_Neto_entero'])  # Montos enteros iguales
         )
@@ -264,62 +751,99 @@ class ReconciliationEngine:
         merged.loc[tolerance_match, 'match_quality'] = 'tolerancia_fecha'
         
         # VALIDACIÓN ADICIONAL: revisar duplicados
-        duplicated_banco = merged['Número de documento'].duplicated(keep=False)
-        duplicated_sistema = merged['Nro.Ref.Bco'].duplicated(keep=False)
-        
-        if duplicated_banco.any() or duplicated_sistema.any():
-            print(f"⚠️ Advertencia: {duplicated_banco.sum()} duplicados banco, {duplicated_sistema.sum()} duplicados sistema")
+        if logger.isEnabledFor(logging.DEBUG):
+            duplicated_banco = merged['Número de documento'].duplicated(keep=False)
+            duplicated_sistema = merged['Nro.Ref.Bco'].duplicated(keep=False)
+            if duplicated_banco.any() or duplicated_sistema.any():
+                logger.debug("⚠️ Advertencia: %d duplicados banco, %d duplicados sistema", duplicated_banco.sum(), duplicated_sistema.sum())
         
         # Filtrar solo las verificadas
-        verificadas = merged[merged['verificada'] == 'v'].copy()
+        verificadas = copiar(merged[merged['verificada'] == 'v'])
         verificadas.reset_index(drop=True, inplace=True)
         
-        print(f"🔍 DEBUG - Análisis de verificación:")
-        print(f"   Total registros después del merge: {len(merged)}")
-        print(f"   Registros marcados como verificados: {len(verificadas)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Análisis de verificación: %d registros después del merge, %d verificados", len(merged), len(verificadas))
+            if len(verificadas) > 0:
+                logger.debug("   Muestra diferencias de días: %s", verificadas['dif_dias'].head(3).tolist())
+                logger.debug("   Muestra montos banco (decimales): %s", verificadas['Monto_Neto'].head(3).tolist())
+                logger.debug("   Muestra montos sistema (decimales): %s", verificadas['Monto'].head(3).tolist())
+                logger.debug("   Muestra montos banco (enteros): %s", verificadas['Monto_Neto_entero'].head(3).tolist())
+                logger.debug("   Muestra montos sistema (enteros): %s", verificadas['Monto_entero'].head(3).tolist())
+                logger.debug("   Muestra fechas banco: %s", verificadas['Fecha_banco'].head(3).tolist())
+                logger.debug("   Muestra fechas sistema: %s", verificadas['Fecha_sistema'].head(3).tolist())
+        
+        # Verificar si hay diferencias de días fuera del rango
         if len(verificadas) > 0:
-            print(f"   Muestra diferencias de días: {verificadas['dif_dias'].head(3).tolist()}")
-            print(f"   Muestra montos banco (decimales): {verificadas['Monto_Neto'].head(3).tolist()}")
-            print(f"   Muestra montos sistema (decimales): {verificadas['Monto'].head(3).tolist()}")
-            print(f"   Muestra montos banco (enteros): {verificadas['Monto_Neto_entero'].head(3).tolist()}")
-            print(f"   Muestra montos sistema (enteros): {verificadas['Monto_entero'].head(3).tolist()}")
-            print(f"   Muestra fechas banco: {verificadas['Fecha_banco'].head(3).tolist()}")
-            print(f"   Muestra fechas sistema: {verificadas['Fecha_sistema'].head(3).tolist()}")
-            # Verificar si hay diferencias de días fuera del rango
-            dif_fuera_rango = verificadas[(verificadas['dif_dias'] < 0) | (verificadas['dif_dias'] > self.tolerance_days)]
+            dif_fuera_rango = verificadas[(verificadas['dif_dias'] < 0) | (verificadas['dif_dias'] > tolerancia)]
             if len(dif_fuera_rango) > 0:
-                print(f"   ⚠️ PROBLEMA: {len(dif_fuera_rango)} registros verificados con fechas fuera del rango 0 a +{self.tolerance_days}")
-                print(f"      Diferencias problemáticas: {dif_fuera_rango['dif_dias'].head(5).tolist()}")
-            else:
-                print(f"   ✅ Todas las verificadas cumplen: fechas 0 a +{self.tolerance_days} días Y montos enteros iguales")
+                logger.warning("⚠️ PROBLEMA: %d registros verificados con fechas fuera del rango 0 a +%d: %s",
+                               len(dif_fuera_rango), tolerancia, dif_fuera_rango['dif_dias'].head(5).tolist())
         
-        if verificadas.empty:
-            print("⚠️ No se encontraron registros dentro de la tolerancia de fechas Y montos exactos")
+        return verificadas
+    
+    def _perform_workflow2_matching(self, banco_df, sistema_df):
+        """Matching para Workflow 2 usando merge directo como en el código original"""
+        # Los pares del Workflow 2 no dependen de la tolerancia: con caché se reutilizan tal cual
+        clave_cache = ('workflow_2', self.join_workflow2)
+        guardados = None
+        con_cache = self._entrada_cache is not None and self._ids_nuevos is None
+        if con_cache:
+            guardados = self.candidate_cache.candidatos(self._entrada_cache, clave_cache)
+        
+        inicio = time.perf_counter()
+        with self.instrumentacion.etapa('cruce', len(banco_df) + len(sistema_df)) as etapa:
+            if guardados is not None:
+                banco_df, sistema_df, verificadas = guardados['banco'], guardados['sistema'], guardados['verificadas']
+                self.join_metrics = dict(guardados['metricas'], desde_cache=True)
+            else:
+                banco_df, sistema_df, verificadas = self._candidatos_workflow2(banco_df, sistema_df)
+                if con_cache:
+                    guardados = {'banco': banco_df, 'sistema': sistema_df, 'verificadas': verificadas,
+                                 'metricas': dict(self.join_metrics), 'asignadas': {}}
+                    self.candidate_cache.guardar_candidatos(self._entrada_cache, clave_cache, guardados)
+            etapa['candidatos'] = self.join_metrics.get('candidatos')
+            etapa['filas_salida'] = len(verificadas) if verificadas is not None else 0
+        self.join_metrics['segundos'] = time.perf_counter() - inicio
+        logger.info("⏱️ Cruce %s: %d candidatos en %.3fs", self.join_metrics['metodo'], self.join_metrics['candidatos'], self.join_metrics['segundos'])
+        
+        if verificadas is None or len(verificadas) == 0:
             return pd.DataFrame(), banco_df, sistema_df
         
-        # Limpiar columnas temporales
-        verificadas = verificadas.drop(columns=['tail', 'dif_dias', 'Monto_entero', 'Monto_Neto_entero'], errors='ignore')
+        # Asignación uno a uno: máxima cantidad de pares y, a igualdad, menor diferencia entre fechas
+        # (sin tolerancia de por medio, la asignación guardada en caché sigue valiendo)
+        asignadas = guardados['asignadas'].get(self.asignacion) if guardados is not None else None
+        if asignadas is None:
+            diferencia = (verificadas['fec'] - verificadas['Fecha']).to_numpy(dtype='timedelta64[ns]')
+            asignadas = self._asignar_uno_a_uno(verificadas, np.abs(diferencia.view(np.int64)))
+            if guardados is not None:
+                guardados['asignadas'][self.asignacion] = asignadas
+        verificadas = asignadas
         
-        # Deduplicar por ID_sistema e ID_banco como en tu notebook
-        verificadas = verificadas.drop_duplicates(subset='ID_sistema', keep='first')
-        verificadas = verificadas.drop_duplicates(subset='ID_banco', keep='first')
-        verificadas = verificadas.reset_index(drop=True)
-        
-        # Calcular no coincidentes
-        matched_sistema_ids = verificadas['ID_sistema'].unique()
-        unmatched_sistema = sistema_df[~sistema_df['ID_sistema'].isin(matched_sistema_ids)]
+        # Crear unmatched DataFrames
+        matched_banco_ids = verificadas['ID_banco'].tolist()
+        matched_sistema_ids = verificadas['ID_sistema'].tolist()
         
-        matched_banco_ids = verificadas['ID_banco'].unique()
-        unmatched_banco = banco_df[~banco_df['ID_banco'].isin(matched_banco_ids)]
+        unmatched_banco = copiar(banco_df[~banco_df['ID_banco'].isin(matched_banco_ids)])
+        unmatched_sistema = copiar(sistema_df[~sistema_df['ID_sistema'].isin(matched_sistema_ids)])
         
-        print(f"🎯 Workflow 1 completado: {len(verificadas)} registros verificados")
         return verificadas, unmatched_banco, unmatched_sistema
     
-    def _perform_workflow2_matching(self, banco_df, sistema_df):
-        """Matching para Workflow 2 usando merge directo como en el código original"""
+    def _candidatos_workflow2(self, banco_df, sistema_df):
+        """Datos con montos enteros y fechas del Workflow 2 y sus pares verificados (antes de la asignación)"""
+        banco_df, sistema_df = self._datos_workflow2(banco_df, sistema_df)
+        if self._ids_nuevos is not None:
+            verificadas = self._workflow2_con_nuevas(sistema_df, banco_df)
+        elif self.particion_dias:
+            verificadas = self._workflow2_particionado(sistema_df, banco_df)
+        else:
+            verificadas = self._cruce_workflow2(sistema_df, banco_df)
+        return banco_df, sistema_df, verificadas
+    
+    def _datos_workflow2(self, banco_df, sistema_df):
+        """Copias de los datos preparados con montos enteros y fechas del Workflow 2"""
         # Preparar columnas siguiendo exactamente el código original
-        banco_df = banco_df.copy()
-        sistema_df = sistema_df.copy()
+        banco_df = copiar(banco_df)
+        sistema_df = copiar(sistema_df)
         
         # Asegurar que tenemos las columnas necesarias con nombres correctos
         if 'Crédito' not in banco_df.columns:
@@ -328,14 +852,178 @@ class ReconciliationEngine:
             banco_df['Débito'] = banco_df.get('Debito', 0)
         
         # Convertir montos a enteros exactamente como en el código original
-        banco_df['Crédito_int'] = banco_df['Crédito'].fillna(0).astype(int)
-        banco_df['Débito_int'] = banco_df['Débito'].fillna(0).astype(int)
-        sistema_df['Debe_int'] = sistema_df['debe'].fillna(0).astype(int)
-        sistema_df['Haber_int'] = sistema_df['haber'].fillna(0).astype(int)
+        banco_df['Crédito_int'] = self.amount_parser.parte_entera(banco_df['Crédito'])
+        banco_df['Débito_int'] = self.amount_parser.parte_entera(banco_df['Débito'])
+        sistema_df['Debe_int'] = self.amount_parser.parte_entera(sistema_df['debe'])
+        sistema_df['Haber_int'] = self.amount_parser.parte_entera(sistema_df['haber'])
         
         # Asegurar formato de fecha correcto para sistema (fec)
-        sistema_df['fec'] = pd.to_datetime(sistema_df['fec'], format="%d/%m/%Y", errors='coerce', dayfirst=True)
+        sistema_df['fec'] = self.date_parser.parsear(sistema_df['fec'], formato="%d/%m/%Y", dayfirst=True, normalizar=False)
+        return banco_df, sistema_df
+    
+    def _cruce_workflow2(self, sistema_df, banco_df):
+        """Verificadas del Workflow 2 con el cruce configurado"""
+        if self.join_workflow2 == JOIN_INTERVALO:
+            return self._workflow2_por_intervalo(sistema_df, banco_df)
+        return self._workflow2_por_merge(sistema_df, banco_df)
+    
+    def _workflow2_particionado(self, sistema_df, banco_df):
+        """Verificadas del Workflow 2 generadas por particiones de fechas (mismo resultado que sin particionar)
+        
+        La ventana (Fecha <= fec + 3 días) no tiene límite superior: cada partición del banco
+        cruza con el sistema desde 3 días antes de su inicio. Los pares se juntan, se
+        deduplican y recuperan el orden e índice del merge completo.
+        """
+        if not self._particionable(banco_df, sistema_df, 'Fecha', 'fec'):
+            return self._cruce_workflow2(sistema_df, banco_df)
+        
+        particiones = DatePartitioner(self.particion_dias).particiones(
+            banco_df['Fecha'].to_numpy(dtype='datetime64[ns]'), sistema_df['fec'].to_numpy(dtype='datetime64[ns]'),
+            desde=pd.Timedelta(days=-3)
+        )
+        verificadas = self._candidatos_por_particion(
+            particiones, lambda motor, bco, sis: motor._cruce_workflow2(sis, bco), banco_df, sistema_df
+        )
+        if verificadas is None:
+            return None
+        return self._ordenar_como_cruce_workflow2(verificadas, sistema_df, banco_df)
+    
+    def _workflow2_con_nuevas(self, sistema_df, banco_df):
+        """Verificadas del Workflow 2 con al menos una fila nueva, con el orden e índice del merge completo"""
+        generar = self._workflow2_particionado if self.particion_dias else self._cruce_workflow2
+        if not self._ids_unicos(banco_df, sistema_df):
+            return generar(sistema_df, banco_df)
+        claves_sis, claves_bco = IntervalJoin().codigos(
+            [sistema_df['Haber_int'], sistema_df['Debe_int']],
+            [banco_df['Débito_int'], banco_df['Crédito_int']]
+        )
+        verificadas = self._candidatos_con_nuevas(lambda bco, sis: generar(sis, bco), banco_df, sistema_df, (claves_bco, claves_sis))
+        if verificadas is None:
+            return None
+        return self._ordenar_como_cruce_workflow2(verificadas, sistema_df, banco_df)
+    
+    def _ordenar_como_cruce_workflow2(self, verificadas, sistema_df, banco_df):
+        """Pares generados por partes con el orden e índice del merge completo por montos"""
+        cruce = IntervalJoin()
+        claves_sis, claves_bco = cruce.codigos(
+            [sistema_df['Haber_int'], sistema_df['Debe_int']],
+            [banco_df['Débito_int'], banco_df['Crédito_int']]
+        )
+        pos_sis, pos_bco = self._posiciones_pares(verificadas, banco_df, sistema_df)
+        orden = np.lexsort((pos_bco, pos_sis, claves_sis[pos_sis]))
+        verificadas = verificadas.iloc[orden]
+        verificadas.index = pd.Index(cruce.posiciones_en_merge(claves_sis, claves_bco, pos_sis[orden], pos_bco[orden]))
+        return verificadas
+    
+    def _particionable(self, banco_df, sistema_df, fecha_banco, fecha_sistema):
+        """Si se puede particionar: columnas de fecha presentes e IDs únicos para reordenar los pares"""
+        if fecha_banco not in banco_df.columns or fecha_sistema not in sistema_df.columns:
+            return False
+        if not (banco_df['ID_banco'].is_unique and sistema_df['ID_sistema'].is_unique):
+            logger.warning("⚠️ IDs repetidos: el cruce se hace sin particionar")
+            return False
+        return True
+    
+    def _ids_unicos(self, banco_df, sistema_df):
+        """Si los pares generados solo con filas nuevas se pueden reordenar (IDs únicos)"""
+        if banco_df['ID_banco'].is_unique and sistema_df['ID_sistema'].is_unique:
+            return True
+        logger.warning("⚠️ IDs repetidos: se cruzan todas las filas, no solo las nuevas")
+        return False
+    
+    def _candidatos_con_nuevas(self, generar, banco_df, sistema_df, claves):
+        """Une los candidatos del banco nuevo contra todo el sistema y del resto del banco contra el
+        sistema nuevo (los pares entre filas ya vistas no se generan)
+        
+        generar(banco, sistema) cruza cada parte; las dos partes no comparten filas del banco,
+        así que no hay pares repetidos. claves (banco, sistema) es la clave de montos que todo
+        par tiene que compartir: de la otra parte solo se cruzan las filas con la clave de
+        alguna fila nueva.
+        """
+        claves_bco, claves_sis = claves
+        nuevas_bco = banco_df['ID_banco'].isin(self._ids_nuevos[0]).to_numpy()
+        nuevas_sis = sistema_df['ID_sistema'].isin(self._ids_nuevos[1]).to_numpy()
+        metodo = self.join_workflow2 if self.workflow_type == 'workflow_2' else self.join_workflow1
+        partes = []
+        candidatos = 0
+        contra_banco_nuevo = np.isin(claves_sis, claves_bco[nuevas_bco])
+        contra_sistema_nuevo = ~nuevas_bco & np.isin(claves_bco, claves_sis[nuevas_sis])
+        for filas_bco, filas_sis in ((nuevas_bco, contra_banco_nuevo), (contra_sistema_nuevo, nuevas_sis)):
+            if not filas_bco.any() or not filas_sis.any():
+                continue
+            self.join_metrics = {}
+            verificadas = generar(banco_df[filas_bco], sistema_df[filas_sis])
+            candidatos += self.join_metrics.get('candidatos', 0)
+            metodo = self.join_metrics.get('metodo', metodo)
+            if verificadas is not None and len(verificadas):
+                partes.append(verificadas)
+        self.join_metrics = {'metodo': metodo, 'candidatos': candidatos, 'solo_nuevas': True}
+        logger.info("🆕 Cruce solo con filas nuevas (%d de banco, %d de sistema): %d candidatos",
+                    int(nuevas_bco.sum()), int(nuevas_sis.sum()), candidatos)
+        if not partes:
+            return None
+        return pd.concat(partes, ignore_index=True)
+    
+    def _candidatos_por_particion(self, particiones, generar, banco_df, sistema_df):
+        """Une los candidatos de cada partición (sin pares repetidos) y acumula las métricas del cruce
+        
+        generar(motor, banco, sistema) corre sobre una copia del motor por partición, así que
+        las particiones se pueden procesar en hilos sin compartir métricas.
+        """
+        def candidatos(particion):
+            pos_bco, pos_sis = particion
+            motor = copy.copy(self)
+            motor.join_metrics = {}
+            motor.date_parser = DateParser()
+            motor.instrumentacion = Instrumentacion()
+            verificadas = generar(motor, banco_df.iloc[pos_bco], sistema_df.iloc[pos_sis])
+            return verificadas, motor.join_metrics, motor.instrumentacion.registros
+        
+        resultados = DatePartitioner(self.particion_dias).ejecutar(candidatos, particiones, self.workers_particion)
+        for _, _, registros in resultados:
+            self.instrumentacion.agregar(registros)
+        resultados = [(verificadas, metricas) for verificadas, metricas, _ in resultados]
+        metodo = self.join_workflow2 if self.workflow_type == 'workflow_2' else self.join_workflow1
+        self.join_metrics = {
+            'metodo': next((metricas['metodo'] for _, metricas in resultados if 'metodo' in metricas), metodo),
+            'candidatos': sum(metricas.get('candidatos', 0) for _, metricas in resultados),
+            'particiones': len(particiones)
+        }
+        logger.info("🗂️ %d particiones de %d días: %d candidatos", len(particiones), self.particion_dias, self.join_metrics['candidatos'])
         
+        partes = [verificadas for verificadas, _ in resultados if verificadas is not None and len(verificadas)]
+        if not partes:
+            return None
+        # Cada par se genera en la partición de su fecha de banco; la deduplicación es una garantía más
+        verificadas = pd.concat(partes, ignore_index=True)
+        return verificadas.drop_duplicates(subset=['ID_sistema', 'ID_banco'])
+    
+    def _posiciones_pares(self, verificadas, banco_df, sistema_df):
+        """Posiciones en los datos completos (sistema, banco) de cada par verificado"""
+        pos_sis = pd.Index(sistema_df['ID_sistema']).get_indexer(verificadas['ID_sistema'])
+        pos_bco = pd.Index(banco_df['ID_banco']).get_indexer(verificadas['ID_banco'])
+        return pos_sis, pos_bco
+    
+    def _asignar_uno_a_uno(self, verificadas, costos):
+        """Deja cada registro del sistema y del banco en un solo par verificado
+        
+        Con asignación óptima se maximiza la cantidad de pares (a igualdad, menor costo); con
+        'primera' se conserva el primer par de cada ID_sistema y luego de cada ID_banco.
+        """
+        if self.asignacion == ASIGNACION_PRIMERA:
+            verificadas = verificadas.drop_duplicates(subset='ID_sistema', keep='first')
+            return verificadas.drop_duplicates(subset='ID_banco', keep='first')
+        
+        with self.instrumentacion.etapa('asignacion', len(verificadas)) as etapa:
+            elegidas = self.match_assigner.asignar(verificadas['ID_sistema'].to_numpy(), verificadas['ID_banco'].to_numpy(), costos)
+            etapa['filas_salida'] = int(elegidas.sum())
+        reporte = self.match_assigner.ultimo_reporte
+        logger.info("🔗 Asignación uno a uno: %d de %d pares (%d directos, %d grupos resueltos)",
+                    int(elegidas.sum()), len(verificadas), reporte['estrellas'], reporte['optimas'] + reporte['aproximadas'])
+        return verificadas[elegidas]
+    
+    def _workflow2_por_merge(self, sistema_df, banco_df):
+        """Verificadas del Workflow 2 con el método original: merge por montos y filtro de fechas después"""
         # Merge directo usando la lógica invertida del código original
         # Haber(sistema) vs Débito(banco), Debe(sistema) vs Crédito(banco)
         merged = sistema_df.merge(
@@ -345,32 +1033,81 @@ class ReconciliationEngine:
             right_on=['Débito_int', 'Crédito_int'],  # Claves del banco
             suffixes=('_sistema', '_banco')
         )
+        self.join_metrics = {'metodo': JOIN_MERGE, 'candidatos': len(merged)}
         
         if len(merged) == 0:
             # No hay matches con merge directo
-            return pd.DataFrame(), banco_df, sistema_df
+            return None
         
         # Aplicar condición de fecha (máximo 3 días como en el código original)
-        condition = (merged["Fecha"] <= merged["fec"] + pd.Timedelta(days=3))
-        
-        # Filtrar solo los registros que cumplen la condición de fecha
-        verificadas = merged[condition].copy()
-        
-        if len(verificadas) == 0:
-            return pd.DataFrame(), banco_df, sistema_df
-        
-        # Eliminar duplicados como en el código original
-        verificadas = verificadas.drop_duplicates(subset='ID_sistema', keep='first')
-        verificadas = verificadas.drop_duplicates(subset='ID_banco', keep='first')
-        
-        # Crear unmatched DataFrames
-        matched_banco_ids = verificadas['ID_banco'].tolist()
-        matched_sistema_ids = verificadas['ID_sistema'].tolist()
+        with self.instrumentacion.etapa('filtro_fechas', len(merged)) as etapa:
+            condition = (merged["Fecha"] <= merged["fec"] + pd.Timedelta(days=3))
+            
+            # Filtrar solo los registros que cumplen la condición de fecha
+            verificadas = copiar(merged[condition])
+            etapa['filas_salida'] = len(verificadas)
+        return verificadas
+    
+    def _workflow2_por_intervalo(self, sistema_df, banco_df):
+        """Verificadas del Workflow 2 generando solo pares con Fecha (banco) <= fec + 3 días
+        
+        Mismas filas, columnas, orden e índice que _workflow2_por_merge.
+        """
+        cruce = IntervalJoin()
+        claves_sis, claves_bco = cruce.codigos(
+            [sistema_df['Haber_int'], sistema_df['Debe_int']],
+            [banco_df['Débito_int'], banco_df['Crédito_int']]
+        )
+        # Fecha <= fec + 3 días equivale a fec - Fecha >= -3 días, sin límite superior
+        pos_sis, pos_bco = cruce.pares(
+            claves_sis, claves_bco,
+            sistema_df['fec'].to_numpy(dtype='datetime64[ns]'), banco_df['Fecha'].to_numpy(dtype='datetime64[ns]'),
+            desde=pd.Timedelta(days=-3)
+        )
+        self.join_metrics = {'metodo': JOIN_INTERVALO, 'candidatos': len(pos_sis)}
+        if len(pos_sis) == 0:
+            return None
         
-        unmatched_banco = banco_df[~banco_df['ID_banco'].isin(matched_banco_ids)].copy()
-        unmatched_sistema = sistema_df[~sistema_df['ID_sistema'].isin(matched_sistema_ids)].copy()
+        pos_sis, pos_bco = cruce.ordenar_como_merge(claves_sis, pos_sis, pos_bco)
+        indice = cruce.posiciones_en_merge(claves_sis, claves_bco, pos_sis, pos_bco)
+        return self._armar_pares_workflow2(sistema_df, banco_df, pos_sis, pos_bco, indice)
+    
+    def _armar_pares_workflow2(self, sistema_df, banco_df, pos_sis, pos_bco, indice):
+        """Arma solo los pares indicados con las mismas columnas (y sufijos) que el merge por montos"""
+        izquierda = sistema_df.iloc[pos_sis].reset_index(drop=True)
+        derecha = banco_df.iloc[pos_bco].reset_index(drop=True)
+        izquierda['_par'] = np.arange(len(pos_sis))
+        derecha['_par'] = np.arange(len(pos_bco))
+        verificadas = izquierda.merge(
+            derecha,
+            on='_par',
+            how='inner',
+            suffixes=('_sistema', '_banco'),
+            validate='one_to_one'
+        ).drop(columns='_par')
+        verificadas.index = pd.Index(indice)
+        return verificadas
+    
+    def puntuar_candidatos(self, banco_df, sistema_df, pos_bco, pos_sis, tolerance_days=None):
+        """Reglas de matching de muchos pares a la vez sobre datos preparados (banco_data, sistema_data)
         
-        return verificadas, unmatched_banco, unmatched_sistema
+        pos_bco y pos_sis son arreglos alineados de posiciones; devuelve una fila por par con
+        dif_dias, dif_monto y las máscaras exacto, tolerante y documento.
+        """
+        return self._scorer(banco_df, sistema_df).puntuar(pos_bco, pos_sis, tolerance_days)
+    
+    def crear_registros_match(self, banco_df, sistema_df, pos_bco, pos_sis, match_type):
+        """Registros de match (como _create_match_record) de muchos pares a la vez"""
+        return self._scorer(banco_df, sistema_df).registros(pos_bco, pos_sis, match_type)
+    
+    def _scorer(self, banco_df, sistema_df):
+        """CandidateScorer de los datos indicados (se reutiliza mientras sean los mismos objetos)"""
+        clave = (id(banco_df), id(sistema_df), self.workflow_type, self.tolerance_days)
+        if self._scorer_clave != clave:
+            self._scorer_actual = CandidateScorer(banco_df, sistema_df, self.workflow_type, self.tolerance_days,
+                                                  self.date_parser, self.amount_parser)
+            self._scorer_clave = clave
+        return self._scorer_actual
     
     def _is_exact_match(self, row_banco, row_sistema):
         """Verifica si hay match exacto entre dos transacciones"""
@@ -394,7 +1131,7 @@ class ReconciliationEngine:
         """Verifica si hay match con tolerancia en fechas pero montos exactos"""
         if tolerance_days is None:
             tolerance_days = self.tolerance_days
-            
+        
         # Usar fechas normalizadas
         fecha_banco = row_banco.get('Fecha_Banco')
         fecha_sistema = row_sistema.get('Fecha_Sistema')
@@ -457,8 +1194,8 @@ class ReconciliationEngine:
     def _calculate_date_diff(self, fecha1, fecha2):
         """Calcula diferencia en días entre dos fechas"""
         try:
-            f1 = pd.to_datetime(fecha1, errors='coerce')
-            f2 = pd.to_datetime(fecha2, errors='coerce')
+            f1 = self.date_parser.parsear_valor(fecha1)
+            f2 = self.date_parser.parsear_valor(fecha2)
             
             if pd.isna(f1) or pd.isna(f2):
                 return None
@@ -467,22 +1204,24 @@ class ReconciliationEngine:
         except:
             return None
     
-    def _generate_statistics(self, matched_df, unmatched_banco, unmatched_sistema):
-        """Genera estadísticas de conciliación con análisis de totales detallado"""
-        # Reconstruir datos originales combinando matched y unmatched
-        banco_original = pd.concat([matched_df, unmatched_banco]) if not matched_df.empty else unmatched_banco
-        sistema_original = pd.concat([matched_df, unmatched_sistema]) if not matched_df.empty else unmatched_sistema
-        
-        total_banco = len(banco_original)
-        total_sistema = len(sistema_original)
-        total_matched = len(matched_df) if not matched_df.empty else 0
+    def _generate_statistics(self, banco_df, sistema_df, pares):
+        """Genera estadísticas de conciliación con análisis de totales detallado
+        
+        Trabaja sobre los datos preparados y los pares conciliados: cada total es la suma de una
+        columna con la máscara de filas conciliadas o sin conciliar, sin armar matched ni unmatched.
+        """
+        sumas = self._sumas_estadisticas(banco_df, sistema_df, pares)
+        conciliadas = sumas['conciliadas']
+        total_matched = len(pares)
+        total_banco = total_matched + sumas['filas_banco']
+        total_sistema = total_matched + sumas['filas_sistema']
         
         stats = {
             'total_transacciones_banco': total_banco,
             'total_transacciones_sistema': total_sistema,
             'total_conciliadas': total_matched,
-            'sin_conciliar_banco': len(unmatched_banco),
-            'sin_conciliar_sistema': len(unmatched_sistema),
+            'sin_conciliar_banco': sumas['filas_banco'],
+            'sin_conciliar_sistema': sumas['filas_sistema'],
             'porcentaje_conciliacion': (total_matched / max(total_banco, 1)) * 100,
             'diferencias_encontradas': total_matched
         }
@@ -490,66 +1229,97 @@ class ReconciliationEngine:
         # ANÁLISIS DE TOTALES DETALLADO (siguiendo el código del usuario)
         if self.workflow_type == 'workflow_2':
             # Para Workflow 2: usar columnas debe/haber y Débito/Crédito
-            stats.update(self._calculate_workflow2_totals(matched_df, unmatched_banco, unmatched_sistema))
+            stats.update(self._calculate_workflow2_totals(sumas, total_matched))
         else:
             # Para Workflow 1: usar las columnas estándar
-            stats.update(self._calculate_workflow1_totals(matched_df, unmatched_banco, unmatched_sistema))
+            stats.update(self._calculate_workflow1_totals(sumas, total_matched))
         
         # Estadísticas de montos básicas
-        if not matched_df.empty:
+        if total_matched:
             # Calcular montos conciliados basado en las columnas disponibles
-            if 'Débito' in matched_df.columns and 'Crédito' in matched_df.columns:
-                debito_conciliado = matched_df['Débito'].fillna(0).sum()
-                credito_conciliado = matched_df['Crédito'].fillna(0).sum()
-                stats['monto_total_conciliado_banco'] = abs(debito_conciliado) + abs(credito_conciliado)
-            elif 'Monto_Banco' in matched_df.columns:
-                stats['monto_total_conciliado_banco'] = matched_df['Monto_Banco'].sum()
+            if 'Débito' in conciliadas and 'Crédito' in conciliadas:
+                stats['monto_total_conciliado_banco'] = abs(conciliadas['Débito']) + abs(conciliadas['Crédito'])
+            elif 'Monto_Banco' in conciliadas:
+                stats['monto_total_conciliado_banco'] = conciliadas['Monto_Banco']
             
-            if 'debe' in matched_df.columns and 'haber' in matched_df.columns:
-                debe_conciliado = matched_df['debe'].fillna(0).sum()
-                haber_conciliado = matched_df['haber'].fillna(0).sum()
-                stats['monto_total_conciliado_sistema'] = abs(debe_conciliado) + abs(haber_conciliado)
-            elif 'Debe' in matched_df.columns and 'Haber' in matched_df.columns:
-                debe_conciliado = matched_df['Debe'].fillna(0).sum()
-                haber_conciliado = matched_df['Haber'].fillna(0).sum()
-                stats['monto_total_conciliado_sistema'] = abs(debe_conciliado) + abs(haber_conciliado)
-            elif 'Monto_Sistema' in matched_df.columns:
-                stats['monto_total_conciliado_sistema'] = matched_df['Monto_Sistema'].sum()
+            if 'debe' in conciliadas and 'haber' in conciliadas:
+                stats['monto_total_conciliado_sistema'] = abs(conciliadas['debe']) + abs(conciliadas['haber'])
+            elif 'Debe' in conciliadas and 'Haber' in conciliadas:
+                stats['monto_total_conciliado_sistema'] = abs(conciliadas['Debe']) + abs(conciliadas['Haber'])
+            elif 'Monto_Sistema' in conciliadas:
+                stats['monto_total_conciliado_sistema'] = conciliadas['Monto_Sistema']
             
-            if 'Diferencia_Monto' in matched_df.columns:
-                stats['diferencia_total_montos'] = matched_df['Diferencia_Monto'].sum()
+            if 'Diferencia_Monto' in conciliadas:
+                stats['diferencia_total_montos'] = conciliadas['Diferencia_Monto']
             
             # Estadísticas por tipo de match
-            if 'Match_Type' in matched_df.columns:
-                match_types = matched_df['Match_Type'].value_counts().to_dict()
-                stats['tipos_match'] = match_types
+            if sumas['tipos_match'] is not None:
+                stats['tipos_match'] = sumas['tipos_match']
+            
+            # Conciliadas por pasada de la cascada (en el orden de las pasadas)
+            if pares['pasada'].notna().any():
+                por_pasada = pares['pasada'].value_counts()
+                stats['pasadas'] = {nombre: int(por_pasada.get(nombre, 0)) for nombre in (self.cascada or por_pasada.index)}
         
         # Montos sin conciliar
-        if not unmatched_banco.empty:
-            if 'Débito' in unmatched_banco.columns and 'Crédito' in unmatched_banco.columns:
-                debito_no_conciliado = unmatched_banco['Débito'].fillna(0).sum()
-                credito_no_conciliado = unmatched_banco['Crédito'].fillna(0).sum()
-                stats['monto_sin_conciliar_banco'] = abs(debito_no_conciliado) + abs(credito_no_conciliado)
-            elif 'Monto_Neto' in unmatched_banco.columns:
-                stats['monto_sin_conciliar_banco'] = abs(unmatched_banco['Monto_Neto'].sum())
-        
-        if not unmatched_sistema.empty:
-            if 'debe' in unmatched_sistema.columns and 'haber' in unmatched_sistema.columns:
-                debe_no_conciliado = unmatched_sistema['debe'].fillna(0).sum()
-                haber_no_conciliado = unmatched_sistema['haber'].fillna(0).sum()
-                stats['monto_sin_conciliar_sistema'] = abs(debe_no_conciliado) + abs(haber_no_conciliado)
-            elif 'Debe' in unmatched_sistema.columns and 'Haber' in unmatched_sistema.columns:
-                debe_no_conciliado = unmatched_sistema['Debe'].fillna(0).sum()
-                haber_no_conciliado = unmatched_sistema['Haber'].fillna(0).sum()
-                stats['monto_sin_conciliar_sistema'] = abs(debe_no_conciliado) + abs(haber_no_conciliado)
-            elif 'Monto' in unmatched_sistema.columns:
-                stats['monto_sin_conciliar_sistema'] = abs(unmatched_sistema['Monto'].sum())
+        banco = sumas['banco']
+        if sumas['filas_banco']:
+            if 'Débito' in banco and 'Crédito' in banco:
+                stats['monto_sin_conciliar_banco'] = abs(banco['Débito']) + abs(banco['Crédito'])
+            elif 'Monto_Neto' in banco:
+                stats['monto_sin_conciliar_banco'] = abs(banco['Monto_Neto'])
+        
+        sistema = sumas['sistema']
+        if sumas['filas_sistema']:
+            if 'debe' in sistema and 'haber' in sistema:
+                stats['monto_sin_conciliar_sistema'] = abs(sistema['debe']) + abs(sistema['haber'])
+            elif 'Debe' in sistema and 'Haber' in sistema:
+                stats['monto_sin_conciliar_sistema'] = abs(sistema['Debe']) + abs(sistema['Haber'])
+            elif 'Monto' in sistema:
+                stats['monto_sin_conciliar_sistema'] = abs(sistema['Monto'])
         
         # Agregar métricas de calidad al resultado
         stats['quality_metrics'] = self.quality_metrics
         
         return stats
     
+    def _sumas_estadisticas(self, banco_df, sistema_df, pares):
+        """Sumas de las columnas de las estadísticas en las filas conciliadas y sin conciliar de cada lado
+        
+        Las filas conciliadas son las de los IDs de pares (máscaras isin) y el resto las sin
+        conciliar. Como en matched, una columna conciliada viene del lado que la tiene: si está
+        en los dos lados, en matched solo aparece con sufijo y no se suma como conciliada. Sin
+        pares no hay sumas conciliadas (matched queda vacío).
+        """
+        columnas_banco = {col: banco_df[col] for col in COLUMNAS_ESTADISTICAS if col in banco_df.columns}
+        columnas_sistema = {col: sistema_df[col] for col in COLUMNAS_ESTADISTICAS if col in sistema_df.columns}
+        if self.workflow_type == 'workflow_2':
+            # Como en _datos_workflow2: sin Débito/Crédito se usan Debito/Credito (o 0)
+            for columna, alternativa in (('Crédito', 'Credito'), ('Débito', 'Debito')):
+                if columna not in banco_df.columns:
+                    columnas_banco[columna] = banco_df[alternativa] if alternativa in banco_df.columns else pd.Series(0, index=banco_df.index)
+        nombres_banco = set(banco_df.columns) | set(columnas_banco)
+        nombres_sistema = set(sistema_df.columns)
+        
+        en_banco = banco_df['ID_banco'].isin(pares['ID_banco']).to_numpy()
+        en_sistema = sistema_df['ID_sistema'].isin(pares['ID_sistema']).to_numpy()
+        sumas = {'conciliadas': {}, 'banco': {}, 'sistema': {}, 'tipos_match': None,
+                 'filas_banco': int((~en_banco).sum()), 'filas_sistema': int((~en_sistema).sum())}
+        for lado, columnas, en_pares, otro_lado in (('banco', columnas_banco, en_banco, nombres_sistema),
+                                                    ('sistema', columnas_sistema, en_sistema, nombres_banco)):
+            # Posiciones de cada máscara una sola vez; los valores se toman sin el índice
+            conciliadas, sin_conciliar = np.flatnonzero(en_pares), np.flatnonzero(~en_pares)
+            for columna, serie in columnas.items():
+                valores = serie.to_numpy()
+                if columna == 'Match_Type':
+                    if len(pares) and columna not in otro_lado:
+                        sumas['tipos_match'] = pd.Series(valores.take(conciliadas)).value_counts().to_dict()
+                    continue
+                sumas[lado][columna] = pd.Series(valores.take(sin_conciliar)).sum()
+                if len(pares) and columna not in otro_lado:
+                    sumas['conciliadas'][columna] = pd.Series(valores.take(conciliadas)).sum()
+        return sumas
+    
     def _analyze_data_quality(self, banco_df, sistema_df):
         """Analiza la calidad de los datos antes de la conciliación"""
         quality = {
@@ -591,8 +1361,8 @@ class ReconciliationEngine:
         # Análisis de rangos de fechas
         if fecha_col and 'Fecha' in banco_df.columns:
             try:
-                banco_dates = pd.to_datetime(banco_df['Fecha'], errors='coerce')
-                sistema_dates = pd.to_datetime(sistema_df[fecha_col], errors='coerce')
+                banco_dates = self.date_parser.parsear(banco_df['Fecha'], formato=None, normalizar=False)
+                sistema_dates = self.date_parser.parsear(sistema_df[fecha_col], formato=None, normalizar=False)
                 
                 banco_min = banco_dates.min()
                 banco_max = banco_dates.max()
@@ -609,47 +1379,38 @@ class ReconciliationEngine:
         # Guardar métricas de calidad
         self.quality_metrics = quality
         
-        # Imprimir warnings de calidad
+        # Informar warnings de calidad
         if quality['banco_issues']:
-            print(f"⚠️ Problemas en banco: {'; '.join(quality['banco_issues'])}")
+            logger.warning("⚠️ Problemas en banco: %s", '; '.join(quality['banco_issues']))
         if quality['sistema_issues']:
-            print(f"⚠️ Problemas en sistema: {'; '.join(quality['sistema_issues'])}")
+            logger.warning("⚠️ Problemas en sistema: %s", '; '.join(quality['sistema_issues']))
         if quality['general_warnings']:
-            print(f"⚠️ Advertencias generales: {'; '.join(quality['general_warnings'])}")
+            logger.warning("⚠️ Advertencias generales: %s", '; '.join(quality['general_warnings']))
         
         return quality
     
-    def _calculate_workflow2_totals(self, verificadas, banco_noverif, sistema_noverif):
+    def _calculate_workflow2_totals(self, sumas, total_matched):
         """Calcula totales detallados para Workflow 2 siguiendo el código del usuario"""
         totals = {}
+        conciliadas, banco, sistema = sumas['conciliadas'], sumas['banco'], sumas['sistema']
         
-        # Reconstruir datos originales
-        banco_original = pd.concat([verificadas, banco_noverif]) if not verificadas.empty else banco_noverif
-        sistema_original = pd.concat([verificadas, sistema_noverif]) if not verificadas.empty else sistema_noverif
-        
-        # TOTALES ORIGINALES del banco y sistema
-        totals['total_debito_original'] = banco_original.get('Débito', pd.Series([])).sum()
-        totals['total_credito_original'] = banco_original.get('Crédito', pd.Series([])).sum()
-        totals['total_debe_original'] = sistema_original.get('debe', pd.Series([])).sum()
-        totals['total_haber_original'] = sistema_original.get('haber', pd.Series([])).sum()
+        # TOTALES ORIGINALES del banco y sistema: verificadas + no verificadas de cada lado
+        totals['total_debito_original'] = conciliadas.get('Débito', 0) + banco.get('Débito', 0)
+        totals['total_credito_original'] = conciliadas.get('Crédito', 0) + banco.get('Crédito', 0)
+        totals['total_debe_original'] = conciliadas.get('debe', 0) + sistema.get('debe', 0)
+        totals['total_haber_original'] = conciliadas.get('haber', 0) + sistema.get('haber', 0)
         
         # TOTALES VERIFICADAS
-        if not verificadas.empty:
-            totals['total_debito_verificadas'] = verificadas.get('Débito', pd.Series([])).sum()
-            totals['total_credito_verificadas'] = verificadas.get('Crédito', pd.Series([])).sum()
-            totals['total_debe_verificadas'] = verificadas.get('debe', pd.Series([])).sum()
-            totals['total_haber_verificadas'] = verificadas.get('haber', pd.Series([])).sum()
-        else:
-            totals['total_debito_verificadas'] = 0
-            totals['total_credito_verificadas'] = 0
-            totals['total_debe_verificadas'] = 0
-            totals['total_haber_verificadas'] = 0
+        totals['total_debito_verificadas'] = conciliadas.get('Débito', 0)
+        totals['total_credito_verificadas'] = conciliadas.get('Crédito', 0)
+        totals['total_debe_verificadas'] = conciliadas.get('debe', 0)
+        totals['total_haber_verificadas'] = conciliadas.get('haber', 0)
         
         # TOTALES NO VERIFICADAS
-        totals['total_debito_no_verificadas'] = banco_noverif.get('Débito', pd.Series([])).sum()
-        totals['total_credito_no_verificadas'] = banco_noverif.get('Crédito', pd.Series([])).sum()
-        totals['total_debe_no_verificadas'] = sistema_noverif.get('debe', pd.Series([])).sum()
-        totals['total_haber_no_verificadas'] = sistema_noverif.get('haber', pd.Series([])).sum()
+        totals['total_debito_no_verificadas'] = banco.get('Débito', 0)
+        totals['total_credito_no_verificadas'] = banco.get('Crédito', 0)
+        totals['total_debe_no_verificadas'] = sistema.get('debe', 0)
+        totals['total_haber_no_verificadas'] = sistema.get('haber', 0)
         
         # SUMAS FINALES (Check)
         totals['total_debito_check'] = totals['total_debito_verificadas'] + totals['total_debito_no_verificadas']
@@ -664,10 +1425,10 @@ class ReconciliationEngine:
         totals['dif_haber'] = round(totals['total_haber_original'] - totals['total_haber_check'])
         
         # PORCENTAJE DE VERIFICACIÓN
-        if not sistema_original.empty and 'ID_sistema' in sistema_original.columns:
-            suma_sistema = sistema_original['ID_sistema'].sum()
-            if not verificadas.empty and 'ID_sistema' in verificadas.columns:
-                suma_verificadas = verificadas['ID_sistema'].sum()
+        if total_matched + sumas['filas_sistema'] and ('ID_sistema' in conciliadas or 'ID_sistema' in sistema):
+            suma_sistema = conciliadas.get('ID_sistema', 0) + sistema.get('ID_sistema', 0)
+            if total_matched and 'ID_sistema' in conciliadas:
+                suma_verificadas = conciliadas['ID_sistema']
                 totals['porcentaje_verificacion'] = (suma_verificadas / suma_sistema) * 100 if suma_sistema > 0 else 0
             else:
                 totals['porcentaje_verificacion'] = 0
@@ -676,20 +1437,18 @@ class ReconciliationEngine:
         
         return totals
     
-    def _calculate_workflow1_totals(self, verificadas, banco_noverif, sistema_noverif):
+    def _calculate_workflow1_totals(self, sumas, total_matched):
         """Calcula totales básicos para Workflow 1"""
         totals = {}
+        conciliadas = sumas['conciliadas']
         
         # Para Workflow 1, usar las columnas estándar
-        banco_original = pd.concat([verificadas, banco_noverif]) if not verificadas.empty else banco_noverif
-        sistema_original = pd.concat([verificadas, sistema_noverif]) if not verificadas.empty else sistema_noverif
-        
-        totals['total_banco_original'] = banco_original.get('Monto_Neto', pd.Series([])).sum()
-        totals['total_sistema_original'] = sistema_original.get('Monto', pd.Series([])).sum()
+        totals['total_banco_original'] = conciliadas.get('Monto_Neto', 0) + sumas['banco'].get('Monto_Neto', 0)
+        totals['total_sistema_original'] = conciliadas.get('Monto', 0) + sumas['sistema'].get('Monto', 0)
         
-        if not verificadas.empty:
-            totals['total_verificadas'] = len(verificadas)
-            totals['monto_verificadas'] = verificadas.get('Monto_Banco', pd.Series([])).sum()
+        if total_matched:
+            totals['total_verificadas'] = total_matched
+            totals['monto_verificadas'] = conciliadas.get('Monto_Banco', 0)
         else:
             totals['total_verificadas'] = 0
             totals['monto_verificadas'] = 0
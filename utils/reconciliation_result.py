@@ -0,0 +1,89 @@
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+# Claves del resultado que se arman recién al leerlas (para mostrar o exportar)
+VISTAS = ('matched', 'unmatched_banco', 'unmatched_sistema')
+
+class ReconciliationResult(MutableMapping):
+    """Resultado de ReconciliationEngine.reconcile: mismas claves que el dict original, sin copias anchas
+    
+    Guarda una sola vez los datos preparados (banco_data, sistema_data) y los pares conciliados
+    (ID_banco, ID_sistema, pasada, dif_dias; el índice es el de matched). 'matched',
+    'unmatched_banco' y 'unmatched_sistema' se arman con el motor al leerlas y no quedan
+    guardados en el resultado; dentro de memoizar_vistas() cada una se arma una sola vez (por
+    ejemplo durante un render que la lee desde varias secciones). Una clave asignada (por
+    ejemplo result['matched'] = df) deja de ser perezosa.
+    """
+    
+    def __init__(self, valores, pares, motor=None):
+        # Las vistas sin valor en 'valores' son perezosas (requieren el motor)
+        self.pares = pares
+        self._motor = motor
+        self._perezosas = {clave for clave in VISTAS if clave not in valores}
+        self._valores = {clave: valores.get(clave) for clave in VISTAS}
+        self._valores.update(valores)
+        # Vistas ya armadas mientras hay algún bloque memoizar_vistas() abierto
+        self._memoizadas = {}
+        self._bloques_memoria = 0
+    
+    def __getitem__(self, clave):
+        if clave not in self._perezosas:
+            return self._valores[clave]
+        if clave in self._memoizadas:
+            return self._memoizadas[clave]
+        vista = self._motor.vista_resultado(clave, self._valores['banco_data'], self._valores['sistema_data'], self.pares)
+        if self._bloques_memoria:
+            self._memoizadas[clave] = vista
+        return vista
+    
+    def __setitem__(self, clave, valor):
+        self._perezosas.discard(clave)
+        self._memoizadas.pop(clave, None)
+        self._valores[clave] = valor
+    
+    def __delitem__(self, clave):
+        self._perezosas.discard(clave)
+        self._memoizadas.pop(clave, None)
+        del self._valores[clave]
+    
+    def __contains__(self, clave):
+        return clave in self._valores
+    
+    def __iter__(self):
+        return iter(self._valores)
+    
+    def __len__(self):
+        return len(self._valores)
+    
+    def __repr__(self):
+        perezosas = ', '.join(sorted(self._perezosas)) or 'ninguna'
+        return f"ReconciliationResult({len(self.pares)} pares, claves={list(self._valores)}, perezosas: {perezosas})"
+    
+    @contextmanager
+    def memoizar_vistas(self):
+        """Dentro del bloque cada vista se arma una sola vez y se comparte entre lecturas
+        
+        Las vistas compartidas no se deben modificar (quien las cambia trabaja sobre una copia).
+        Al cerrar el último bloque se liberan.
+        """
+        self._bloques_memoria += 1
+        try:
+            yield self
+        finally:
+            self._bloques_memoria -= 1
+            if not self._bloques_memoria:
+                self._memoizadas = {}
+    
+    def es_perezosa(self, clave):
+        """Indica si la clave se arma al leerla"""
+        return clave in self._perezosas
+    
+    def filas(self, clave):
+        """Cantidad de filas de una vista sin armarla (los IDs de los datos preparados son únicos)"""
+        if clave not in self._perezosas:
+            return len(self._valores[clave])
+        if clave == 'matched':
+            return len(self.pares)
+        if clave == 'unmatched_banco':
+            return len(self._valores['banco_data']) - len(self.pares)
+        return len(self._valores['sistema_data']) - len(self.pares)
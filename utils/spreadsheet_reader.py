@@ -0,0 +1,338 @@
+import math
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import time
+import numpy as np
+import pandas as pd
+from utils.streaming_reader import StreamingReader
+
+# Textos que pd.read_excel interpreta como valores nulos
+TEXTOS_NULOS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+# Espacios de nombres de SpreadsheetML (transicional)
+NS_HOJA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# Códigos de error de Excel (openpyxl los devuelve como texto en modo values_only)
+ERRORES_EXCEL = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'}
+
+class SpreadsheetReader:
+    """Lectura de planillas XLSX/XLS fila por fila, armando columnas sin pasar por pd.read_excel"""
+    
+    def __init__(self, processor, chunk_size=50000):
+        self.processor = processor
+        self.chunk_size = chunk_size
+        self.streaming = StreamingReader(processor, chunk_size=chunk_size)
+    
+    def read_bank_file(self, uploaded_file):
+        """Lee y limpia una planilla bancaria deteniéndose en "Saldo Final" """
+        bloques = self.iter_chunks(uploaded_file)
+        try:
+            return self.streaming.process_bank_chunks(bloques, leer_hasta_el_final=False, inferir_fechas=True)
+        finally:
+            bloques.close()
+    
+    def read_system_file(self, uploaded_file):
+        """Lee y limpia una planilla del sistema deteniéndose en "Saldos Finales" """
+        bloques = self.iter_chunks(uploaded_file)
+        try:
+            return self.streaming.process_system_chunks(bloques, leer_hasta_el_final=False, inferir_fechas=True)
+        finally:
+            bloques.close()
+    
+    def iter_chunks(self, uploaded_file):
+        """Itera la primera hoja en bloques columnares (la primera fila son los nombres, como en read_excel)"""
+        filas = self._iter_filas(uploaded_file)
+        try:
+            columnas = self._nombres_columnas(next(filas, []))
+            ancho = len(columnas)
+            valores = [[] for _ in range(ancho)]
+            n = 0
+            
+            for fila in filas:
+                if len(fila) > ancho:
+                    # Fila más ancha: agregar columnas vacías hacia atrás
+                    for i in range(ancho, len(fila)):
+                        valores.append([np.nan] * n)
+                        columnas.append(f"Unnamed: {i}")
+                    ancho = len(fila)
+                for i in range(ancho):
+                    valores[i].append(fila[i] if i < len(fila) else np.nan)
+                n += 1
+                
+                if n >= self.chunk_size:
+                    yield self._armar_bloque(columnas, valores)
+                    valores = [[] for _ in range(ancho)]
+                    n = 0
+            
+            if n:
+                yield self._armar_bloque(columnas, valores)
+        finally:
+            filas.close()
+    
+    def _armar_bloque(self, columnas, valores):
+        """Arma un DataFrame a partir de arreglos por columna"""
+        bloque = pd.DataFrame({i: np.array(col, dtype=object) for i, col in enumerate(valores)})
+        bloque.columns = list(columnas)
+        return bloque
+    
+    def _nombres_columnas(self, fila):
+        """Nombres de columnas a partir de la primera fila (vacías y duplicadas como pandas)"""
+        columnas = []
+        vistos = {}
+        for i, valor in enumerate(fila):
+            nombre = f"Unnamed: {i}" if pd.isna(valor) else valor
+            if nombre in vistos:
+                vistos[nombre] += 1
+                nombre_nuevo = f"{nombre}.{vistos[nombre]}"
+                while nombre_nuevo in vistos:
+                    vistos[nombre] += 1
+                    nombre_nuevo = f"{nombre}.{vistos[nombre]}"
+                vistos[nombre_nuevo] = 0
+                nombre = nombre_nuevo
+            else:
+                vistos[nombre] = 0
+            columnas.append(nombre)
+        return columnas
+    
+    def _iter_filas(self, uploaded_file):
+        """Itera filas con celdas convertidas según la extensión del archivo"""
+        nombre = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+        if nombre.endswith('.xlsx'):
+            return self._iter_filas_xlsx(uploaded_file)
+        elif nombre.endswith('.xls'):
+            return self._iter_filas_xls(uploaded_file)
+        raise ValueError(f"Formato de planilla no soportado: {nombre}")
+    
+    def _iter_filas_xlsx(self, uploaded_file):
+        """Filas de un XLSX leyendo el XML de la hoja directamente (openpyxl como respaldo)"""
+        if hasattr(uploaded_file, 'seek'):
+            uploaded_file.seek(0)
+        try:
+            libro = _LibroXlsx(uploaded_file)
+        except (KeyError, ValueError, IndexError, zipfile.BadZipFile, ET.ParseError):
+            # Estructura no estándar (p. ej. OOXML estricto): usar openpyxl en modo solo lectura
+            yield from self._iter_filas_openpyxl(uploaded_file)
+            return
+        try:
+            for fila in libro.iter_filas():
+                yield self._recortar([self._celda_xlsx(v) for v in fila])
+        finally:
+            libro.close()
+    
+    def _iter_filas_openpyxl(self, uploaded_file):
+        """Filas de un XLSX con openpyxl en modo solo lectura (sin objetos de celda)"""
+        import openpyxl
+        
+        if hasattr(uploaded_file, 'seek'):
+            uploaded_file.seek(0)
+        libro = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True, keep_links=False)
+        try:
+            hoja = libro.worksheets[0]
+            hoja.reset_dimensions()
+            for fila in hoja.iter_rows(values_only=True):
+                yield self._recortar([self._celda_xlsx(v) for v in fila])
+        finally:
+            libro.close()
+    
+    def _iter_filas_xls(self, uploaded_file):
+        """Filas de un XLS (xlrd necesita el contenido completo, pero no se arma el DataFrame)"""
+        import xlrd
+        
+        if isinstance(uploaded_file, str):
+            libro = xlrd.open_workbook(uploaded_file, on_demand=True)
+        else:
+            libro = xlrd.open_workbook(file_contents=uploaded_file.getvalue(), on_demand=True)
+        try:
+            hoja = libro.sheet_by_index(0)
+            for i in range(hoja.nrows):
+                fila = [
+                    self._celda_xls(valor, tipo, libro.datemode)
+                    for valor, tipo in zip(hoja.row_values(i), hoja.row_types(i))
+                ]
+                yield self._recortar(fila)
+        finally:
+            libro.release_resources()
+    
+    def _recortar(self, fila):
+        """Quita celdas vacías al final de la fila, como hace pandas"""
+        while fila and _es_vacia(fila[-1]):
+            fila.pop()
+        return fila
+    
+    def _celda_xlsx(self, valor):
+        """Convierte una celda de openpyxl igual que el lector de pandas"""
+        if valor is None:
+            return np.nan
+        if isinstance(valor, bool):
+            return valor
+        if isinstance(valor, float):
+            return int(valor) if valor.is_integer() else valor
+        if isinstance(valor, str) and (valor in TEXTOS_NULOS or valor in ERRORES_EXCEL):
+            return np.nan
+        return valor
+    
+    def _celda_xls(self, valor, tipo, datemode):
+        """Convierte una celda de xlrd igual que el lector de pandas"""
+        import xlrd
+        
+        if tipo in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return np.nan
+        if tipo == xlrd.XL_CELL_BOOLEAN:
+            return bool(valor)
+        if tipo == xlrd.XL_CELL_NUMBER:
+            return int(valor) if math.trunc(valor) == valor else valor
+        if tipo == xlrd.XL_CELL_DATE:
+            try:
+                fecha = xlrd.xldate.xldate_as_datetime(valor, datemode)
+            except OverflowError:
+                return valor
+            # Celdas con solo hora
+            if (not datemode and fecha.timetuple()[0:3] == (1899, 12, 31)) or (datemode and fecha.timetuple()[0:3] == (1904, 1, 1)):
+                return time(fecha.hour, fecha.minute, fecha.second, fecha.microsecond)
+            return fecha
+        if isinstance(valor, str) and valor in TEXTOS_NULOS:
+            return np.nan
+        return valor
+
+class _LibroXlsx:
+    """Lector mínimo de la primera hoja de un XLSX (valores cacheados, como data_only=True)"""
+    
+    def __init__(self, archivo):
+        self.zip = zipfile.ZipFile(archivo)
+        try:
+            self.ruta_hoja, self.epoch = self._primera_hoja()
+            self.textos = self._textos_compartidos()
+            self.estilos_fecha, self.estilos_duracion = self._estilos_fecha()
+        except Exception:
+            self.zip.close()
+            raise
+    
+    def close(self):
+        self.zip.close()
+    
+    def _primera_hoja(self):
+        """Ruta de la primera hoja según workbook.xml y su archivo de relaciones"""
+        from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+        
+        libro = ET.parse(self.zip.open('xl/workbook.xml')).getroot()
+        if not libro.tag.startswith(NS_HOJA):
+            raise ValueError("Espacio de nombres XLSX no soportado")
+        
+        propiedades = libro.find(f'{NS_HOJA}workbookPr')
+        fecha_1904 = propiedades is not None and propiedades.get('date1904') in ('1', 'true')
+        epoch = CALENDAR_MAC_1904 if fecha_1904 else CALENDAR_WINDOWS_1900
+        
+        hoja = libro.find(f'{NS_HOJA}sheets/{NS_HOJA}sheet')
+        rel_id = hoja.get(f'{NS_REL}id')
+        relaciones = ET.parse(self.zip.open('xl/_rels/workbook.xml.rels')).getroot()
+        for rel in relaciones:
+            if rel.get('Id') == rel_id:
+                destino = rel.get('Target')
+                ruta = destino.lstrip('/') if destino.startswith('/') else f'xl/{destino}'
+                return ruta, epoch
+        raise KeyError(rel_id)
+    
+    def _textos_compartidos(self):
+        """Tabla de textos compartidos (texto plano, sin formato enriquecido ni fonética)"""
+        if 'xl/sharedStrings.xml' not in self.zip.namelist():
+            return []
+        textos = []
+        for _, elemento in ET.iterparse(self.zip.open('xl/sharedStrings.xml')):
+            if elemento.tag == f'{NS_HOJA}si':
+                textos.append(_texto_celda(elemento))
+                elemento.clear()
+        return textos
+    
+    def _estilos_fecha(self):
+        """Índices de estilos de celda con formato de fecha y de duración"""
+        from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+        
+        if 'xl/styles.xml' not in self.zip.namelist():
+            return set(), set()
+        estilos = ET.parse(self.zip.open('xl/styles.xml')).getroot()
+        formatos = {int(f.get('numFmtId')): f.get('formatCode') for f in estilos.iter(f'{NS_HOJA}numFmt')}
+        fechas, duraciones = set(), set()
+        celdas = estilos.find(f'{NS_HOJA}cellXfs')
+        for i, xf in enumerate(celdas if celdas is not None else []):
+            id_formato = int(xf.get('numFmtId', 0))
+            codigo = formatos.get(id_formato, BUILTIN_FORMATS.get(id_formato))
+            if codigo and is_date_format(codigo):
+                fechas.add(str(i))
+                if is_timedelta_format(codigo):
+                    duraciones.add(str(i))
+        return fechas, duraciones
+    
+    def iter_filas(self):
+        """Itera las filas de la hoja con valores Python, completando filas y celdas faltantes"""
+        from openpyxl.utils.datetime import from_excel, from_ISO8601
+        
+        tag_fila, tag_celda, tag_valor = f'{NS_HOJA}row', f'{NS_HOJA}c', f'{NS_HOJA}v'
+        numero_fila = 0
+        fila = []
+        for evento, elemento in ET.iterparse(self.zip.open(self.ruta_hoja), events=('start', 'end')):
+            if evento == 'start':
+                if elemento.tag == tag_fila:
+                    fila = []
+                    r = elemento.get('r')
+                    siguiente = int(r) if r else numero_fila + 1
+                    # Filas ausentes en el XML se leen como filas vacías
+                    while numero_fila + 1 < siguiente:
+                        numero_fila += 1
+                        yield []
+                    numero_fila = siguiente
+                continue
+            
+            if elemento.tag == tag_celda:
+                ref = elemento.get('r')
+                columna = _columna(ref) if ref else len(fila) + 1
+                while len(fila) < columna - 1:
+                    fila.append(None)
+                
+                tipo = elemento.get('t', 'n')
+                valor = elemento.findtext(tag_valor) or None
+                if tipo == 'inlineStr':
+                    en_linea = elemento.find(f'{NS_HOJA}is')
+                    valor = _texto_celda(en_linea) if en_linea is not None else None
+                elif valor is not None:
+                    if tipo == 'n':
+                        valor = float(valor) if ('.' in valor or 'E' in valor or 'e' in valor) else int(valor)
+                        estilo = elemento.get('s')
+                        if estilo in self.estilos_fecha:
+                            try:
+                                valor = from_excel(valor, self.epoch, timedelta=estilo in self.estilos_duracion)
+                            except (OverflowError, ValueError):
+                                valor = '#VALUE!'
+                    elif tipo == 's':
+                        valor = self.textos[int(valor)]
+                    elif tipo == 'b':
+                        valor = bool(int(valor))
+                    elif tipo == 'd':
+                        valor = from_ISO8601(valor)
+                fila.append(valor)
+                elemento.clear()
+            elif elemento.tag == tag_fila:
+                yield fila
+                elemento.clear()
+
+def _texto_celda(elemento):
+    """Texto de un <si> o <is>: nodos <t> directos y de fragmentos <r> (sin fonética <rPh>)"""
+    partes = [elemento.findtext(f'{NS_HOJA}t') or '']
+    partes.extend(r.findtext(f'{NS_HOJA}t') or '' for r in elemento.findall(f'{NS_HOJA}r'))
+    return ''.join(partes)
+
+def _columna(referencia):
+    """Número de columna (1 = A) a partir de una referencia como 'AB12'"""
+    columna = 0
+    for caracter in referencia:
+        if not caracter.isalpha():
+            break
+        columna = columna * 26 + ord(caracter.upper()) - 64
+    return columna
+
+def _es_vacia(valor):
+    """Indica si una celda convertida está vacía"""
+    return isinstance(valor, float) and math.isnan(valor)
@@ -0,0 +1,296 @@
+import io
+import logging
+import pandas as pd
+import numpy as np
+from utils.marker_scanner import SALDO_FINAL_BANCO
+
+logger = logging.getLogger(__name__)
+
+class StreamingReader:
+    """Lectura por bloques de archivos sin cargar el archivo completo en memoria"""
+    
+    # Filas mínimas para detectar Scotia (20) y su header "Dep. Origen" (25)
+    FILAS_PREFIJO = 25
+    
+    def __init__(self, processor, chunk_size=50000):
+        self.processor = processor
+        self.chunk_size = max(int(chunk_size), self.FILAS_PREFIJO)
+    
+    def iter_csv_chunks(self, uploaded_file):
+        """Itera un CSV en bloques de filas, decodificando el archivo de a partes"""
+        stream, cerrar = self._abrir_texto(uploaded_file)
+        try:
+            # dtype=str conserva el texto original; la inferencia numérica se hace al final
+            for chunk in pd.read_csv(stream, dtype=str, chunksize=self.chunk_size):
+                yield chunk
+        finally:
+            cerrar()
+    
+    def _abrir_texto(self, uploaded_file):
+        """Abre el archivo como flujo de texto UTF-8 sin copiar su contenido"""
+        if isinstance(uploaded_file, str):
+            stream = open(uploaded_file, encoding='utf-8')
+            return stream, stream.close
+        
+        if hasattr(uploaded_file, 'seek'):
+            uploaded_file.seek(0)
+        stream = io.TextIOWrapper(uploaded_file, encoding='utf-8')
+        # detach() evita cerrar el archivo subido al terminar la lectura
+        return stream, stream.detach
+    
+    def read_bank_csv(self, uploaded_file):
+        """Lee y limpia un CSV bancario por bloques"""
+        return self.process_bank_chunks(self.iter_csv_chunks(uploaded_file))
+    
+    def read_system_csv(self, uploaded_file):
+        """Lee y limpia un CSV del sistema por bloques"""
+        return self.process_system_chunks(self.iter_csv_chunks(uploaded_file))
+    
+    def process_bank_chunks(self, chunks, inferir_numericas=True, leer_hasta_el_final=True, inferir_fechas=False):
+        """Procesa bloques de un archivo bancario con el mismo resultado que process_bank_file
+        
+        Con leer_hasta_el_final=False la lectura se detiene en "Saldo Final"; los tipos numéricos
+        se infieren entonces solo con las filas leídas.
+        """
+        proc = self.processor
+        estado = _EstadoLectura(inferir_numericas, inferir_fechas)
+        prefijo = []
+        is_scotia = None
+        ubicacion = None
+        
+        for chunk in chunks:
+            estado.registrar(chunk)
+            if estado.cortado:
+                if not leer_hasta_el_final:
+                    break
+                continue
+            
+            if is_scotia is None:
+                # Acumular el prefijo necesario para detectar Scotia como en el método original
+                prefijo.append(chunk)
+                if sum(len(c) for c in prefijo) < self.FILAS_PREFIJO:
+                    continue
+                chunk = pd.concat(prefijo)
+                prefijo = []
+                ubicacion = proc._localizar_header(chunk, 'banco')
+                is_scotia = ubicacion['layout'] == 'scotia'
+                if is_scotia:
+                    logger.info("🏦 Archivo Scotia detectado - aplicando procesamiento específico")
+                header_row = ubicacion['fila_header']
+                if header_row is not None:
+                    estado.fijar_header(chunk, header_row)
+                    self._agregar_datos_banco(estado, chunk.iloc[header_row + 1:])
+                else:
+                    # Scotia sin header: el archivo completo es dato (camino clásico); BROU: seguir buscando
+                    estado.sin_header = is_scotia
+                    estado.pendientes.append(chunk)
+            elif estado.sin_header:
+                estado.pendientes.append(chunk)
+            elif estado.header is None:
+                header_row = proc.header_locator.localizar(chunk, 'brou')['fila_header']
+                if header_row is not None:
+                    estado.fijar_header(chunk, header_row)
+                    self._agregar_datos_banco(estado, chunk.iloc[header_row + 1:])
+                else:
+                    estado.pendientes.append(chunk)
+            else:
+                self._agregar_datos_banco(estado, chunk)
+            
+            if estado.cortado and not leer_hasta_el_final:
+                break
+        
+        if prefijo:
+            # Archivo más corto que el prefijo: aplicar el método original sobre todo el contenido
+            estado.pendientes.extend(prefijo)
+            estado.sin_header = True
+        
+        logger.info("📋 Procesando archivo banco por bloques: %s filas leídas", estado.filas_leidas)
+        if estado.header is None:
+            return proc.process_bank_file(estado.armar_crudo())
+        
+        if is_scotia:
+            logger.info("✅ Headers Scotia encontrados en fila %s", estado.fila_header)
+        else:
+            logger.info("✅ Headers banco encontrados en fila %s", estado.fila_header)
+        df_clean = estado.armar_con_header()
+        df_clean = proc._mapear_columnas(df_clean, ubicacion)
+        # Las marcas de cada bloque ya se calcularon al buscar el corte: no se vuelve a escanear
+        return proc._finalizar_archivo_banco(df_clean, estado.armar_marcas(), ubicacion)
+    
+    def _agregar_datos_banco(self, estado, bloque):
+        """Agrega filas de datos del banco hasta encontrar "Saldo Final" """
+        if bloque.empty:
+            return
+        scanner = self.processor.marker_scanner
+        filas = scanner.filas(scanner.escanear(bloque))
+        corte = scanner.primera(filas, SALDO_FINAL_BANCO)
+        if corte is not None:
+            bloque = bloque.iloc[:corte]
+            filas = filas[:corte]
+            estado.cortado = True
+        estado.datos.append(bloque)
+        estado.marcas.append(filas)
+    
+    def process_system_chunks(self, chunks, inferir_numericas=True, leer_hasta_el_final=True, inferir_fechas=False):
+        """Procesa bloques de un archivo del sistema con el mismo resultado que process_system_file
+        
+        Con leer_hasta_el_final=False la lectura se detiene en "Saldos Finales"; las columnas que
+        solo tienen valores después del corte se descartan.
+        """
+        proc = self.processor
+        estado = _EstadoLectura(inferir_numericas, inferir_fechas)
+        ubicacion = None
+        
+        for chunk in chunks:
+            estado.registrar(chunk)
+            if estado.header is None:
+                ubicacion = proc._localizar_header(chunk, 'sistema')
+                pos = ubicacion['fila_header']
+                if pos is not None:
+                    estado.fijar_header(chunk, pos)
+                    estado.preparar_corte_sistema(proc.COLUMNAS_CORTE_SISTEMA)
+                    self._agregar_datos_sistema(estado, chunk.iloc[pos + 1:])
+                else:
+                    estado.pendientes.append(chunk)
+            else:
+                self._agregar_datos_sistema(estado, chunk)
+            
+            if not leer_hasta_el_final and estado.corte_definitivo():
+                break
+        
+        logger.info("📋 Procesando archivo sistema por bloques: %s filas leídas", estado.filas_leidas)
+        if estado.header is None:
+            return proc.process_system_file(estado.armar_crudo())
+        
+        logger.info("✅ Headers sistema encontrados en fila %s", estado.fila_header)
+        df_clean = estado.armar_con_header()
+        
+        # Columnas vacías en todo el cuerpo del archivo (incluso después del corte)
+        df_clean = df_clean.iloc[:, np.flatnonzero(estado.con_valores)]
+        
+        corte = estado.corte_sistema()
+        if corte is not None:
+            df_clean = df_clean.iloc[:corte].reset_index(drop=True)
+        
+        return proc._finalizar_archivo_sistema(df_clean, ubicacion=ubicacion)
+    
+    def _agregar_datos_sistema(self, estado, bloque):
+        """Agrega filas del sistema registrando columnas con valores y cortes de "Saldos Finales" """
+        if bloque.empty:
+            return
+        con_valores = bloque.notna().any(axis=0).to_numpy()
+        estado.con_valores[:len(con_valores)] |= con_valores
+        if estado.corte_definitivo():
+            return
+        
+        bloque = bloque.dropna(how='all')
+        for i, pos in enumerate(estado.posiciones_corte):
+            if pos is None or estado.cortes[i] is not None:
+                continue
+            mask = self.processor._mascara_saldo_final_sistema(bloque.iloc[:, pos])
+            if mask.any():
+                estado.cortes[i] = estado.filas_datos + int(np.argmax(mask.to_numpy()))
+        
+        estado.datos.append(bloque)
+        estado.filas_datos += len(bloque)
+
+class _EstadoLectura:
+    """Estado de una lectura por bloques: header, filas conservadas y tipos inferidos"""
+    
+    def __init__(self, inferir_numericas, inferir_fechas=False):
+        self.inferir_numericas = inferir_numericas
+        self.inferir_fechas = inferir_fechas
+        self.numericas = None
+        self.fechas = None
+        self.con_valores = None
+        self.header = None
+        self.fila_header = None
+        self.filas_leidas = 0
+        self.filas_datos = 0
+        self.pendientes = []
+        self.datos = []
+        self.marcas = []
+        self.cortado = False
+        self.sin_header = False
+        self.posiciones_corte = []
+        self.cortes = []
+    
+    def registrar(self, chunk):
+        """Actualiza el conteo de filas y qué columnas siguen siendo completamente numéricas"""
+        if self.numericas is None:
+            self.numericas = np.ones(chunk.shape[1], dtype=bool)
+            self.fechas = np.ones(chunk.shape[1], dtype=bool)
+            self.con_valores = np.zeros(chunk.shape[1], dtype=bool)
+        elif chunk.shape[1] > len(self.numericas):
+            # Planillas con filas más anchas que las anteriores
+            extra = chunk.shape[1] - len(self.numericas)
+            self.numericas = np.concatenate([self.numericas, np.ones(extra, dtype=bool)])
+            self.fechas = np.concatenate([self.fechas, np.ones(extra, dtype=bool)])
+            self.con_valores = np.concatenate([self.con_valores, np.zeros(extra, dtype=bool)])
+        if self.inferir_numericas:
+            for i in np.flatnonzero(self.numericas):
+                valores = chunk.iloc[:, i].dropna()
+                if pd.api.types.is_datetime64_any_dtype(valores):
+                    self.numericas[i] = len(valores) == 0
+                elif len(valores) and pd.to_numeric(valores, errors='coerce').isna().any():
+                    self.numericas[i] = False
+        if self.inferir_fechas:
+            for i in np.flatnonzero(self.fechas):
+                valores = chunk.iloc[:, i].dropna()
+                if len(valores) and pd.api.types.infer_dtype(valores, skipna=True) not in ('datetime', 'datetime64'):
+                    self.fechas[i] = False
+        self.filas_leidas += len(chunk)
+    
+    def fijar_header(self, chunk, pos):
+        """Guarda la fila de headers y descarta las filas previas"""
+        self.header = chunk.iloc[pos:pos + 1]
+        self.fila_header = self.filas_leidas - len(chunk) + pos
+        self.pendientes = []
+    
+    def preparar_corte_sistema(self, columnas_corte):
+        """Ubica las columnas de referencia donde buscar "Saldos Finales" """
+        valores = list(self.header.iloc[0])
+        self.posiciones_corte = [valores.index(col) if col in valores else None for col in columnas_corte]
+        self.cortes = [None] * len(columnas_corte)
+    
+    def corte_definitivo(self):
+        """Indica si el corte ya no puede cambiar con más filas"""
+        for pos, corte in zip(self.posiciones_corte, self.cortes):
+            if pos is not None:
+                return corte is not None
+        return False
+    
+    def corte_sistema(self):
+        """Devuelve la fila de corte según la primera columna de referencia con coincidencias"""
+        for corte in self.cortes:
+            if corte is not None:
+                return corte
+        return None
+    
+    def _convertir_numericas(self, df):
+        """Replica la inferencia de tipos de pd.read_csv/pd.read_excel sobre las filas leídas"""
+        if self.inferir_numericas:
+            for i in np.flatnonzero(self.numericas):
+                df.isetitem(i, pd.to_numeric(df.iloc[:, i]))
+        if self.inferir_fechas:
+            for i in np.flatnonzero(self.fechas & ~self.numericas):
+                df.isetitem(i, pd.to_datetime(df.iloc[:, i]))
+        return df
+    
+    def armar_crudo(self):
+        """Reconstruye el DataFrame crudo cuando no se encontró header"""
+        df = pd.concat(self.pendientes + self.datos, ignore_index=True)
+        return self._convertir_numericas(df)
+    
+    def armar_marcas(self):
+        """Une las marcas por fila de los bloques de datos conservados"""
+        if not self.marcas:
+            return np.zeros(0, dtype=np.uint8)
+        return np.concatenate(self.marcas)
+    
+    def armar_con_header(self):
+        """Arma el DataFrame con la fila de headers como nombres de columnas"""
+        df = pd.concat([self.header] + self.datos, ignore_index=True)
+        df = self._convertir_numericas(df)
+        df.columns = df.iloc[0]
+        return df.drop(df.index[0]).reset_index(drop=True)